@@ -1,16 +1,24 @@
-from fastapi import APIRouter, HTTPException
+from fastapi import APIRouter, HTTPException, Header
 from typing import Dict, Any, List, Optional
 from .. import data_store
+from .responses import parse_fields, project, encode_response
 
 router = APIRouter()
 
 @router.get("/containers")
-def read_containers(skip: int = 0, limit: int = 100):
+def read_containers(
+    skip: int = 0,
+    limit: int = 100,
+    fields: Optional[str] = None,
+    encoding: Optional[str] = None,
+    accept: Optional[str] = Header(None)
+):
     containers = data_store.get_all_containers(skip, limit)
-    return {
+    projected_fields = parse_fields(fields)
+    return encode_response({
         "success": True,
-        "containers": [container.to_dict() for container in containers]
-    }
+        "containers": [project(container, projected_fields) for container in containers]
+    }, encoding, accept)
 
 @router.get("/containers/{container_id}")
 def read_container(container_id: str):
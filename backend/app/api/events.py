@@ -0,0 +1,65 @@
+from fastapi import APIRouter, Header, Request
+from fastapi.responses import StreamingResponse
+from typing import Optional
+import asyncio
+import json
+from .. import data_store
+
+router = APIRouter()
+
+# Seconds between keep-alive comments on an idle stream
+HEARTBEAT_INTERVAL = 15.0
+
+@router.get("/events")
+def get_events(since: int = 0, limit: int = 100):
+    """
+    Get change events newer than `since` (a data store version), oldest first.
+    """
+    events = data_store.get_events_since(since, limit)
+    return {
+        "success": True,
+        "version": data_store.version,
+        "events": events
+    }
+
+@router.get("/events/stream")
+async def stream_events(
+    request: Request,
+    since: Optional[int] = None,
+    last_event_id: Optional[str] = Header(None),
+    interval: float = 0.25
+):
+    """
+    Push change events (item placed, retrieved, expired, waste, undocked, ...)
+    as Server-Sent Events. Reconnecting clients resume from Last-Event-ID.
+    """
+    # Resume after the last delivered event, otherwise start from now
+    if since is None:
+        since = int(last_event_id) if last_event_id and last_event_id.isdigit() else data_store.version
+    
+    async def event_stream():
+        last_seen = since
+        idle = 0.0
+        # Tell the browser how long to wait before reconnecting
+        yield "retry: 3000\n\n"
+        while not await request.is_disconnected():
+            new_events = data_store.get_events_since(last_seen)
+            for event in new_events:
+                yield f"id: {event['id']}\nevent: {event['type']}\ndata: {json.dumps(event)}\n\n"
+                last_seen = event["id"]
+            
+            if new_events:
+                idle = 0.0
+            else:
+                idle += interval
+                if idle >= HEARTBEAT_INTERVAL:
+                    yield ": keep-alive\n\n"
+                    idle = 0.0
+            
+            await asyncio.sleep(interval)
+    
+    return StreamingResponse(
+        event_stream(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
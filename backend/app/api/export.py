@@ -22,9 +22,13 @@ def export_arrangement():
         
         # Write data rows
         for item in items_with_containers:
-            # Create position data (simplified for in-memory implementation)
-            start_coords = "(0,0,0)"
-            end_coords = f"({item.width},{item.depth},{item.height})"
+            position = item.position()
+            if position:
+                start, end = position["startCoordinates"], position["endCoordinates"]
+                start_coords = f"({start['width']},{start['depth']},{start['height']})"
+                end_coords = f"({end['width']},{end['depth']},{end['height']})"
+            else:
+                start_coords, end_coords = "", ""
             
             writer.writerow([
                 item.id,
@@ -1,6 +1,7 @@
-from fastapi import APIRouter, HTTPException, Body
+from fastapi import APIRouter, HTTPException, Body, Header
 from typing import Dict, Any, List, Optional
 from .. import data_store
+from .responses import parse_fields, project, encode_response
 
 router = APIRouter()
 
@@ -9,9 +10,16 @@ def create_item(item: Dict[str, Any] = Body(...)):
     return data_store.create_item(item).to_dict()
 
 @router.get("/items")
-def read_items(skip: int = 0, limit: int = 100):
+def read_items(
+    skip: int = 0,
+    limit: int = 100,
+    fields: Optional[str] = None,
+    encoding: Optional[str] = None,
+    accept: Optional[str] = Header(None)
+):
     items = data_store.get_all_items(skip, limit)
-    return [item.to_dict() for item in items]
+    projected_fields = parse_fields(fields)
+    return encode_response([project(item, projected_fields) for item in items], encoding, accept)
 
 @router.get("/items/{item_id}")
 def read_item(item_id: str):
@@ -27,11 +35,7 @@ def update_item(item_id: str, item_data: Dict[str, Any] = Body(...)):
         raise HTTPException(status_code=404, detail="Item not found")
     
     # Update item attributes
-    for key, value in item_data.items():
-        setattr(item, key, value)
-    
-    # Save updated item
-    updated_item = data_store.update_item(item)
+    updated_item = data_store.update_item(item_id, item_data)
     
     return updated_item.to_dict()
 
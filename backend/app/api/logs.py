@@ -1,7 +1,8 @@
-from fastapi import APIRouter, Query
+from fastapi import APIRouter, Query, Header
 from typing import Dict, Any, List, Optional
 from datetime import datetime
 from .. import data_store
+from .responses import parse_fields, project, encode_response
 
 router = APIRouter()
 
@@ -13,7 +14,10 @@ def get_logs(
     start_date: Optional[str] = None,
     end_date: Optional[str] = None,
     page: int = 1,
-    limit: int = 100
+    limit: int = 100,
+    fields: Optional[str] = None,
+    encoding: Optional[str] = None,
+    accept: Optional[str] = Header(None)
 ):
     try:
         # Get all logs
@@ -44,13 +48,14 @@ def get_logs(
         filtered_logs.sort(key=lambda x: x.timestamp, reverse=True)
         paginated_logs = filtered_logs[(page - 1) * limit:page * limit]
         
-        return {
+        projected_fields = parse_fields(fields)
+        return encode_response({
             "success": True,
-            "logs": [log.to_dict() for log in paginated_logs],
+            "logs": [project(log, projected_fields) for log in paginated_logs],
             "page": page,
             "limit": limit,
             "total": total
-        }
+        }, encoding, accept)
     
     except Exception as e:
         return {"success": False, "message": str(e)}
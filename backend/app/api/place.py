@@ -1,7 +1,7 @@
 from fastapi import APIRouter, Body, HTTPException
 from typing import Dict, Any
 from datetime import datetime
-from .. import data_store
+from .. import data_store, placement_engine, spatial
 
 router = APIRouter()
 
@@ -34,19 +34,25 @@ async def place_item(request: Dict[str, Any] = Body(...)):
         available_volume = container_volume - container.occupied_volume
         
         # Check if item fits in container
-        if item_volume > available_volume:
+        if item.container_id != container_id and item_volume > available_volume:
             return {"success": False, "message": f"Item does not fit in container. Item volume: {item_volume}, Available volume: {available_volume}"}
         
+        # A given position must match the item in some orientation and be free
+        coordinates, orientation = None, None
+        if position:
+            x, y, z, width, depth, height = placement_engine.position_box(position)
+            orientation = spatial.match_orientation(item.width, item.depth, item.height, (width, depth, height))
+            if orientation is None:
+                return {"success": False, "message": "Position does not match the item dimensions in any orientation"}
+            coordinates = (x, y, z)
+            conflict = data_store.check_position(container, item, coordinates, orientation)
+            if conflict:
+                return {"success": False, "message": conflict}
+        
         # Place item in container
-        result = data_store.place_item(item_id, container_id)
+        result = data_store.place_item(item_id, container_id, coordinates, orientation)
         
         if result:
-            # Store position information if provided
-            if position:
-                # In a real implementation, we would store the position information
-                # For the in-memory implementation, we'll just log it
-                pass
-            
             # Log the placement
             data_store.create_log({
                 "action_type": "PLACE_ITEM",
@@ -59,10 +65,26 @@ async def place_item(request: Dict[str, Any] = Body(...)):
             
             return {
                 "success": True,
-                "message": f"Item {item_id} successfully placed in container {container_id}"
+                "message": f"Item {item_id} successfully placed in container {container_id}",
+                "orientation": item.orientation,
+                "position": item.position()
             }
         else:
-            return {"success": False, "message": "Failed to place item in container"}
+            return {"success": False, "message": "No free space for the item in the container"}
+    
+    except Exception as e:
+        return {"success": False, "message": str(e)}
+
+@router.post("/place/validate")
+async def validate_placements(request: Dict[str, Any] = Body(...)):
+    try:
+        # Check a whole manual layout at once
+        results = placement_engine.validate_layout(request.get("placements", []))
+        return {
+            "success": True,
+            "valid": all(result["valid"] for result in results),
+            "results": results
+        }
     
     except Exception as e:
         return {"success": False, "message": str(e)}
@@ -1,149 +1,33 @@
-from fastapi import APIRouter, Body, HTTPException
+from fastapi import APIRouter, Body, HTTPException, Query
+from fastapi.responses import StreamingResponse
 from typing import Dict, Any, List
-from .. import data_store
+import asyncio
+import json
+from .. import data_store, placement_engine, placement_jobs
 
 router = APIRouter()
 
 @router.post("/placement")
 async def placement(request_data: Dict[str, Any] = Body(...)):
     try:
-        # Get items and containers from request
-        items_data = request_data.get('items', [])
-        containers_data = request_data.get('containers', [])
-        
-        # Process items
-        new_items = []
-        for item_data in items_data:
-            # Map API field names to internal field names
-            item_id = item_data.get('itemId', item_data.get('id', ''))
-            name = item_data.get('name', '')
-            width = float(item_data.get('width', 0))
-            depth = float(item_data.get('depth', 0))
-            height = float(item_data.get('height', 0))
-            priority = int(item_data.get('priority', 1))
-            expiry_date = item_data.get('expiryDate', None)
-            usage_limit = item_data.get('usageLimit', None)
-            preferred_zone = item_data.get('preferredZone', None)
-            
-            # Create item data dictionary
-            processed_item_data = {
-                "id": item_id,
-                "name": name,
-                "width": width,
-                "depth": depth,
-                "height": height,
-                "priority": priority
-            }
-            
-            # Add optional fields
-            if expiry_date:
-                processed_item_data["expiry_date"] = expiry_date
-            if usage_limit:
-                processed_item_data["usage_limit"] = usage_limit
-            if preferred_zone:
-                processed_item_data["preferred_zone"] = preferred_zone
-            
-            # Check if item already exists
-            existing_item = data_store.get_item(item_id)
-            if not existing_item:
-                # Create new item
-                item = data_store.create_item(processed_item_data)
-                new_items.append(item)
-            else:
-                new_items.append(existing_item)
+        # Whole station at once, or zone by zone
+        place = placement_engine.get_placer(request_data.get('mode'))
         
-        # Process containers
-        processed_containers = []
-        for container_data in containers_data:
-            # Map API field names to internal field names
-            container_id = container_data.get('containerId', container_data.get('id', ''))
-            zone = container_data.get('zone', '')
-            width = float(container_data.get('width', 0))
-            depth = float(container_data.get('depth', 0))
-            height = float(container_data.get('height', 0))
-            
-            # Create container data dictionary
-            processed_container_data = {
-                "id": container_id,
-                "zone": zone,
-                "width": width,
-                "depth": depth,
-                "height": height
-            }
-            
-            # Check if container already exists
-            existing_container = data_store.get_container(container_id)
-            if not existing_container:
-                # Create new container
-                container = data_store.create_container(processed_container_data)
-                processed_containers.append(container)
-            else:
-                processed_containers.append(existing_container)
-        
-        # If no containers were provided, use all available containers
-        if not processed_containers:
-            processed_containers = data_store.get_all_containers()
+        # Get items and containers from request
+        new_items = placement_engine.prepare_items(request_data.get('items', []))
+        processed_containers = placement_engine.prepare_containers(request_data.get('containers', []))
         
         # Find placement for items
-        placements = []
-        unplaced_items = []
+        placements, unplaced_items = place(new_items, processed_containers)
         
-        for item in new_items:
-            placed = False
-            
-            # Sort containers by preferred zone (if specified) and available space
-            def container_sort_key(container):
-                # Check if item has a preferred zone
-                preferred_zone_match = 0
-                if hasattr(item, 'preferred_zone') and item.preferred_zone:
-                    preferred_zone_match = 0 if container.zone == item.preferred_zone else 1
-                
-                # Calculate available volume
-                available_volume = (container.width * container.depth * container.height) - container.occupied_volume
-                
-                return (preferred_zone_match, -available_volume)  # Negative for descending order
-            
-            sorted_containers = sorted(processed_containers, key=container_sort_key)
-            
-            for container in sorted_containers:
-                # Calculate volumes
-                item_volume = item.width * item.depth * item.height
-                container_volume = container.width * container.depth * container.height
-                available_volume = container_volume - container.occupied_volume
-                
-                # Check if item fits in container
-                if item_volume <= available_volume:
-                    # Place item in container
-                    placement = data_store.place_item(item.id, container.id)
-                    
-                    if placement:
-                        # Calculate position (simplified for in-memory implementation)
-                        position = {
-                            "startCoordinates": {
-                                "width": 0,
-                                "depth": 0,
-                                "height": 0
-                            },
-                            "endCoordinates": {
-                                "width": item.width,
-                                "depth": item.depth,
-                                "height": item.height
-                            }
-                        }
-                        
-                        placements.append({
-                            "itemId": item.id,
-                            "containerId": container.id,
-                            "position": position
-                        })
-                        placed = True
-                        break
-            
-            if not placed:
-                unplaced_items.append(item.id)
-        
-        # For now, we don't implement rearrangements
+        # Make room for items that did not fit by moving stowed items between containers
         rearrangements = []
+        stranded_items = []
+        if unplaced_items:
+            rearrangements, extra_placements, unplaced_items, stranded_items = placement_engine.rearrange_and_place(
+                unplaced_items, processed_containers
+            )
+            placements.extend(extra_placements)
         
         # Log the placement
         data_store.create_log({
@@ -154,8 +38,92 @@ async def placement(request_data: Dict[str, Any] = Body(...)):
         return {
             "success": True,
             "placements": placements,
-            "rearrangements": rearrangements
+            "rearrangements": rearrangements,
+            "unplacedItems": unplaced_items,
+            "strandedItems": stranded_items
         }
     
     except Exception as e:
         return {"success": False, "message": str(e)}
+
+@router.post("/placement/jobs")
+def submit_placement_job(request_data: Dict[str, Any] = Body(...)):
+    try:
+        job = placement_jobs.submit_job(
+            request_data.get('items', []),
+            request_data.get('containers', []),
+            request_data.get('mode')
+        )
+        
+        return {
+            "success": True,
+            "jobId": job.id,
+            "status": job.status,
+            "totalItems": job.total_items
+        }
+    
+    except Exception as e:
+        return {"success": False, "message": str(e)}
+
+@router.get("/placement/jobs/{job_id}")
+def get_placement_job(job_id: str):
+    job = placement_jobs.get_job(job_id)
+    if not job:
+        return {"success": False, "message": f"Job with ID {job_id} not found"}
+    
+    return {"success": True, **job.progress()}
+
+@router.get("/placement/jobs/{job_id}/stream")
+async def stream_placement_job(job_id: str, interval: float = 0.5):
+    job = placement_jobs.get_job(job_id)
+    if not job:
+        return {"success": False, "message": f"Job with ID {job_id} not found"}
+    
+    async def progress_events():
+        last_progress = None
+        while True:
+            progress = job.progress()
+            if progress != last_progress:
+                yield f"event: progress\ndata: {json.dumps(progress)}\n\n"
+                last_progress = progress
+            if job.is_finished():
+                break
+            await asyncio.sleep(interval)
+    
+    return StreamingResponse(progress_events(), media_type="text/event-stream")
+
+@router.delete("/placement/jobs/{job_id}")
+def cancel_placement_job(job_id: str):
+    job = placement_jobs.cancel_job(job_id)
+    if not job:
+        return {"success": False, "message": f"Job with ID {job_id} not found"}
+    
+    return {"success": True, **job.progress()}
+
+@router.get("/placement/jobs/{job_id}/result")
+def get_placement_job_result(job_id: str, page: int = Query(1, ge=1), limit: int = Query(100, ge=1)):
+    job = placement_jobs.get_job(job_id)
+    if not job:
+        return {"success": False, "message": f"Job with ID {job_id} not found"}
+    
+    if not job.is_finished():
+        return {"success": False, "message": f"Job {job_id} is still {job.status}", **job.progress()}
+    
+    # Apply pagination to the final plan; placements and unplaced items are paged alike
+    total = len(job.placements)
+    paginated_placements = job.placements[(page - 1) * limit:page * limit]
+    paginated_unplaced = job.unplaced_items[(page - 1) * limit:page * limit]
+    
+    return {
+        "success": job.status != placement_jobs.FAILED,
+        "jobId": job.id,
+        "status": job.status,
+        "error": job.error,
+        "placements": paginated_placements,
+        "unplacedItems": paginated_unplaced,
+        "rearrangements": [],
+        "page": page,
+        "limit": limit,
+        "total": total,
+        "totalUnplaced": len(job.unplaced_items)
+    }
@@ -0,0 +1,84 @@
+"""
+Helpers for shaping list responses: field projection of serialised records
+and opt-in compact encodings (orjson or msgpack).
+"""
+from fastapi.responses import JSONResponse, Response
+from typing import Any, Dict, List, Optional
+
+# Optional fast encoders
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+try:
+    import msgpack
+except ImportError:
+    msgpack = None
+
+MSGPACK_MEDIA_TYPE = "application/msgpack"
+
+def parse_fields(fields: Optional[str]) -> Optional[List[str]]:
+    """
+    Parse a comma-separated `fields` query parameter.
+    
+    Returns:
+        List of field names, or None when every field should be returned
+    """
+    if not fields:
+        return None
+    parsed = [field.strip() for field in fields.split(",") if field.strip()]
+    return parsed or None
+
+def project(record: Any, fields: Optional[List[str]]) -> Dict[str, Any]:
+    """
+    Serialise a data store record, keeping only the requested fields.
+    Unknown field names are ignored.
+    """
+    data = record.to_dict() if hasattr(record, "to_dict") else record
+    if fields is None:
+        return data
+    return {field: data[field] for field in fields if field in data}
+
+def encode_response(content: Any, encoding: Optional[str] = None, accept: Optional[str] = None) -> Any:
+    """
+    Encode a response body with the requested encoder.
+    
+    Args:
+        content: JSON-compatible response body
+        encoding: "json" (default), "orjson" or "msgpack"
+        accept: The request's Accept header; application/msgpack selects msgpack
+        
+    Returns:
+        The content unchanged for FastAPI's default JSON encoding, otherwise a Response
+    """
+    if not encoding and accept and MSGPACK_MEDIA_TYPE in accept:
+        encoding = "msgpack"
+    
+    if not encoding or encoding == "json":
+        return content
+    
+    if encoding == "orjson":
+        if orjson is None:
+            # Same wire format, just the slower encoder
+            return content
+        return Response(
+            content=orjson.dumps(content, default=str, option=orjson.OPT_NON_STR_KEYS),
+            media_type="application/json"
+        )
+    
+    if encoding == "msgpack":
+        if msgpack is None:
+            return JSONResponse(
+                status_code=406,
+                content={"success": False, "message": "msgpack encoding is not available on this server"}
+            )
+        return Response(
+            content=msgpack.packb(content, use_bin_type=True, default=str),
+            media_type=MSGPACK_MEDIA_TYPE
+        )
+    
+    return JSONResponse(
+        status_code=400,
+        content={"success": False, "message": f"Unknown encoding: {encoding}"}
+    )
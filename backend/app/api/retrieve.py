@@ -1,7 +1,7 @@
 from fastapi import APIRouter, Body, HTTPException
 from typing import Dict, Any
 from datetime import datetime
-from .. import data_store
+from .. import data_store, retrieval
 
 router = APIRouter()
 
@@ -21,16 +21,19 @@ async def retrieve_item(request: Dict[str, Any] = Body(...)):
         if not item:
             return {"success": False, "message": f"Item with ID {item_id} not found"}
         
-        # Update usage count
-        if not hasattr(item, 'usage_count'):
-            item.usage_count = 0
+        # Steps to get the item out, reused while its container is unchanged
+        retrieval_steps = []
+        container = data_store.get_container(item.container_id) if item.container_id else None
+        if container:
+            retrieval_steps = retrieval.item_extraction_plan(
+                item, container.id, container.version, lambda: data_store.container_items(container)
+            )["steps"]
         
-        item.usage_count += 1
+        # Update usage count (marks the item as waste once its limit is reached)
+        data_store.use_item(item.id, event_type="item_retrieved")
         
         # Check if item has reached usage limit
         if hasattr(item, 'usage_limit') and item.usage_limit and item.usage_count >= item.usage_limit:
-            item.status = "Waste"
-            
             # Log the usage limit reached
             data_store.create_log({
                 "action_type": "USAGE_LIMIT_REACHED",
@@ -40,9 +43,6 @@ async def retrieve_item(request: Dict[str, Any] = Body(...)):
                 "timestamp": timestamp or datetime.now().isoformat()
             })
         
-        # Update item in data store
-        data_store.update_item(item)
-        
         # Log the retrieval
         data_store.create_log({
             "action_type": "ITEM_RETRIEVED",
@@ -54,7 +54,8 @@ async def retrieve_item(request: Dict[str, Any] = Body(...)):
         
         return {
             "success": True,
-            "message": f"Item {item.id} successfully retrieved"
+            "message": f"Item {item.id} successfully retrieved",
+            "retrievalSteps": retrieval_steps
         }
     
     except Exception as e:
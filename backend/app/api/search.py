@@ -1,14 +1,142 @@
-from fastapi import APIRouter, Query
-from typing import Dict, Any, List, Optional
+from fastapi import APIRouter, Body, Query, Header
+from typing import Dict, Any, List, Optional, Tuple
 from datetime import datetime
-from .. import data_store
+from .. import data_store, retrieval, search_cache, search_ranking
+from .responses import parse_fields, project, encode_response
 
 router = APIRouter()
 
+# Results of repeated searches, valid until the data store changes
+result_cache = search_cache.SearchCache()
+
+# Most names and IDs accepted by one batch lookup
+MAX_BATCH_QUERIES = 1000
+
+# item_id match modes: exact lookups by default, substring matching on request
+EXACT_MATCH = "exact"
+SUBSTRING_MATCH = "substring"
+
+def item_location(item) -> Dict[str, Any]:
+    """Where an item is: its container, the container's zone and its position."""
+    container = data_store.get_container(item.container_id) if item.container_id else None
+    return {
+        "itemId": item.id,
+        "name": item.name,
+        "containerId": item.container_id if item.container_id else None,
+        "zone": container.zone if container else None,
+        "position": item.position() if container else None
+    }
+
+def run_search(
+    item_id: Optional[str] = None,
+    item_name: Optional[str] = None,
+    match: Optional[str] = None,
+    zone: Optional[str] = None,
+    priority_min: Optional[int] = None,
+    priority_max: Optional[int] = None,
+    expiry_before: Optional[str] = None,
+    expiry_after: Optional[str] = None,
+    usage_min: Optional[int] = None,
+    usage_max: Optional[int] = None,
+    status: Optional[str] = None,
+    sort: Optional[str] = None,
+    page: int = 1,
+    limit: int = 100,
+    fields: Optional[str] = None
+) -> Tuple[Dict[str, Any], Dict[str, Any]]:
+    """
+    Run a search against the data store.
+    
+    Returns:
+        Tuple of (response body, fields of the SEARCH log entry)
+    """
+    if match not in (None, EXACT_MATCH, SUBSTRING_MATCH):
+        raise ValueError(f"Unknown match mode: {match}")
+    
+    if item_id and match != SUBSTRING_MATCH:
+        # Exact ID lookups go straight to the item table
+        item = data_store.get_item(item_id)
+        filtered_items = [item] if item is not None else []
+        if item_name:
+            filtered_items = [item for item in filtered_items if item.name and item_name.lower() in item.name.lower()]
+    else:
+        # Text filters come from the trigram index; the rest are applied to its matches
+        filtered_items = data_store.find_items_by_text(name=item_name, item_id=item_id)
+    
+    if zone:
+        # Get containers in the specified zone
+        containers = [c for c in data_store.get_all_containers() if c.zone.lower() == zone.lower()]
+        container_ids = [c.id for c in containers]
+        filtered_items = [item for item in filtered_items if item.container_id in container_ids]
+    
+    if priority_min is not None:
+        filtered_items = [item for item in filtered_items if item.priority >= priority_min]
+    
+    if priority_max is not None:
+        filtered_items = [item for item in filtered_items if item.priority <= priority_max]
+    
+    # Compared as naive UTC, like the expiry index
+    if expiry_before:
+        expiry_date = data_store.parse_expiry_date(datetime.fromisoformat(expiry_before))
+        filtered_items = [item for item in filtered_items if item.id in data_store.expiry_keys and data_store.expiry_keys[item.id] <= expiry_date]
+    
+    if expiry_after:
+        expiry_date = data_store.parse_expiry_date(datetime.fromisoformat(expiry_after))
+        filtered_items = [item for item in filtered_items if item.id in data_store.expiry_keys and data_store.expiry_keys[item.id] >= expiry_date]
+    
+    if status:
+        filtered_items = [item for item in filtered_items if item.status.lower() == status.lower()]
+    
+    # If we have exactly one item, prepare retrieval steps
+    if len(filtered_items) == 1:
+        item = filtered_items[0]
+        container = data_store.get_container(item.container_id) if item.container_id else None
+        
+        # Items blocking the way out are moved first and put back afterwards
+        retrieval_steps = []
+        if container:
+            retrieval_steps = retrieval.item_extraction_plan(
+                item, container.id, container.version, lambda: data_store.container_items(container)
+            )["steps"]
+        
+        return {
+            "success": True,
+            "found": True,
+            "item": item_location(item),
+            "retrievalSteps": retrieval_steps
+        }, {
+            "description": f"Item {item.id} found and retrieved",
+            "item_id": item.id
+        }
+    
+    # Apply pagination for multiple results; ranking only orders the pages up to the requested one
+    total = len(filtered_items)
+    if sort == "relevance":
+        ranked = search_ranking.rank_items(filtered_items, k=page * limit)[(page - 1) * limit:]
+        paginated_items = [
+            dict(entry["item"].to_dict(), score=round(entry["score"], 4), retrieval_steps=entry["retrievalSteps"])
+            for entry in ranked
+        ]
+    else:
+        paginated_items = filtered_items[(page - 1) * limit:page * limit]
+    
+    projected_fields = parse_fields(fields)
+    return {
+        "success": True,
+        "found": total > 0,
+        "items": [project(item, projected_fields) for item in paginated_items],
+        "page": page,
+        "limit": limit,
+        "total": total
+    }, {
+        "description": f"Found {total} items matching search criteria"
+    }
+
 @router.get("/search")
 def search_items(
     item_id: Optional[str] = None,
     item_name: Optional[str] = None,
+    match: Optional[str] = None,
     user_id: Optional[str] = None,
     zone: Optional[str] = None,
     priority_min: Optional[int] = None,
@@ -18,123 +146,97 @@ def search_items(
     usage_min: Optional[int] = None,
     usage_max: Optional[int] = None,
     status: Optional[str] = None,
+    sort: Optional[str] = None,
     page: int = 1,
-    limit: int = 100
+    limit: int = 100,
+    fields: Optional[str] = None,
+    encoding: Optional[str] = None,
+    accept: Optional[str] = Header(None)
 ):
     try:
-        # Get all items
-        all_items = data_store.get_all_items()
-        
-        # Apply filters
-        filtered_items = all_items
-        
-        if item_id:
-            filtered_items = [item for item in filtered_items if item_id.lower() in item.id.lower()]
-        
-        if item_name:
-            filtered_items = [item for item in filtered_items if item.name and item_name.lower() in item.name.lower()]
-        
-        if zone:
-            # Get containers in the specified zone
-            containers = [c for c in data_store.get_all_containers() if c.zone.lower() == zone.lower()]
-            container_ids = [c.id for c in containers]
-            filtered_items = [item for item in filtered_items if item.container_id in container_ids]
-        
-        if priority_min is not None:
-            filtered_items = [item for item in filtered_items if item.priority >= priority_min]
+        filters = {
+            "item_id": item_id,
+            "item_name": item_name,
+            "match": match,
+            "zone": zone,
+            "priority_min": priority_min,
+            "priority_max": priority_max,
+            "expiry_before": expiry_before,
+            "expiry_after": expiry_after,
+            "usage_min": usage_min,
+            "usage_max": usage_max,
+            "status": status,
+            "sort": sort,
+            "page": page,
+            "limit": limit,
+            "fields": fields
+        }
         
-        if priority_max is not None:
-            filtered_items = [item for item in filtered_items if item.priority <= priority_max]
+        # Repeated filter sets are answered from the cache until the data store changes
+        key = search_cache.normalize_filters(filters)
+        state = search_cache.store_state()
+        result = result_cache.get(key)
+        if result is None:
+            result = run_search(**filters)
+            result_cache.put(key, result, state)
+        body, log_fields = result
         
-        if expiry_before:
-            expiry_date = datetime.fromisoformat(expiry_before)
-            filtered_items = [item for item in filtered_items if hasattr(item, 'expiry_date') and item.expiry_date and datetime.fromisoformat(item.expiry_date) <= expiry_date]
+        # Log the search
+        data_store.create_log(dict(log_fields, action_type="SEARCH", user_id=user_id))
         
-        if expiry_after:
-            expiry_date = datetime.fromisoformat(expiry_after)
-            filtered_items = [item for item in filtered_items if hasattr(item, 'expiry_date') and item.expiry_date and datetime.fromisoformat(item.expiry_date) >= expiry_date]
+        if "item" in body:
+            return body
+        return encode_response(body, encoding, accept)
+    
+    except Exception as e:
+        return {"success": False, "message": str(e)}
+
+@router.get("/search/cache/stats")
+def search_cache_stats():
+    return {"success": True, "cache": result_cache.stats()}
+
+@router.post("/search/batch")
+def batch_search(request: Dict[str, Any] = Body(...)):
+    try:
+        item_ids = request.get("itemIds") or []
+        names = request.get("names") or []
+        if len(item_ids) + len(names) > MAX_BATCH_QUERIES:
+            return {"success": False, "message": f"At most {MAX_BATCH_QUERIES} item IDs and names per request"}
         
-        if status:
-            filtered_items = [item for item in filtered_items if item.status.lower() == status.lower()]
+        # IDs resolve through the item table, names through the trigram index
+        id_results = []
+        for item_id in item_ids:
+            item = data_store.get_item(item_id)
+            id_results.append({
+                "itemId": item_id,
+                "found": item is not None,
+                "item": item_location(item) if item else None
+            })
         
-        # If we have exactly one item, prepare retrieval steps
-        if len(filtered_items) == 1:
-            item = filtered_items[0]
-            container = data_store.get_container(item.container_id) if item.container_id else None
-            
-            # Create position data (simplified for in-memory implementation)
-            position = None
-            if container:
-                position = {
-                    "startCoordinates": {
-                        "width": 0,
-                        "depth": 0,
-                        "height": 0
-                    },
-                    "endCoordinates": {
-                        "width": item.width,
-                        "depth": item.depth,
-                        "height": item.height
-                    }
-                }
-            
-            # Create retrieval steps
-            retrieval_steps = []
-            if container:
-                retrieval_steps = [
-                    {
-                        "step": 1,
-                        "action": "remove",
-                        "itemId": item.id,
-                        "itemName": item.name
-                    },
-                    {
-                        "step": 2,
-                        "action": "retrieve",
-                        "itemId": item.id,
-                        "itemName": item.name
-                    }
-                ]
-            
-            # Log the search
-            data_store.create_log({
-                "action_type": "SEARCH",
-                "description": f"Item {item.id} found and retrieved",
-                "item_id": item.id,
-                "user_id": user_id
+        name_results = []
+        for name in names:
+            matches = data_store.find_items_by_text(name=name)
+            name_results.append({
+                "name": name,
+                "found": bool(matches),
+                "items": [item_location(item) for item in matches]
             })
-            
-            return {
-                "success": True,
-                "found": True,
-                "item": {
-                    "itemId": item.id,
-                    "name": item.name,
-                    "containerId": item.container_id if item.container_id else None,
-                    "zone": container.zone if container else None,
-                    "position": position
-                },
-                "retrievalSteps": retrieval_steps
-            }
         
-        # Apply pagination for multiple results
-        total = len(filtered_items)
-        paginated_items = filtered_items[(page - 1) * limit:page * limit]
+        ids_found = sum(result["found"] for result in id_results)
+        names_found = sum(result["found"] for result in name_results)
         
-        # Log the search
+        # One log entry for the whole batch
         data_store.create_log({
             "action_type": "SEARCH",
-            "description": f"Found {total} items matching search criteria",
-            "user_id": user_id
+            "description": f"Batch search: {ids_found} of {len(item_ids)} item IDs found, "
+                           f"{names_found} of {len(names)} names matched",
+            "user_id": request.get("userId")
         })
         
         return {
             "success": True,
-            "found": total > 0,
-            "items": [item.to_dict() for item in paginated_items],
-            "page": page,
-            "limit": limit,
-            "total": total
+            "items": id_results,
+            "names": name_results
         }
     
     except Exception as e:
@@ -1,51 +1,49 @@
-from fastapi import APIRouter, Body, HTTPException
+from fastapi import APIRouter, Body, HTTPException, Query
 from typing import Dict, Any, List, Optional
 from datetime import datetime, timedelta
 from .. import data_store
+from .responses import parse_fields, project
 import pandas as pd
 
 router = APIRouter()
 
-# Global variable for current date
-CURRENT_DATE = datetime(2025, 4, 5)
+# Default number of days ahead counted as "expiring soon"
+EXPIRING_SOON_DAYS = 30
 
 @router.get("/simulation/status")
-def get_simulation_status():
+def get_simulation_status(
+    window_days: int = Query(EXPIRING_SOON_DAYS, ge=0),
+    page: int = Query(1, ge=1),
+    limit: int = Query(100, ge=1),
+    fields: Optional[str] = None
+):
     try:
         # Get current date
-        global CURRENT_DATE
+        current_date = data_store.current_date
         
-        # Get statistics
-        all_items = data_store.get_all_items()
-        all_containers = data_store.get_all_containers()
+        # Statistics are maintained incrementally by the data store
+        statistics = data_store.get_statistics()
         
-        # Calculate statistics
-        total_items = len(all_items)
-        total_containers = len(all_containers)
-        items_in_containers = len([item for item in all_items if item.container_id])
-        waste_items = len([item for item in all_items if item.status == "Waste"])
-        
-        # Get items expiring soon (within 30 days)
-        expiry_date_30_days = CURRENT_DATE + timedelta(days=30)
-        expiring_soon = []
-        
-        for item in all_items:
-            if hasattr(item, 'expiry_date') and item.expiry_date:
-                item_expiry = datetime.fromisoformat(item.expiry_date)
-                if CURRENT_DATE <= item_expiry <= expiry_date_30_days:
-                    expiring_soon.append(item.to_dict())
+        # Count items expiring within the window, then serialise only the requested page
+        window_end = current_date + timedelta(days=window_days)
+        total_expiring = data_store.count_items_expiring_between(current_date, window_end)
+        projected_fields = parse_fields(fields)
+        expiring_soon = [
+            project(item, projected_fields)
+            for item in data_store.get_items_expiring_between(current_date, window_end, skip=(page - 1) * limit, limit=limit)
+        ]
         
         return {
             "success": True,
-            "current_date": CURRENT_DATE.isoformat(),
+            "current_date": current_date.isoformat(),
             "statistics": {
-                "total_items": total_items,
-                "total_containers": total_containers,
-                "items_in_containers": items_in_containers,
-                "waste_items": waste_items,
-                "items_expiring_soon": len(expiring_soon)
+                **statistics,
+                "items_expiring_soon": total_expiring
             },
-            "expiring_soon": expiring_soon
+            "expiring_soon": expiring_soon,
+            "window_days": window_days,
+            "page": page,
+            "limit": limit
         }
     
     except Exception as e:
@@ -53,14 +51,11 @@ def get_simulation_status():
 
 @router.get("/simulation/date")
 def get_current_date():
-    global CURRENT_DATE
-    return {"success": True, "current_date": CURRENT_DATE.isoformat()}
+    return {"success": True, "current_date": data_store.current_date.isoformat()}
 
 @router.post("/simulate/day")
 def simulate_day(request: Dict[str, Any] = Body(None)):
     try:
-        global CURRENT_DATE
-        
         # Get simulation parameters
         num_of_days = request.get("numOfDays", 1) if request else 1
         to_timestamp = request.get("toTimestamp") if request else None
@@ -70,7 +65,7 @@ def simulate_day(request: Dict[str, Any] = Body(None)):
         days_to_simulate = num_of_days
         if to_timestamp:
             target_date = datetime.fromisoformat(to_timestamp)
-            days_to_simulate = (target_date - CURRENT_DATE).days
+            days_to_simulate = (target_date - data_store.current_date).days
             if days_to_simulate < 1:
                 return {"success": False, "message": "Target date must be in the future"}
         
@@ -84,31 +79,30 @@ def simulate_day(request: Dict[str, Any] = Body(None)):
         # Simulate each day
         for _ in range(days_to_simulate):
             # Advance the date
-            CURRENT_DATE += timedelta(days=1)
+            current_date = data_store.advance_current_date()
             
-            # Check for expiring items
-            all_items = data_store.get_all_items()
+            # Items expired by today and not yet marked as waste, from the expiry index
+            expired_items = [
+                item for item in data_store.get_items_expiring_between(datetime.min, current_date)
+                if item.status != "Waste"
+            ]
             
-            for item in all_items:
-                if hasattr(item, 'expiry_date') and item.expiry_date:
-                    expiry_date = datetime.fromisoformat(item.expiry_date)
-                    if CURRENT_DATE >= expiry_date and item.status != "Waste":
-                        # Mark item as waste
-                        item.status = "Waste"
-                        data_store.update_item(item)
-                        
-                        # Add to expired items
-                        changes["itemsExpired"].append({
-                            "itemId": item.id,
-                            "name": item.name
-                        })
-                        
-                        # Log the expiry
-                        data_store.create_log({
-                            "action_type": "ITEM_EXPIRED",
-                            "description": f"Item {item.id} expired on {CURRENT_DATE.isoformat()}",
-                            "item_id": item.id
-                        })
+            for item in expired_items:
+                # Mark item as waste
+                data_store.mark_item_as_waste(item.id, "Expired")
+                
+                # Add to expired items
+                changes["itemsExpired"].append({
+                    "itemId": item.id,
+                    "name": item.name
+                })
+                
+                # Log the expiry
+                data_store.create_log({
+                    "action_type": "ITEM_EXPIRED",
+                    "description": f"Item {item.id} expired on {current_date.isoformat()}",
+                    "item_id": item.id
+                })
             
             # Process item usage
             for item_info in items_to_use:
@@ -122,17 +116,14 @@ def simulate_day(request: Dict[str, Any] = Body(None)):
                     item = data_store.get_item(item_id)
                 elif item_name:
                     # Find item by name (simplified, in a real implementation we'd use a proper query)
-                    for i in all_items:
+                    for i in data_store.items.values():
                         if i.name == item_name:
                             item = i
                             break
                 
                 if item:
-                    # Increment usage count
-                    if not hasattr(item, 'usage_count'):
-                        item.usage_count = 0
-                    
-                    item.usage_count += 1
+                    # Increment usage count (marks the item as waste once its limit is reached)
+                    data_store.use_item(item.id)
                     
                     # Add to used items
                     changes["itemsUsed"].append({
@@ -143,8 +134,6 @@ def simulate_day(request: Dict[str, Any] = Body(None)):
                     
                     # Check if item has reached usage limit
                     if hasattr(item, 'usage_limit') and item.usage_limit and item.usage_count >= item.usage_limit:
-                        item.status = "Waste"
-                        
                         # Add to depleted items
                         changes["itemsDepletedToday"].append({
                             "itemId": item.id,
@@ -158,25 +147,25 @@ def simulate_day(request: Dict[str, Any] = Body(None)):
                             "item_id": item.id
                         })
                     
-                    # Update item in data store
-                    data_store.update_item(item)
-                    
                     # Log the usage
                     data_store.create_log({
                         "action_type": "ITEM_USED",
-                        "description": f"Item {item.id} used on {CURRENT_DATE.isoformat()}",
+                        "description": f"Item {item.id} used on {current_date.isoformat()}",
                         "item_id": item.id
                     })
         
+        # Notify subscribers of the new mission date
+        data_store.emit_event("date_advanced", currentDate=data_store.current_date.isoformat(), days=days_to_simulate)
+        
         # Log the simulation
         data_store.create_log({
             "action_type": "SIMULATION",
-            "description": f"Simulated {days_to_simulate} days, current date: {CURRENT_DATE.isoformat()}"
+            "description": f"Simulated {days_to_simulate} days, current date: {data_store.current_date.isoformat()}"
         })
         
         return {
             "success": True,
-            "newDate": CURRENT_DATE.isoformat(),
+            "newDate": data_store.current_date.isoformat(),
             "changes": changes
         }
     
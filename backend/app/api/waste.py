@@ -1,128 +1,41 @@
 from fastapi import APIRouter, Body, HTTPException
 from typing import Dict, Any, List, Optional
 from datetime import datetime, timedelta
-from .. import data_store
+from .. import data_store, return_planner, retrieval
 
 router = APIRouter()
 
+def waste_reason(item) -> str:
+    """Why an item is (or should become) waste, judged on the simulated mission date."""
+    if item.usage_limit and item.usage_count >= item.usage_limit:
+        return "Out of Uses"
+    expiry_date = data_store.parse_expiry_date(item.expiry_date)
+    if expiry_date and data_store.current_date >= expiry_date:
+        return "Expired"
+    return "Unknown"
+
+def waste_entry(item, reason: str) -> Dict[str, Any]:
+    return {
+        "itemId": item.id,
+        "name": item.name,
+        "reason": reason,
+        "containerId": item.container_id if item.container_id else None,
+        "position": item.position() if item.container_id else None
+    }
+
 @router.get("/waste/identify")
 def identify_waste_items():
     try:
-        # Get all items
-        all_items = data_store.get_all_items()
-        
-        # Identify waste items (already marked as waste)
-        waste_items = []
-        
-        for item in all_items:
-            if item.status == "Waste":
-                # Get container information
-                container = data_store.get_container(item.container_id) if item.container_id else None
-                
-                # Create position data (simplified for in-memory implementation)
-                position = None
-                if container:
-                    position = {
-                        "startCoordinates": {
-                            "width": 0,
-                            "depth": 0,
-                            "height": 0
-                        },
-                        "endCoordinates": {
-                            "width": item.width,
-                            "depth": item.depth,
-                            "height": item.height
-                        }
-                    }
-                
-                # Determine reason for waste
-                reason = "Unknown"
-                if hasattr(item, 'expiry_date') and item.expiry_date:
-                    expiry_date = datetime.fromisoformat(item.expiry_date)
-                    if datetime.now() >= expiry_date:
-                        reason = "Expired"
-                
-                if hasattr(item, 'usage_count') and hasattr(item, 'usage_limit'):
-                    if item.usage_limit and item.usage_count >= item.usage_limit:
-                        reason = "Out of Uses"
-                
-                waste_items.append({
-                    "itemId": item.id,
-                    "name": item.name,
-                    "reason": reason,
-                    "containerId": item.container_id if item.container_id else None,
-                    "position": position
-                })
-        
-        # Identify potential waste items (expired or usage limit reached)
-        current_date = datetime.now()
-        potential_waste = []
+        # Items already marked as waste come from the maintained waste set
+        waste_items = [waste_entry(item, waste_reason(item)) for item in data_store.get_waste_items()]
         
-        for item in all_items:
-            if item.status == "Waste":
-                continue  # Skip items already marked as waste
-            
-            # Check expiry date
-            if hasattr(item, 'expiry_date') and item.expiry_date:
-                expiry_date = datetime.fromisoformat(item.expiry_date)
-                if current_date >= expiry_date:
-                    # Get container information
-                    container = data_store.get_container(item.container_id) if item.container_id else None
-                    
-                    # Create position data (simplified for in-memory implementation)
-                    position = None
-                    if container:
-                        position = {
-                            "startCoordinates": {
-                                "width": 0,
-                                "depth": 0,
-                                "height": 0
-                            },
-                            "endCoordinates": {
-                                "width": item.width,
-                                "depth": item.depth,
-                                "height": item.height
-                            }
-                        }
-                    
-                    potential_waste.append({
-                        "itemId": item.id,
-                        "name": item.name,
-                        "reason": "Expired",
-                        "containerId": item.container_id if item.container_id else None,
-                        "position": position
-                    })
-                    continue
-            
-            # Check usage limit
-            if hasattr(item, 'usage_count') and hasattr(item, 'usage_limit'):
-                if item.usage_limit and item.usage_count >= item.usage_limit:
-                    # Get container information
-                    container = data_store.get_container(item.container_id) if item.container_id else None
-                    
-                    # Create position data (simplified for in-memory implementation)
-                    position = None
-                    if container:
-                        position = {
-                            "startCoordinates": {
-                                "width": 0,
-                                "depth": 0,
-                                "height": 0
-                            },
-                            "endCoordinates": {
-                                "width": item.width,
-                                "depth": item.depth,
-                                "height": item.height
-                            }
-                        }
-                    
-                    potential_waste.append({
-                        "itemId": item.id,
-                        "name": item.name,
-                        "reason": "Out of Uses",
-                        "containerId": item.container_id if item.container_id else None,
-                        "position": position
-                    })
+        # Expired items not yet marked as waste come from the expiry index; items that
+        # run out of uses are marked as waste as soon as it happens
+        potential_waste = [
+            waste_entry(item, "Expired")
+            for item in data_store.get_items_expiring_between(datetime.min, data_store.current_date)
+            if item.status != "Waste"
+        ]
         
         # Log the identification
         data_store.create_log({
@@ -156,65 +69,82 @@ def generate_waste_return_plan(request: Dict[str, Any] = Body(...)):
             return {"success": False, "message": "Maximum weight must be greater than 0"}
         
         # Get all waste items
-        all_items = data_store.get_all_items()
-        waste_items = [item for item in all_items if item.status == "Waste"]
-        
-        # Sort waste items by priority (higher priority first)
-        sorted_waste = sorted(waste_items, key=lambda x: x.priority if hasattr(x, 'priority') else 0, reverse=True)
-        
-        # Generate return plan respecting weight limit
+        waste_items = data_store.get_waste_items()
+        
+        # Choose the waste that reclaims the most volume and pack it into the undocking
+        # container; waste already inside it is repacked with the rest
+        undocking_container = data_store.get_container(undocking_container_id)
+        contents = []
+        if undocking_container:
+            waste_inside = data_store.waste_by_container.get(undocking_container_id, set())
+            contents = [
+                data_store.items[item_id] for item_id in undocking_container.items
+                if item_id in data_store.items and item_id not in waste_inside
+            ]
+        selection = return_planner.plan_return(waste_items, max_weight, undocking_container, contents)
+        packed_positions = {placement["itemId"]: placement for placement in selection["placements"]}
+        
+        # Generate return plan
         return_plan = []
         return_items = []
-        remaining_weight = max_weight
-        step = 1
-        
-        for item in sorted_waste:
-            if item.mass <= remaining_weight:
-                # Add to return plan
-                return_plan.append({
-                    "step": step,
-                    "itemId": item.id,
-                    "itemName": item.name,
-                    "fromContainer": item.container_id if item.container_id else None,
-                    "toContainer": undocking_container_id
-                })
-                
-                # Add to return items
-                return_items.append({
-                    "itemId": item.id,
-                    "name": item.name,
-                    "reason": "Waste"
-                })
-                
-                remaining_weight -= item.mass
-                step += 1
-        
-        # Generate retrieval steps
-        retrieval_steps = []
         step = 1
         
-        for item in return_items:
-            # Add removal step
-            retrieval_steps.append({
+        for item in selection["items"]:
+            # Add to return plan
+            plan_step = {
                 "step": step,
-                "action": "remove",
-                "itemId": item["itemId"],
-                "itemName": item["name"]
-            })
-            step += 1
+                "itemId": item.id,
+                "itemName": item.name,
+                "fromContainer": item.container_id if item.container_id else None,
+                "toContainer": undocking_container_id
+            }
             
-            # Add retrieve step
-            retrieval_steps.append({
-                "step": step,
-                "action": "retrieve",
-                "itemId": item["itemId"],
-                "itemName": item["name"]
+            # Where the item goes inside the undocking container
+            placement = packed_positions.get(item.id)
+            if placement:
+                x, y, z = placement["position"]
+                width, depth, height = placement["dimensions"]
+                plan_step["orientation"] = placement["orientation"]
+                plan_step["position"] = {
+                    "startCoordinates": {
+                        "width": x,
+                        "depth": y,
+                        "height": z
+                    },
+                    "endCoordinates": {
+                        "width": x + width,
+                        "depth": y + depth,
+                        "height": z + height
+                    }
+                }
+            return_plan.append(plan_step)
+            
+            # Add to return items
+            return_items.append({
+                "itemId": item.id,
+                "name": item.name,
+                "reason": "Waste"
             })
+            
             step += 1
         
+        # Remember the plan so undocking removes exactly these items
+        data_store.return_plans[undocking_container_id] = [item.id for item in selection["items"]]
+        
+        # Generate retrieval steps: each blocking item is moved once per container
+        container_items = {}
+        for container_id in {item.container_id for item in selection["items"] if item.container_id}:
+            container = data_store.get_container(container_id)
+            if container:
+                container_items[container_id] = [
+                    data_store.items[item_id] for item_id in container.items if item_id in data_store.items
+                ]
+        extraction = retrieval.plan_extraction(selection["items"], container_items)
+        retrieval_steps = extraction["steps"]
+        
         # Calculate total volume and weight
-        total_volume = sum(item.width * item.depth * item.height for item in waste_items if item.id in [i["itemId"] for i in return_items])
-        total_weight = max_weight - remaining_weight
+        total_volume = selection["total_volume"]
+        total_weight = selection["total_mass"]
         
         # Create return manifest
         return_manifest = {
@@ -225,6 +155,17 @@ def generate_waste_return_plan(request: Dict[str, Any] = Body(...)):
             "totalWeight": total_weight
         }
         
+        # Report how the selection was made
+        optimization = {
+            "method": selection["method"],
+            "optimal": selection["optimal"],
+            "availableVolume": selection["available_volume"],
+            "packed": undocking_container is not None,
+            "packingRounds": selection["packing_rounds"],
+            "blockingItemsMoved": extraction["blockers_moved"],
+            "solveTimeMs": selection["solve_time_ms"]
+        }
+        
         # Log the plan generation
         data_store.create_log({
             "action_type": "WASTE_RETURN_PLAN",
@@ -235,7 +176,8 @@ def generate_waste_return_plan(request: Dict[str, Any] = Body(...)):
             "success": True,
             "returnPlan": return_plan,
             "retrievalSteps": retrieval_steps,
-            "returnManifest": return_manifest
+            "returnManifest": return_manifest,
+            "optimization": optimization
         }
     
     except Exception as e:
@@ -251,17 +193,16 @@ def complete_undocking(request: Dict[str, Any] = Body(...)):
         if not undocking_container_id:
             return {"success": False, "message": "Undocking container ID is required"}
         
-        # Get all waste items
-        all_items = data_store.get_all_items()
-        waste_items = [item for item in all_items if item.status == "Waste"]
+        # Remove the items packed by the latest return plan, or all waste if there is none
+        planned_ids = data_store.return_plans.pop(undocking_container_id, None)
+        if planned_ids is None:
+            planned_ids = [item.id for item in data_store.get_waste_items()]
         
-        # Remove waste items from data store
-        removed_items = []
+        # Remove waste items from data store in one pass per container
+        removed_items = data_store.remove_items(planned_ids)
         
-        for item in waste_items:
-            # Remove item from data store
-            data_store.remove_item(item.id)
-            removed_items.append(item.id)
+        # Notify subscribers of the undocking
+        data_store.emit_event("undocked", containerId=undocking_container_id, itemIds=removed_items)
         
         # Log the undocking
         data_store.create_log({
@@ -4,7 +4,10 @@ from datetime import datetime, timedelta
 import json
 import numpy as np
 
-from . import models, schemas
+from . import models, schemas, return_planner, spatial, retrieval, search_ranking
+
+# Free positions scored per container and orientation when recommending a placement
+MAX_CANDIDATE_POSITIONS = 500
 
 # Search and retrieval operations
 def search_item(db: Session, request: schemas.SearchRequest):
@@ -28,38 +31,24 @@ def search_item(db: Session, request: schemas.SearchRequest):
     # Execute query
     items = query.all()
     
+    # The mission date is read once for the whole result set
+    system_date = db.query(models.SystemDate).first()
+    current_date = system_date.current_date if system_date else datetime.utcnow()
+    
+    # Retrieval difficulty is computed once per container for all its items
+    steps_by_item = {}
+    for container_id in {item.container_id for item in items if item.container_id}:
+        container_items = db.query(models.Item).filter(models.Item.container_id == container_id).all()
+        counts = retrieval.blocking_counts(container_items)
+        steps_by_item.update({other.id: int(count) for other, count in zip(container_items, counts)})
+    
     # Enhanced scoring for search results
     scored_items = []
     for item in items:
-        # Base score starts at 1.0
-        score = 1.0
-        
-        # Prioritize by expiry date (if present)
-        if item.expiry_date:
-            system_date = db.query(models.SystemDate).first()
-            current_date = system_date.current_date if system_date else datetime.utcnow()
-            
-            # Calculate days until expiry
-            if item.expiry_date > current_date:
-                days_until_expiry = (item.expiry_date - current_date).days
-                # Items closer to expiry get higher priority (max boost for items expiring within 7 days)
-                if days_until_expiry <= 7:
-                    score += (1.0 - (days_until_expiry / 7.0)) * 0.5
-        
-        # Prioritize by item priority
-        score += (item.priority / 100.0) * 0.3
-        
-        # Calculate retrieval difficulty
-        if item.container_id:
-            steps = calculate_retrieval_steps(db, item)
-            # Items that are easier to retrieve get higher priority
-            accessibility_score = 1.0 / (steps + 1)  # +1 to avoid division by zero
-            score += accessibility_score * 0.2
-            
-            # Store retrieval steps for later use
-            item.retrieval_steps = steps
-        else:
-            item.retrieval_steps = 0
+        item.retrieval_steps = steps_by_item.get(item.id, 0) if item.container_id else 0
+        score = search_ranking.relevance_score(
+            item.expiry_date, current_date, item.priority, item.retrieval_steps, stowed=bool(item.container_id)
+        )
         
         # Add to scored items list with score
         scored_items.append((item, score))
@@ -409,6 +398,12 @@ def recommend_placement(db: Session, request: schemas.PlacementRequest):
         # Get all items in this container
         container_items = db.query(models.Item).filter(models.Item.container_id == container.id).all()
         
+        # Occupancy and the front-face depth map are built once per container
+        boxes = [item_box(container_item) for container_item in container_items]
+        access_map = spatial.AccessMap(container.width, container.depth, container.height, boxes,
+                                       [(item.width, item.depth, item.height)])
+        grid = access_map.grid
+        
         # Try all possible orientations of the item
         item_dimensions = [(item.width, item.depth, item.height),
                           (item.width, item.height, item.depth),
@@ -425,11 +420,11 @@ def recommend_placement(db: Session, request: schemas.PlacementRequest):
                 continue
             
             # Find possible positions for the item
-            positions = find_positions(container, container_items, width, depth, height)
+            positions = grid.free_positions(width, depth, height, limit=MAX_CANDIDATE_POSITIONS)
+            accessibility_scores = calculate_accessibility_scores(access_map, positions, width, height)
             
-            for pos_x, pos_y, pos_z in positions:
+            for (pos_x, pos_y, pos_z), accessibility_score in zip(positions, accessibility_scores.tolist()):
                 # Calculate scores
-                accessibility_score = calculate_accessibility_score(container, container_items, pos_x, pos_y, pos_z, width, depth, height)
                 space_efficiency_score = calculate_space_efficiency_score(container, pos_x, pos_y, pos_z, width, depth, height)
                 priority_score = item.priority / 100.0  # Normalize to 0-1
                 zone_preference_score = 1.0 if zone_match else 0.5
@@ -482,88 +477,33 @@ def recommend_placement(db: Session, request: schemas.PlacementRequest):
 
 # Helper function to find possible positions for an item in a container
 def find_positions(container, container_items, width, depth, height):
-    # Simple implementation: check a grid of positions
-    positions = []
-    
-    # Create a 3D grid representation of the container
-    grid_resolution = 5  # cm
-    grid_width = int(container.width // grid_resolution) + 1
-    grid_depth = int(container.depth // grid_resolution) + 1
-    grid_height = int(container.height // grid_resolution) + 1
-    
-    # Initialize grid (0 = empty, 1 = occupied)
-    grid = np.zeros((grid_width, grid_depth, grid_height), dtype=int)
-    
-    # Mark occupied spaces
-    for item in container_items:
-        if item.orientation == "xyz":
-            item_width, item_depth, item_height = item.width, item.depth, item.height
-        elif item.orientation == "xzy":
-            item_width, item_depth, item_height = item.width, item.height, item.depth
-        elif item.orientation == "yxz":
-            item_width, item_depth, item_height = item.depth, item.width, item.height
-        elif item.orientation == "yzx":
-            item_width, item_depth, item_height = item.depth, item.height, item.width
-        elif item.orientation == "zxy":
-            item_width, item_depth, item_height = item.height, item.width, item.depth
-        elif item.orientation == "zyx":
-            item_width, item_depth, item_height = item.height, item.depth, item.width
-        
-        # Convert item position to grid coordinates
-        grid_x_start = int(item.position_x // grid_resolution)
-        grid_y_start = int(item.position_y // grid_resolution)
-        grid_z_start = int(item.position_z // grid_resolution)
-        
-        grid_x_end = min(grid_width, int((item.position_x + item_width) // grid_resolution) + 1)
-        grid_y_end = min(grid_depth, int((item.position_y + item_depth) // grid_resolution) + 1)
-        grid_z_end = min(grid_height, int((item.position_z + item_height) // grid_resolution) + 1)
-        
-        # Mark as occupied
-        grid[grid_x_start:grid_x_end, grid_y_start:grid_y_end, grid_z_start:grid_z_end] = 1
-    
-    # Check each position in the grid
-    for x in range(grid_width):
-        for y in range(grid_depth):
-            for z in range(grid_height):
-                # Convert grid coordinates to actual coordinates
-                pos_x = x * grid_resolution
-                pos_y = y * grid_resolution
-                pos_z = z * grid_resolution
-                
-                # Check if item fits within container bounds
-                if (pos_x + width > container.width or
-                    pos_y + depth > container.depth or
-                    pos_z + height > container.height):
-                    continue
-                
-                # Check if space is available
-                grid_x_end = min(grid_width, int((pos_x + width) // grid_resolution) + 1)
-                grid_y_end = min(grid_depth, int((pos_y + depth) // grid_resolution) + 1)
-                grid_z_end = min(grid_height, int((pos_z + height) // grid_resolution) + 1)
-                
-                if np.sum(grid[x:grid_x_end, y:grid_y_end, z:grid_z_end]) == 0:
-                    positions.append((pos_x, pos_y, pos_z))
-    
-    return positions
+    # Rasterise the container contents and test every grid point at once
+    grid = build_occupancy_grid(container, container_items, [(width, depth, height)])
+    return grid.free_positions(width, depth, height)
 
-# Helper function to calculate accessibility score
-def calculate_accessibility_score(container, container_items, pos_x, pos_y, pos_z, width, depth, height):
-    # Simple implementation: higher score if closer to the open face
-    # Assuming the open face is at y=0
-    normalized_depth = 1.0 - (pos_y / container.depth)
-    
-    # Check if item is blocked by other items
-    blocked_score = 1.0
-    for item in container_items:
-        # Check if item is in front of the new position
-        if (item.position_y < pos_y and
-            item.position_x < pos_x + width and
-            item.position_x + item.width > pos_x and
-            item.position_z < pos_z + height and
-            item.position_z + item.height > pos_z):
-            blocked_score *= 0.8  # Reduce score for each blocking item
-    
-    return normalized_depth * blocked_score
+def item_box(item):
+    """Helper function to get an item's (x, y, z, width, depth, height) box."""
+    return (item.position_x, item.position_y, item.position_z) + tuple(get_item_dimensions(item))
+
+def build_occupancy_grid(container, container_items, extra_dimensions=()):
+    """
+    Occupancy grid of a container with its items marked. The cell size is chosen
+    from the dimensions of the contents and of any items about to be placed.
+    """
+    boxes = [item_box(item) for item in container_items]
+    grid = spatial.make_grid(
+        container.width, container.depth, container.height,
+        [box[3:] for box in boxes] + list(extra_dimensions)
+    )
+    for box in boxes:
+        grid.add_box(*box)
+    return grid
+
+# Helper function to calculate accessibility scores
+def calculate_accessibility_scores(access_map, positions, width, height):
+    # Higher score closer to the open face (y=0), reduced for each distinct item in
+    # front of the footprint; evaluated for all positions at once
+    return access_map.accessibility_scores(positions, width, height)
 
 # Helper function to calculate space efficiency score
 def calculate_space_efficiency_score(container, pos_x, pos_y, pos_z, width, depth, height):
@@ -585,6 +525,11 @@ def calculate_space_efficiency_score(container, pos_x, pos_y, pos_z, width, dept
 def generate_rearrangement_plan(db, item, containers):
     # Simple implementation: find a container with enough space after removing lower priority items
     
+    # Try all possible orientations of the item
+    orientation_names = ["xyz", "xzy", "yxz", "yzx", "zxy", "zyx"]
+    item_dimensions = [spatial.oriented_dimensions(item.width, item.depth, item.height, name)
+                       for name in orientation_names]
+    
     for container in containers:
         # Get all items in this container
         container_items = db.query(models.Item).filter(models.Item.container_id == container.id).all()
@@ -595,31 +540,30 @@ def generate_rearrangement_plan(db, item, containers):
         # Sort by priority (ascending)
         lower_priority_items.sort(key=lambda x: x.priority)
         
+        # Orientations that fit the container at all
+        orientations = [
+            (i, dims) for i, dims in enumerate(item_dimensions)
+            if dims[0] <= container.width and dims[1] <= container.depth and dims[2] <= container.height
+        ]
+        if not orientations or not lower_priority_items:
+            continue
+        
+        # Occupancy is built once per container. After the first removal has been
+        # checked against the whole container, each further removal only frees its
+        # own cells, so only positions overlapping the removed box need checking
+        grid = build_occupancy_grid(container, container_items, item_dimensions)
+        
         # Try removing items one by one until there's enough space
         removed_items = []
         for remove_item in lower_priority_items:
             removed_items.append(remove_item)
+            removed_box = item_box(remove_item)
+            grid.remove_box(*removed_box)
+            near = removed_box if len(removed_items) > 1 else None
             
-            # Check if there's enough space now
-            remaining_items = [i for i in container_items if i not in removed_items]
-            
-            # Try all possible orientations of the item
-            item_dimensions = [(item.width, item.depth, item.height),
-                              (item.width, item.height, item.depth),
-                              (item.depth, item.width, item.height),
-                              (item.depth, item.height, item.width),
-                              (item.height, item.width, item.depth),
-                              (item.height, item.depth, item.width)]
-            
-            orientation_names = ["xyz", "xzy", "yxz", "yzx", "zxy", "zyx"]
-            
-            for i, (width, depth, height) in enumerate(item_dimensions):
-                # Check if item fits in container
-                if width > container.width or depth > container.depth or height > container.height:
-                    continue
-                
+            for i, (width, depth, height) in orientations:
                 # Find possible positions for the item
-                positions = find_positions(container, remaining_items, width, depth, height)
+                positions = grid.free_positions(width, depth, height, limit=1, near=near)
                 
                 if positions:
                     # Found a valid position after rearrangement
@@ -820,45 +764,8 @@ def get_dimensions_by_orientation(width, depth, height, orientation):
 
 def is_position_valid(container_items, pos_x, pos_y, pos_z, width, depth, height):
     """Check if a position is valid (no collision with other items)."""
-    # Define the new item's bounding box
-    new_box = {
-        'min_x': pos_x,
-        'max_x': pos_x + width,
-        'min_y': pos_y,
-        'max_y': pos_y + depth,
-        'min_z': pos_z,
-        'max_z': pos_z + height
-    }
-    
-    # Check for collision with each existing item
-    for item in container_items:
-        # Get item dimensions based on orientation
-        item_width, item_depth, item_height = get_item_dimensions(item)
-        
-        # Define the existing item's bounding box
-        item_box = {
-            'min_x': item.position_x,
-            'max_x': item.position_x + item_width,
-            'min_y': item.position_y,
-            'max_y': item.position_y + item_depth,
-            'min_z': item.position_z,
-            'max_z': item.position_z + item_height
-        }
-        
-        # Check for overlap in all three dimensions
-        x_overlap = (new_box['min_x'] < item_box['max_x'] and 
-                     new_box['max_x'] > item_box['min_x'])
-        y_overlap = (new_box['min_y'] < item_box['max_y'] and 
-                     new_box['max_y'] > item_box['min_y'])
-        z_overlap = (new_box['min_z'] < item_box['max_z'] and 
-                     new_box['max_z'] > item_box['min_z'])
-        
-        # If there's overlap in all dimensions, there's a collision
-        if x_overlap and y_overlap and z_overlap:
-            return False
-    
-    # No collision found
-    return True
+    index = spatial.BoxIndex([item_box(item) for item in container_items])
+    return not index.collides(pos_x, pos_y, pos_z, width, depth, height)
 
 # Waste management operations
 def identify_waste(db: Session):
@@ -907,17 +814,10 @@ def plan_waste_return(db: Session, request: schemas.ReturnPlanRequest):
     # Get all waste items
     waste_items = db.query(models.Item).filter(models.Item.is_waste == True).all()
     
-    # Sort by mass (descending) to prioritize heavier items
-    waste_items.sort(key=lambda x: x.mass, reverse=True)
-    
-    # Select items for return within weight limit
-    selected_items = []
-    total_mass = 0.0
-    
-    for item in waste_items:
-        if total_mass + item.mass <= request.max_weight:
-            selected_items.append(item)
-            total_mass += item.mass
+    # Select the items that reclaim the most volume within the weight limit
+    selection = return_planner.select_return_items(waste_items, request.max_weight)
+    selected_items = selection["items"]
+    total_mass = selection["total_mass"]
     
     # Calculate space reclaimed per container
     space_reclaimed = {}
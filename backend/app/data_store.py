@@ -2,8 +2,14 @@
 In-memory data store for the Space Station Cargo Management System.
 This replaces the SQLite database with Python dictionaries and lists.
 """
-from datetime import datetime
-from typing import Dict, List, Optional, Any
+import bisect
+import itertools
+import threading
+from collections import deque
+from datetime import datetime, timedelta, timezone
+from typing import Dict, List, Optional, Any, Iterable, Tuple
+
+from . import spatial
 
 # In-memory data stores
 containers = {}
@@ -13,6 +19,55 @@ logs = []
 # Counter for log IDs
 log_counter = 0
 
+# Recent change events for push subscribers (oldest first)
+MAX_EVENTS = 1000
+events = deque(maxlen=MAX_EVENTS)
+# Held while appending to or reading the events, which job threads and threadpool
+# endpoints do concurrently
+events_lock = threading.Lock()
+
+# Version of the data store, bumped by every change event
+version = 0
+
+# Simulated mission date
+current_date = datetime(2025, 4, 5)
+
+# Counters kept up to date on every mutation, so statistics never need a full scan
+stats = {
+    "items_in_containers": 0,
+    "waste_items": 0
+}
+
+# Expiry index: (expiry datetime, item ID) pairs sorted by expiry
+expiry_index = []
+# Expiry datetime each item is indexed under
+expiry_keys = {}
+
+# Waste item IDs by container ID (None for waste outside any container)
+waste_by_container = {}
+
+# Trigram index over lowercased item names and IDs: trigram -> item IDs
+TRIGRAM_SIZE = 3
+name_trigrams = {}
+id_trigrams = {}
+# Creation sequence number of each item, so index lookups keep catalogue order
+item_sequence = {}
+item_counter = 0
+
+# Latest waste return plan per undocking container: item IDs packed for return
+return_plans = {}
+
+# Item fields that change the space an item takes up in its container
+GEOMETRY_FIELDS = {"width", "depth", "height", "position_x", "position_y", "position_z", "orientation"}
+
+# Spatial state of each container, kept in step with its contents:
+# container ID -> (container version, occupancy grid, box index)
+container_spaces = {}
+
+# Source of container versions: unique across all containers, so a container that is
+# deleted and recreated under the same ID never repeats a version cached for the old one
+container_versions = itertools.count(1)
+
 class Container:
     def __init__(self, id: str, zone: str, width: float, depth: float, height: float, mass: float = 0.0):
         self.id = id
@@ -22,7 +77,14 @@ class Container:
         self.height = height
         self.mass = mass
         self.occupied_volume = 0.0
-        self.items = []  # List of item IDs in this container
+        self.items = {}  # Item IDs in this container, in placement order (dict used as an ordered set)
+        self.version = next(container_versions)  # Renewed whenever the contents or their positions change
+    
+    def bump_version(self) -> int:
+        """Give the container a new version; returns the previous one."""
+        previous = self.version
+        self.version = next(container_versions)
+        return previous
     
     def to_dict(self):
         return {
@@ -33,7 +95,9 @@ class Container:
             "height": self.height,
             "mass": self.mass,
             "occupied_volume": self.occupied_volume,
-            "items": self.items
+            "item_count": len(self.items),
+            "items": list(self.items),
+            "version": self.version
         }
 
 class Item:
@@ -51,9 +115,40 @@ class Item:
         self.usage_limit = usage_limit
         self.preferred_zone = preferred_zone
         self.container_id = None
+        self.position_x = None
+        self.position_y = None
+        self.position_z = None
+        self.orientation = None
         self.status = "Active"
         self.usage_count = 0
     
+    def box(self) -> Optional[Tuple[float, float, float, float, float, float]]:
+        """(x, y, z, width, depth, height) box the item occupies, or None if it has no position."""
+        if self.position_x is None:
+            return None
+        return (self.position_x, self.position_y, self.position_z) + spatial.oriented_dimensions(
+            self.width, self.depth, self.height, self.orientation
+        )
+    
+    def position(self) -> Optional[Dict[str, Dict[str, float]]]:
+        """Position in API format (start and end coordinates), or None if the item has no position."""
+        box = self.box()
+        if box is None:
+            return None
+        x, y, z, width, depth, height = box
+        return {
+            "startCoordinates": {
+                "width": x,
+                "depth": y,
+                "height": z
+            },
+            "endCoordinates": {
+                "width": x + width,
+                "depth": y + depth,
+                "height": z + height
+            }
+        }
+    
     def to_dict(self):
         return {
             "id": self.id,
@@ -68,6 +163,8 @@ class Item:
             "usage_count": getattr(self, 'usage_count', 0),
             "preferred_zone": self.preferred_zone,
             "container_id": self.container_id,
+            "position": self.position(),
+            "orientation": self.orientation,
             "status": self.status
         }
 
@@ -95,6 +192,210 @@ class Log:
             "container_id": self.container_id
         }
 
+# Change events
+def emit_event(event_type: str, **data) -> Dict[str, Any]:
+    """
+    Record a change event and bump the data store version.
+    
+    Args:
+        event_type: Kind of change (item_placed, item_retrieved, item_expired, ...)
+        **data: Event payload
+        
+    Returns:
+        The recorded event
+    """
+    global version
+    with events_lock:
+        version += 1
+        event = {
+            "id": version,
+            "type": event_type,
+            "timestamp": datetime.now().isoformat(),
+            "data": data
+        }
+        events.append(event)
+    return event
+
+def get_events_since(since: int = 0, limit: Optional[int] = None) -> List[Dict[str, Any]]:
+    """
+    Get the change events newer than the given version, oldest first.
+    Events older than the retained window are no longer available.
+    """
+    newer = []
+    # Walk back from the newest event so catching up costs O(new events)
+    with events_lock:
+        for event in reversed(events):
+            if event["id"] <= since:
+                break
+            newer.append(event)
+    newer.reverse()
+    return newer[:limit] if limit else newer
+
+# Statistics and expiry index maintenance
+def parse_expiry_date(expiry_date: Any) -> Optional[datetime]:
+    """
+    Parse an item's expiry date, returning None if it is missing or malformed.
+    Dates with a UTC offset are converted to naive UTC, so every expiry compares
+    with every other and with the (naive) mission date.
+    """
+    if not expiry_date:
+        return None
+    if isinstance(expiry_date, datetime):
+        parsed = expiry_date
+    else:
+        try:
+            parsed = datetime.fromisoformat(str(expiry_date))
+        except ValueError:
+            return None
+    if parsed.tzinfo is not None:
+        parsed = parsed.astimezone(timezone.utc).replace(tzinfo=None)
+    return parsed
+
+def _index_expiry(item: "Item"):
+    expiry = parse_expiry_date(item.expiry_date)
+    if expiry is not None:
+        bisect.insort(expiry_index, (expiry, item.id))
+        expiry_keys[item.id] = expiry
+
+def _unindex_expiry(item_id: str):
+    expiry = expiry_keys.pop(item_id, None)
+    if expiry is not None:
+        idx = bisect.bisect_left(expiry_index, (expiry, item_id))
+        if idx < len(expiry_index) and expiry_index[idx] == (expiry, item_id):
+            del expiry_index[idx]
+
+def _count_item(item: "Item", sign: int):
+    """Add (sign=1) or remove (sign=-1) an item's contribution to the counters and the waste set."""
+    if item.container_id:
+        stats["items_in_containers"] += sign
+    if item.status == "Waste":
+        stats["waste_items"] += sign
+        if sign > 0:
+            waste_by_container.setdefault(item.container_id, set()).add(item.id)
+        else:
+            waste_ids = waste_by_container.get(item.container_id)
+            if waste_ids is not None:
+                waste_ids.discard(item.id)
+                if not waste_ids:
+                    del waste_by_container[item.container_id]
+
+def trigrams(text: str) -> set:
+    """Distinct lowercased trigrams of a string."""
+    text = text.lower()
+    return {text[i:i + TRIGRAM_SIZE] for i in range(len(text) - TRIGRAM_SIZE + 1)}
+
+def _index_text(item: "Item"):
+    global item_counter
+    if item.id not in item_sequence:
+        item_counter += 1
+        item_sequence[item.id] = item_counter
+    for index, text in ((name_trigrams, item.name), (id_trigrams, item.id)):
+        for gram in trigrams(text or ""):
+            index.setdefault(gram, set()).add(item.id)
+
+def _unindex_text(item: "Item", drop_sequence: bool = True):
+    for index, text in ((name_trigrams, item.name), (id_trigrams, item.id)):
+        for gram in trigrams(text or ""):
+            postings = index.get(gram)
+            if postings is not None:
+                postings.discard(item.id)
+                if not postings:
+                    del index[gram]
+    if drop_sequence:
+        item_sequence.pop(item.id, None)
+
+def find_items_by_text(name: Optional[str] = None, item_id: Optional[str] = None) -> List["Item"]:
+    """
+    Items whose name and/or ID contain the given text (case-insensitive), in
+    catalogue order. The posting lists of the query trigrams are intersected,
+    smallest first, and only the surviving candidates are checked; queries shorter
+    than a trigram fall back to a scan.
+    """
+    candidates = None
+    for index, query in ((name_trigrams, name), (id_trigrams, item_id)):
+        if not query:
+            continue
+        grams = trigrams(query)
+        if not grams:
+            continue
+        postings = sorted((index.get(gram, set()) for gram in grams), key=len)
+        matches = set(postings[0])
+        for posting in postings[1:]:
+            if not matches:
+                break
+            matches &= posting
+        candidates = matches if candidates is None else candidates & matches
+    
+    pool = items.values() if candidates is None else (items[item_id] for item_id in candidates)
+    name_query = name.lower() if name else None
+    id_query = item_id.lower() if item_id else None
+    found = [
+        item for item in pool
+        if (not name_query or (item.name and name_query in item.name.lower()))
+        and (not id_query or id_query in item.id.lower())
+    ]
+    if candidates is not None:
+        found.sort(key=lambda item: item_sequence.get(item.id, 0))
+    return found
+
+def get_statistics() -> Dict[str, int]:
+    """Get station statistics in O(1) from the maintained counters."""
+    return {
+        "total_items": len(items),
+        "total_containers": len(containers),
+        "items_in_containers": stats["items_in_containers"],
+        "waste_items": stats["waste_items"]
+    }
+
+def get_waste_items(container_id: Any = ...) -> List["Item"]:
+    """
+    Get waste items from the maintained waste set, without scanning all items.
+    
+    Args:
+        container_id: Only waste in this container (None for waste outside any
+            container); all waste when omitted
+    """
+    if container_id is ...:
+        return [items[item_id] for waste_ids in waste_by_container.values() for item_id in waste_ids]
+    return [items[item_id] for item_id in waste_by_container.get(container_id, ())]
+
+def get_waste_by_container() -> Dict[Optional[str], List[str]]:
+    """Get the IDs of waste items grouped by container ID."""
+    return {container_id: list(waste_ids) for container_id, waste_ids in waste_by_container.items()}
+
+def _expiry_range(start: datetime, end: datetime):
+    """Index bounds of the expiry index entries within [start, end]."""
+    lo = bisect.bisect_left(expiry_index, start, key=lambda entry: entry[0])
+    hi = bisect.bisect_right(expiry_index, end, lo=lo, key=lambda entry: entry[0])
+    return lo, hi
+
+def count_items_expiring_between(start: datetime, end: datetime) -> int:
+    """Count items whose expiry date falls within [start, end] in O(log n)."""
+    lo, hi = _expiry_range(start, end)
+    return hi - lo
+
+def get_items_expiring_between(start: datetime, end: datetime, skip: int = 0, limit: Optional[int] = None) -> List["Item"]:
+    """
+    Get items whose expiry date falls within [start, end], soonest first.
+    Uses the expiry index, so only the requested page of matches is touched.
+    """
+    lo, hi = _expiry_range(start, end)
+    # Never page outside the window
+    lo = min(lo + max(0, skip), hi)
+    if limit is not None:
+        hi = min(hi, lo + max(0, limit))
+    return [items[item_id] for _, item_id in expiry_index[lo:hi]]
+
+def set_current_date(date: datetime) -> datetime:
+    """Set the simulated mission date."""
+    global current_date
+    current_date = date
+    return current_date
+
+def advance_current_date(days: int = 1) -> datetime:
+    """Advance the simulated mission date by a number of days."""
+    return set_current_date(current_date + timedelta(days=days))
+
 # CRUD operations for containers
 def create_container(container_data: Dict[str, Any]) -> Container:
     container = Container(
@@ -106,6 +407,7 @@ def create_container(container_data: Dict[str, Any]) -> Container:
         mass=container_data.get("mass", 0.0)
     )
     containers[container.id] = container
+    emit_event("container_created", containerId=container.id, zone=container.zone)
     return container
 
 def get_container(container_id: str) -> Optional[Container]:
@@ -120,12 +422,16 @@ def update_container(container_id: str, updates: Dict[str, Any]) -> Optional[Con
         for key, value in updates.items():
             if hasattr(container, key):
                 setattr(container, key, value)
+        container.bump_version()
+        emit_event("container_updated", containerId=container.id, fields=list(updates.keys()))
         return container
     return None
 
 def delete_container(container_id: str) -> bool:
     if container_id in containers:
         del containers[container_id]
+        container_spaces.pop(container_id, None)
+        emit_event("container_deleted", containerId=container_id)
         return True
     return False
 
@@ -143,7 +449,16 @@ def create_item(item_data: Dict[str, Any]) -> Item:
         usage_limit=item_data.get("usage_limit"),
         preferred_zone=item_data.get("preferred_zone")
     )
+    # Replacing an existing item drops the old item's index entries first
+    if item.id in items:
+        _count_item(items[item.id], -1)
+        _unindex_expiry(item.id)
+        _unindex_text(items[item.id], drop_sequence=False)
     items[item.id] = item
+    _count_item(item, 1)
+    _index_expiry(item)
+    _index_text(item)
+    emit_event("item_created", itemId=item.id)
     return item
 
 def get_item(item_id: str) -> Optional[Item]:
@@ -155,18 +470,143 @@ def get_all_items(skip: int = 0, limit: int = 100) -> List[Item]:
 def update_item(item_id: str, updates: Dict[str, Any]) -> Optional[Item]:
     item = items.get(item_id)
     if item:
+        _count_item(item, -1)
+        if "name" in updates:
+            _unindex_text(item, drop_sequence=False)
         for key, value in updates.items():
             if hasattr(item, key):
                 setattr(item, key, value)
+        _count_item(item, 1)
+        if "expiry_date" in updates:
+            _unindex_expiry(item.id)
+            _index_expiry(item)
+        if "name" in updates:
+            _index_text(item)
+        # Retrieval plans also name the items they move
+        if item.container_id in containers and (GEOMETRY_FIELDS.intersection(updates) or "name" in updates):
+            containers[item.container_id].bump_version()
+        emit_event("item_updated", itemId=item.id, fields=list(updates.keys()))
+        if item.usage_limit and item.usage_count >= item.usage_limit:
+            mark_item_as_waste(item.id, "Out of Uses")
         return item
     return None
 
 def delete_item(item_id: str) -> bool:
     if item_id in items:
+        item = items[item_id]
+        _count_item(item, -1)
+        _unindex_expiry(item_id)
+        _unindex_text(item)
+        if item.container_id in containers:
+            containers[item.container_id].bump_version()
         del items[item_id]
+        emit_event("item_deleted", itemId=item_id)
         return True
     return False
 
+def remove_item(item_id: str) -> bool:
+    """
+    Remove an item from its container (if any) and delete it from the data store.
+    
+    Args:
+        item_id: ID of the item to remove
+        
+    Returns:
+        bool: True if the item existed and was removed, False otherwise
+    """
+    if item_id not in items:
+        return False
+    remove_item_from_container(item_id)
+    return delete_item(item_id)
+
+def remove_items(item_ids: Iterable[str]) -> List[str]:
+    """
+    Remove many items from their containers and delete them from the data store.
+    Containers, counters and indexes are updated in one pass per container, and one
+    change event is emitted per container.
+    
+    Args:
+        item_ids: IDs of the items to remove
+        
+    Returns:
+        IDs of the items that existed and were removed
+    """
+    by_container = {}
+    seen = set()
+    for item_id in item_ids:
+        item = items.get(item_id)
+        if item is not None and item_id not in seen:
+            seen.add(item_id)
+            by_container.setdefault(item.container_id, []).append(item)
+    
+    removed = []
+    for container_id, group in by_container.items():
+        container = containers.get(container_id) if container_id else None
+        if container is not None:
+            container.occupied_volume -= sum(item.width * item.depth * item.height for item in group)
+            for item in group:
+                container.items.pop(item.id, None)
+                _release_space(container, item)
+        
+        group_ids = []
+        for item in group:
+            _count_item(item, -1)
+            expiry_keys.pop(item.id, None)
+            _unindex_text(item)
+            del items[item.id]
+            group_ids.append(item.id)
+        removed.extend(group_ids)
+        emit_event("items_deleted", containerId=container_id, itemIds=group_ids)
+    
+    # Drop the removed items from the expiry index in a single pass
+    if removed:
+        removed_ids = set(removed)
+        expiry_index[:] = [entry for entry in expiry_index if entry[1] not in removed_ids]
+    
+    return removed
+
+def mark_item_as_waste(item_id: str, reason: str) -> Optional[Item]:
+    """
+    Flip an item's status to Waste.
+    
+    Args:
+        item_id: ID of the item
+        reason: Why the item became waste ("Expired" or "Out of Uses")
+        
+    Returns:
+        The item, or None if it does not exist
+    """
+    item = items.get(item_id)
+    if not item:
+        return None
+    if item.status != "Waste":
+        _count_item(item, -1)
+        item.status = "Waste"
+        _count_item(item, 1)
+        event_type = "item_expired" if reason == "Expired" else "item_waste"
+        emit_event(event_type, itemId=item.id, containerId=item.container_id, reason=reason)
+    return item
+
+def use_item(item_id: str, event_type: str = "item_used") -> Optional[Item]:
+    """
+    Record one use of an item, marking it as waste once its usage limit is reached.
+    
+    Args:
+        item_id: ID of the item
+        event_type: Change event to emit (item_used or item_retrieved)
+        
+    Returns:
+        The item, or None if it does not exist
+    """
+    item = items.get(item_id)
+    if not item:
+        return None
+    item.usage_count = getattr(item, 'usage_count', 0) + 1
+    emit_event(event_type, itemId=item.id, containerId=item.container_id, usageCount=item.usage_count)
+    if item.usage_limit and item.usage_count >= item.usage_limit:
+        mark_item_as_waste(item.id, "Out of Uses")
+    return item
+
 # CRUD operations for logs
 def create_log(log_data: Dict[str, Any]) -> Log:
     log = Log(
@@ -216,14 +656,160 @@ def get_logs(
     
     return filtered_logs[start_idx:end_idx]
 
+def get_all_logs() -> List[Log]:
+    """Get a copy of all logs, oldest first."""
+    return list(logs)
+
+# Spatial state of containers
+def container_items(container: Container) -> List[Item]:
+    """Items in a container, in placement order."""
+    return [items[item_id] for item_id in container.items if item_id in items]
+
+def container_boxes(container: Container) -> List[Tuple[float, float, float, float, float, float]]:
+    """Boxes of the positioned items in a container."""
+    boxes = []
+    for item_id in container.items:
+        item = items.get(item_id)
+        box = item.box() if item else None
+        if box is not None:
+            boxes.append(box)
+    return boxes
+
+def get_container_space(container: Container, item_dimensions: Iterable[Tuple[float, float, float]] = ()):
+    """
+    Occupancy grid and box index of a container's positioned items. Both are kept
+    in step with placements and removals, and rebuilt when the container version
+    they reflect is stale or the grid is too coarse for the dimensions given.
+    
+    Returns:
+        Tuple of (occupancy grid, box index)
+    """
+    cached = container_spaces.get(container.id)
+    if cached is not None and cached[0] == container.version:
+        _, grid, index = cached
+        step = spatial.choose_resolution(
+            container.width, container.depth, container.height,
+            [(grid.resolution,) * 3] + list(item_dimensions)
+        )
+        if step == grid.resolution:
+            return grid, index
+    
+    positioned = [items[item_id] for item_id in container.items if item_id in items and items[item_id].position_x is not None]
+    boxes = [item.box() for item in positioned]
+    grid = spatial.make_grid(
+        container.width, container.depth, container.height,
+        [box[3:] for box in boxes] + list(item_dimensions)
+    )
+    for box in boxes:
+        grid.add_box(*box)
+    index = spatial.BoxIndex(boxes, keys=[item.id for item in positioned])
+    container_spaces[container.id] = (container.version, grid, index)
+    return grid, index
+
+def find_free_position(
+    container: Container,
+    item: Item,
+    orientation: Optional[str] = None
+) -> Optional[Tuple[Tuple[float, float, float], str]]:
+    """
+    Lowest free position for an item in a container, trying every orientation
+    unless one is given.
+    
+    Returns:
+        Tuple of ((x, y, z), orientation), or None if the item fits nowhere
+    """
+    orientations = [orientation] if orientation else spatial.ORIENTATIONS
+    dimensions = [spatial.oriented_dimensions(item.width, item.depth, item.height, name) for name in orientations]
+    grid, _ = get_container_space(container, dimensions)
+    
+    best = None
+    for name, dims in zip(orientations, dimensions):
+        position = grid.first_free_position(*dims)
+        if position is not None and (best is None or position < best[0]):
+            best = (position, name)
+    return best
+
+def check_position(
+    container: Container,
+    item: Item,
+    position: Tuple[float, float, float],
+    orientation: Optional[str] = None
+) -> Optional[str]:
+    """
+    Check that an item can sit at a position in a container: inside the walls and
+    clear of every other positioned item.
+    
+    Returns:
+        Why the position is rejected, or None if it is free
+    """
+    x, y, z = position
+    width, depth, height = spatial.oriented_dimensions(item.width, item.depth, item.height, orientation)
+    if (min(x, y, z) < -spatial.EPSILON or
+            x + width > container.width + spatial.EPSILON or
+            y + depth > container.depth + spatial.EPSILON or
+            z + height > container.height + spatial.EPSILON):
+        return "Item extends outside the container"
+    
+    _, index = get_container_space(container)
+    conflicts = [key for key in index.collisions([(x, y, z, width, depth, height)])[0] if key != item.id]
+    if conflicts:
+        return f"Position conflicts with items: {', '.join(conflicts)}"
+    return None
+
+def _occupy_space(container: Container, item: Item):
+    # Record a newly positioned item in the container's spatial state
+    cached = container_spaces.get(container.id)
+    previous = container.bump_version()
+    if cached is not None and cached[0] == previous:
+        _, grid, index = cached
+        grid.add_box(*item.box())
+        index.add(item.box(), item.id)
+        container_spaces[container.id] = (container.version, grid, index)
+
+def _release_space(container: Container, item: Item):
+    # Take an item out of the container's spatial state and clear its position
+    cached = container_spaces.get(container.id)
+    previous = container.bump_version()
+    box = item.box()
+    if box is not None and cached is not None and cached[0] == previous:
+        _, grid, index = cached
+        grid.remove_box(*box)
+        index.remove(item.id)
+        container_spaces[container.id] = (container.version, grid, index)
+    item.position_x = item.position_y = item.position_z = None
+    item.orientation = None
+
 # Helper function to place item in container
-def place_item_in_container(item_id: str, container_id: str) -> bool:
+def place_item_in_container(
+    item_id: str,
+    container_id: str,
+    position: Optional[Tuple[float, float, float]] = None,
+    orientation: Optional[str] = None
+) -> bool:
+    """
+    Place an item in a container at a collision-free position.
+    
+    Args:
+        item_id: ID of the item to place
+        container_id: ID of the container to place the item in
+        position: (x, y, z) of the item's corner nearest the origin; the lowest free
+            position is found when omitted
+        orientation: Orientation of the item; with no position, every orientation is
+            tried when omitted
+        
+    Returns:
+        bool: True if the item was placed, False if it does not fit
+    """
     item = items.get(item_id)
     container = containers.get(container_id)
     
     if not item or not container:
         return False
     
+    # Already in this container, and not being moved within it
+    if item.container_id == container_id and position is None:
+        return True
+    
     # Calculate item volume
     item_volume = item.width * item.depth * item.height
     
@@ -231,18 +817,84 @@ def place_item_in_container(item_id: str, container_id: str) -> bool:
     container_volume = container.width * container.depth * container.height
     
     # Check if there's enough space
-    if container.occupied_volume + item_volume > container_volume:
+    moving_within = item.container_id == container_id
+    if not moving_within and container.occupied_volume + item_volume > container_volume:
         return False
     
+    # Find or check the position
+    if position is None:
+        found = find_free_position(container, item, orientation)
+        if found is None:
+            return False
+        position, orientation = found
+    elif check_position(container, item, position, orientation) is not None:
+        return False
+    
+    _assign_position(item, container, position, orientation)
+    return True
+
+def _assign_position(item: Item, container: Container, position: Tuple[float, float, float], orientation: Optional[str]):
+    # Put an item at a position already known to be free
+    # An item can only be in one container at a time
+    if item.container_id:
+        remove_item_from_container(item.id)
+    
     # Update item and container
-    item.container_id = container_id
-    container.occupied_volume += item_volume
-    container.items.append(item_id)
+    _count_item(item, -1)
+    item.container_id = container.id
+    _count_item(item, 1)
+    item.position_x, item.position_y, item.position_z = (float(v) for v in position)
+    item.orientation = orientation or "xyz"
+    container.occupied_volume += item.width * item.depth * item.height
+    container.items[item.id] = None
+    _occupy_space(container, item)
+    emit_event("item_placed", itemId=item.id, containerId=container.id, position=item.position())
+
+def repack_container(container_id: str, extra_item_ids: Iterable[str] = ()) -> bool:
+    """
+    Lay a container's items, plus the given items, out again from scratch, largest
+    first. Used when a container has the volume for an item but its free space is
+    too fragmented. Nothing changes unless every item packs.
+    
+    Args:
+        container_id: ID of the container to repack
+        extra_item_ids: IDs of items to add to the container
+        
+    Returns:
+        bool: True if the container was repacked with the extra items in it
+    """
+    container = containers.get(container_id)
+    if not container:
+        return False
+    
+    members = [items[item_id] for item_id in container.items if item_id in items]
+    extras = [items[item_id] for item_id in extra_item_ids if item_id in items and item_id not in container.items]
+    placements, unpacked = spatial.pack_items(container.width, container.depth, container.height, members + extras)
+    if unpacked:
+        return False
+    
+    # The whole layout packed, so it is applied without further checks
+    layout = {placement["itemId"]: placement for placement in placements}
+    for item in members:
+        placement = layout[item.id]
+        item.position_x, item.position_y, item.position_z = placement["position"]
+        item.orientation = placement["orientation"]
+    container.bump_version()
+    container_spaces.pop(container.id, None)
+    emit_event("container_repacked", containerId=container.id, itemIds=[item.id for item in members])
     
+    for item in extras:
+        placement = layout[item.id]
+        _assign_position(item, container, placement["position"], placement["orientation"])
     return True
 
 # Alias for place_item_in_container to maintain compatibility with existing code
-def place_item(item_id: str, container_id: str) -> bool:
+def place_item(
+    item_id: str,
+    container_id: str,
+    position: Optional[Tuple[float, float, float]] = None,
+    orientation: Optional[str] = None
+) -> bool:
     """
     Alias for place_item_in_container function to maintain compatibility with existing code.
     Places an item in a container.
@@ -250,11 +902,13 @@ def place_item(item_id: str, container_id: str) -> bool:
     Args:
         item_id: ID of the item to place
         container_id: ID of the container to place the item in
+        position: (x, y, z) to place the item at (found automatically when omitted)
+        orientation: Orientation of the item
         
     Returns:
         bool: True if the item was successfully placed, False otherwise
     """
-    return place_item_in_container(item_id, container_id)
+    return place_item_in_container(item_id, container_id, position, orientation)
 
 # Helper function to remove item from container
 def remove_item_from_container(item_id: str) -> bool:
@@ -273,11 +927,14 @@ def remove_item_from_container(item_id: str) -> bool:
     
     # Update container
     container.occupied_volume -= item_volume
-    if item_id in container.items:
-        container.items.remove(item_id)
+    container.items.pop(item_id, None)
+    _release_space(container, item)
     
     # Update item
+    _count_item(item, -1)
     item.container_id = None
+    _count_item(item, 1)
+    emit_event("item_removed", itemId=item_id, containerId=container.id)
     
     return True
 
@@ -30,7 +30,7 @@ app.add_middleware(
 )
 
 # Import routes from physical folders
-from .api import import_containers, import_items, placement, containers, place, simulate, waste, logs, search, items, export, retrieve
+from .api import import_containers, import_items, placement, containers, place, simulate, waste, logs, search, items, export, retrieve, events
 
 # Include routers with the /api prefix
 app.include_router(import_containers.router, prefix="/api")
@@ -45,6 +45,7 @@ app.include_router(search.router, prefix="/api")
 app.include_router(items.router, prefix="/api")
 app.include_router(export.router, prefix="/api")
 app.include_router(retrieve.router, prefix="/api")
+app.include_router(events.router, prefix="/api")
 
 # All API endpoints have been moved to separate physical files in the api folder
 
@@ -0,0 +1,533 @@
+"""
+Placement engine for the in-memory data store.
+Turns a placement manifest into data_store items/containers and assigns
+items to containers. Shared by the synchronous /placement endpoint and the
+background placement jobs.
+"""
+import heapq
+import threading
+from concurrent.futures import ProcessPoolExecutor
+from typing import Dict, List, Any, Optional, Callable, Tuple
+
+from . import data_store, rearrangement, spatial
+
+# Serialises placements coming from concurrent requests and background jobs
+placement_lock = threading.Lock()
+
+# Placement modes
+STATION_MODE = "station"
+ZONES_MODE = "zones"
+
+# Worker processes for zone-partitioned placement, created on first use
+ZONE_WORKERS = 4
+zone_executor = None
+zone_executor_lock = threading.Lock()
+
+# Below this many items per manifest, zones are solved in-process
+MIN_PARALLEL_ITEMS = 2000
+
+def prepare_items(items_data: List[Dict[str, Any]]) -> List[data_store.Item]:
+    """
+    Create data_store items for a manifest, reusing items that already exist.
+
+    Args:
+        items_data: Items in API format (itemId, name, width, ...)
+
+    Returns:
+        List of data_store items in manifest order
+    """
+    new_items = []
+    for item_data in items_data:
+        # Map API field names to internal field names
+        item_id = item_data.get('itemId', item_data.get('id', ''))
+        name = item_data.get('name', '')
+        width = float(item_data.get('width', 0))
+        depth = float(item_data.get('depth', 0))
+        height = float(item_data.get('height', 0))
+        mass = float(item_data.get('mass', 0))
+        priority = int(item_data.get('priority', 1))
+        expiry_date = item_data.get('expiryDate', None)
+        usage_limit = item_data.get('usageLimit', None)
+        preferred_zone = item_data.get('preferredZone', None)
+
+        # Create item data dictionary
+        processed_item_data = {
+            "id": item_id,
+            "name": name,
+            "width": width,
+            "depth": depth,
+            "height": height,
+            "mass": mass,
+            "priority": priority
+        }
+
+        # Add optional fields
+        if expiry_date:
+            processed_item_data["expiry_date"] = expiry_date
+        if usage_limit:
+            processed_item_data["usage_limit"] = usage_limit
+        if preferred_zone:
+            processed_item_data["preferred_zone"] = preferred_zone
+
+        # Check if item already exists
+        existing_item = data_store.get_item(item_id)
+        if not existing_item:
+            new_items.append(data_store.create_item(processed_item_data))
+        else:
+            new_items.append(existing_item)
+
+    return new_items
+
+def prepare_containers(containers_data: List[Dict[str, Any]]) -> List[data_store.Container]:
+    """
+    Create data_store containers for a manifest, reusing containers that already exist.
+    Falls back to all known containers when the manifest lists none.
+    """
+    processed_containers = []
+    for container_data in containers_data:
+        # Map API field names to internal field names
+        container_id = container_data.get('containerId', container_data.get('id', ''))
+
+        processed_container_data = {
+            "id": container_id,
+            "zone": container_data.get('zone', ''),
+            "width": float(container_data.get('width', 0)),
+            "depth": float(container_data.get('depth', 0)),
+            "height": float(container_data.get('height', 0))
+        }
+
+        # Check if container already exists
+        existing_container = data_store.get_container(container_id)
+        if not existing_container:
+            processed_containers.append(data_store.create_container(processed_container_data))
+        else:
+            processed_containers.append(existing_container)
+
+    # If no containers were provided, use all available containers
+    if not processed_containers:
+        processed_containers = list(data_store.containers.values())
+
+    return processed_containers
+
+def placement_record(item: data_store.Item, container_id: str) -> Dict[str, Any]:
+    """Placement entry in API format, with the position the item was given."""
+    return {
+        "itemId": item.id,
+        "containerId": container_id,
+        "orientation": item.orientation,
+        "position": item.position()
+    }
+
+def position_box(position: Dict[str, Any]) -> Tuple[float, float, float, float, float, float]:
+    """(x, y, z, width, depth, height) box of a position given in API format."""
+    start, end = position["startCoordinates"], position["endCoordinates"]
+    x, y, z = float(start["width"]), float(start["depth"]), float(start["height"])
+    return x, y, z, float(end["width"]) - x, float(end["depth"]) - y, float(end["height"]) - z
+
+def validate_layout(placements: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+    """
+    Check a manual layout in one pass. Every box must lie inside its container and
+    match its item's dimensions in some orientation, and may overlap neither another
+    box of the layout nor an item already stowed in the container (unless the layout
+    moves that item too). The overlaps of each container are found with vectorised
+    comparisons against the layout and the container's box index.
+
+    Returns:
+        One result per placement, with validity, the IDs of the items it overlaps
+        and the reasons it was rejected
+    """
+    results = []
+    boxes_by_container = {}
+    for i, placement in enumerate(placements):
+        result = {
+            "itemId": placement.get("itemId"),
+            "containerId": placement.get("containerId"),
+            "valid": True,
+            "conflicts": [],
+            "errors": []
+        }
+        results.append(result)
+
+        container = data_store.get_container(result["containerId"])
+        if container is None:
+            result["errors"].append(f"Container with ID {result['containerId']} not found")
+            continue
+        try:
+            box = position_box(placement["position"])
+        except (KeyError, TypeError, ValueError):
+            result["errors"].append("Position needs startCoordinates and endCoordinates")
+            continue
+
+        x, y, z, width, depth, height = box
+        if min(width, depth, height) <= 0:
+            result["errors"].append("End coordinates must be beyond the start coordinates")
+            continue
+        if (min(x, y, z) < -spatial.EPSILON or x + width > container.width + spatial.EPSILON or
+                y + depth > container.depth + spatial.EPSILON or z + height > container.height + spatial.EPSILON):
+            result["errors"].append("Item extends outside the container")
+        item = data_store.get_item(result["itemId"])
+        if item is not None and spatial.match_orientation(item.width, item.depth, item.height, box[3:]) is None:
+            result["errors"].append("Box does not match the item dimensions")
+        boxes_by_container.setdefault(container.id, []).append((i, box))
+
+    layout_ids = {result["itemId"] for result in results}
+    for container_id, entries in boxes_by_container.items():
+        index = spatial.BoxIndex([box for _, box in entries], keys=[i for i, _ in entries])
+        for a, b in index.self_collisions():
+            results[a]["conflicts"].append(results[b]["itemId"])
+            results[b]["conflicts"].append(results[a]["itemId"])
+
+        # Items already stowed there stay put unless the layout moves them
+        _, stowed = data_store.get_container_space(data_store.containers[container_id])
+        for (i, _), hits in zip(entries, stowed.collisions([box for _, box in entries])):
+            results[i]["conflicts"].extend(key for key in hits if key not in layout_ids)
+
+    for result in results:
+        result["valid"] = not result["errors"] and not result["conflicts"]
+    return results
+
+def free_volume(container: data_store.Container) -> float:
+    """Volume still free in a container."""
+    return container.width * container.depth * container.height - container.occupied_volume
+
+def place_items(
+    items: List[data_store.Item],
+    containers: List[data_store.Container],
+    progress_callback: Optional[Callable[[int, int], None]] = None,
+    should_cancel: Optional[Callable[[], bool]] = None
+) -> Tuple[List[Dict[str, Any]], List[str]]:
+    """
+    Place a manifest in a single pass, preferring the item's zone and the emptiest container.
+
+    The manifest is sorted once: highest priority first, then by preferred zone, then
+    largest first. Containers sit in max-heaps keyed by free volume, one per zone and
+    one for the whole station. Each item goes to the emptiest container of its
+    preferred zone, or the emptiest container anywhere if its zone has no room.
+    Heap keys are refreshed lazily when a stale entry reaches the top.
+
+    Args:
+        items: Items to place
+        containers: Candidate containers
+        progress_callback: Called as progress_callback(placed, unplaced) after each item
+        should_cancel: Polled before each item; placement stops when it returns True
+
+    Returns:
+        Tuple of (placements, unplaced item IDs)
+    """
+    placements = []
+    unplaced_items = []
+
+    station_heap = []
+    zone_heaps = {}
+    for index, container in enumerate(containers):
+        entry = (-free_volume(container), index)
+        station_heap.append(entry)
+        zone_heaps.setdefault(container.zone, []).append(entry)
+    heapq.heapify(station_heap)
+    for heap in zone_heaps.values():
+        heapq.heapify(heap)
+
+    def place_in_emptiest(heap, item, volume):
+        # Walk the heap in free-volume order; a container can have the volume
+        # but no geometric slot, so skipped entries go back once we are done.
+        skipped = []
+        container = None
+        while heap:
+            negative_free, index = heapq.heappop(heap)
+            actual_free = free_volume(containers[index])
+            if abs(actual_free + negative_free) > 1e-9:
+                heapq.heappush(heap, (-actual_free, index))
+                continue
+            if volume > actual_free:
+                skipped.append((negative_free, index))
+                break
+            if data_store.place_item(item.id, containers[index].id):
+                container = containers[index]
+                heapq.heappush(heap, (-free_volume(container), index))
+                break
+            skipped.append((negative_free, index))
+        for entry in skipped:
+            heapq.heappush(heap, entry)
+        return container
+
+    ordered_items = sorted(
+        items,
+        key=lambda item: (-(item.priority or 0), item.preferred_zone or "", -(item.width * item.depth * item.height))
+    )
+
+    for item in ordered_items:
+        if should_cancel and should_cancel():
+            break
+
+        placed = False
+        item_volume = item.width * item.depth * item.height
+
+        with placement_lock:
+            # Preferred zone first, then anywhere on the station
+            zone_heap = zone_heaps.get(item.preferred_zone) if item.preferred_zone else None
+            for heap in (zone_heap, station_heap):
+                if heap is None:
+                    continue
+                container = place_in_emptiest(heap, item, item_volume)
+                if container:
+                    placements.append(placement_record(item, container.id))
+                    placed = True
+                    break
+
+        if not placed:
+            unplaced_items.append(item.id)
+
+        if progress_callback:
+            progress_callback(len(placements), len(unplaced_items))
+
+    return placements, unplaced_items
+
+def solve_zone(
+    items: List[Tuple[str, int, float]],
+    containers: List[Tuple[str, float]]
+) -> Tuple[List[Tuple[str, str]], List[str]]:
+    """
+    Assign one zone's items to its containers, using plain data only so it can run
+    in a worker process. Same rule as place_items: highest priority and largest
+    first, each into the container with the most free volume.
+
+    Args:
+        items: (item ID, priority, volume) tuples
+        containers: (container ID, free volume) tuples
+
+    Returns:
+        Tuple of ((item ID, container ID) assignments, item IDs left over)
+    """
+    heap = [(-free, index) for index, (_, free) in enumerate(containers)]
+    heapq.heapify(heap)
+
+    assignments = []
+    leftover = []
+    for item_id, priority, volume in sorted(items, key=lambda item: (-item[1], -item[2])):
+        if heap and volume <= -heap[0][0]:
+            negative_free, index = heap[0]
+            heapq.heapreplace(heap, (negative_free + volume, index))
+            assignments.append((item_id, containers[index][0]))
+        else:
+            leftover.append(item_id)
+    return assignments, leftover
+
+def _get_zone_executor() -> ProcessPoolExecutor:
+    global zone_executor
+    with zone_executor_lock:
+        if zone_executor is None:
+            zone_executor = ProcessPoolExecutor(max_workers=ZONE_WORKERS)
+        return zone_executor
+
+def place_items_by_zone(
+    items: List[data_store.Item],
+    containers: List[data_store.Container],
+    progress_callback: Optional[Callable[[int, int], None]] = None,
+    should_cancel: Optional[Callable[[], bool]] = None,
+    parallel: Optional[bool] = None
+) -> Tuple[List[Dict[str, Any]], List[str]]:
+    """
+    Place a manifest zone by zone. Items and containers are partitioned by zone and
+    each zone is solved independently, in worker processes for large manifests. The
+    assignments are then applied to the data store, and a spill-over pass places
+    the leftovers (and items without a zone that has containers) anywhere on the station.
+
+    Args:
+        items: Items to place
+        containers: Candidate containers
+        progress_callback: Called as progress_callback(placed, unplaced) as items are placed
+        should_cancel: Polled between zones and during the spill-over pass
+        parallel: Force (True) or skip (False) worker processes; by default they are
+            used for manifests of at least MIN_PARALLEL_ITEMS items
+
+    Returns:
+        Tuple of (placements, unplaced item IDs)
+    """
+    zone_containers = {}
+    for container in containers:
+        zone_containers.setdefault(container.zone, []).append(container)
+
+    zone_items = {}
+    spill = []
+    for item in items:
+        if item.preferred_zone in zone_containers:
+            zone_items.setdefault(item.preferred_zone, []).append(item)
+        else:
+            spill.append(item)
+
+    # Plain-data problems, one per zone
+    problems = {
+        zone: (
+            [(item.id, item.priority or 0, item.width * item.depth * item.height) for item in members],
+            [(container.id, free_volume(container)) for container in zone_containers[zone]]
+        )
+        for zone, members in zone_items.items()
+    }
+    if parallel is None:
+        parallel = len(items) >= MIN_PARALLEL_ITEMS and len(problems) > 1
+    if parallel:
+        executor = _get_zone_executor()
+        futures = {zone: executor.submit(solve_zone, *problem) for zone, problem in problems.items()}
+        solutions = {zone: future.result() for zone, future in futures.items()}
+    else:
+        solutions = {zone: solve_zone(*problem) for zone, problem in problems.items()}
+
+    placements = []
+    items_by_id = {item.id: item for item in items}
+    for zone, (assignments, leftover) in solutions.items():
+        if should_cancel and should_cancel():
+            break
+        with placement_lock:
+            for item_id, container_id in assignments:
+                item = items_by_id[item_id]
+                # The station may have changed while the zone was being solved
+                if data_store.place_item(item_id, container_id):
+                    placements.append(placement_record(item, container_id))
+                else:
+                    spill.append(item)
+        spill.extend(items_by_id[item_id] for item_id in leftover)
+        if progress_callback:
+            progress_callback(len(placements), 0)
+
+    placed_ids = {placement["itemId"] for placement in placements}
+    spill = [item for item in spill if item.id not in placed_ids]
+
+    # Spill-over pass across the whole station
+    def on_spill_progress(placed, unplaced):
+        if progress_callback:
+            progress_callback(len(placements) + placed, unplaced)
+
+    spill_placements, unplaced_items = place_items(spill, containers, on_spill_progress, should_cancel)
+    return placements + spill_placements, unplaced_items
+
+def get_placer(mode: Optional[str]) -> Callable[..., Tuple[List[Dict[str, Any]], List[str]]]:
+    """Placement function for a placement mode ("station" by default, or "zones")."""
+    if not mode or mode == STATION_MODE:
+        return place_items
+    elif mode == ZONES_MODE:
+        return place_items_by_zone
+    raise ValueError(f"Unknown placement mode: {mode}")
+
+def rearrange_and_place(
+    item_ids: List[str],
+    containers: List[data_store.Container],
+    time_budget: float = rearrangement.DEFAULT_TIME_BUDGET
+) -> Tuple[List[Dict[str, Any]], List[Dict[str, Any]], List[str], List[str]]:
+    """
+    Admit items that did not fit by moving items already stowed in the containers.
+    The moves come from the rearrangement optimizer and are applied to the data store;
+    a container whose free space is too fragmented for an item is repacked. The plan
+    is applied as a whole: if any move or placement fails, every item goes back to
+    the container and position it started in.
+
+    Args:
+        item_ids: IDs of the items left unplaced
+        containers: Candidate containers
+        time_budget: Optimizer search time in seconds
+
+    Returns:
+        Tuple of (rearrangement steps, placements, IDs still unplaced, IDs of stowed
+        items that could not be put back and are left without a container)
+    """
+    with placement_lock:
+        new_items = [data_store.items[item_id] for item_id in item_ids if item_id in data_store.items]
+        current_items = [
+            data_store.items[item_id]
+            for container in containers for item_id in container.items
+            if item_id in data_store.items
+        ]
+        result = rearrangement.optimize_rearrangement(new_items, containers, current_items, time_budget)
+        if not result["moves"] and not result["placements"]:
+            return [], [], list(item_ids), []
+
+        # Where every item the plan can touch starts, to roll the plan back
+        touched = {container.id for container in containers}
+        touched.update(move[key] for move in result["moves"] for key in ("fromContainer", "toContainer"))
+        touched.update(placement["containerId"] for placement in result["placements"])
+        snapshot = {
+            item.id: (item.container_id, item.box(), item.orientation)
+            for item in new_items + [
+                data_store.items[item_id]
+                for container_id in touched if container_id in data_store.containers
+                for item_id in data_store.containers[container_id].items if item_id in data_store.items
+            ]
+        }
+
+        # Take every moved item out first, so each target container has room
+        for move in result["moves"]:
+            data_store.remove_item_from_container(move["itemId"])
+
+        rearrangements = []
+        repacked = set()
+
+        def place(item_id, container_id):
+            # Fragmented free space is consolidated by repacking the container
+            if data_store.place_item(item_id, container_id):
+                return True
+            if data_store.repack_container(container_id, [item_id]):
+                if container_id not in repacked:
+                    repacked.add(container_id)
+                    rearrangements.append({
+                        "step": len(rearrangements) + 1,
+                        "action": "repack",
+                        "containerId": container_id
+                    })
+                return True
+            return False
+
+        applied = True
+        for move in result["moves"]:
+            if not place(move["itemId"], move["toContainer"]):
+                applied = False
+                break
+            rearrangements.append({
+                "step": len(rearrangements) + 1,
+                "action": "move",
+                "itemId": move["itemId"],
+                "fromContainer": move["fromContainer"],
+                "toContainer": move["toContainer"],
+                "retrievalSteps": move["retrievalSteps"]
+            })
+
+        placements = []
+        if applied:
+            for placement in result["placements"]:
+                item = data_store.items[placement["itemId"]]
+                if not place(item.id, placement["containerId"]):
+                    applied = False
+                    break
+                placements.append(placement_record(item, placement["containerId"]))
+
+        if not applied:
+            return [], [], list(item_ids), restore_items(snapshot)
+
+    placed_ids = {placement["itemId"] for placement in placements}
+    unplaced = [item_id for item_id in item_ids if item_id not in placed_ids]
+    return rearrangements, placements, unplaced, []
+
+def restore_items(snapshot: Dict[str, Tuple[Optional[str], Optional[tuple], Optional[str]]]) -> List[str]:
+    """
+    Put items back in the containers and positions recorded in a snapshot of
+    {item ID: (container ID, box, orientation)}.
+
+    Returns:
+        IDs of the items that could not be put back
+    """
+    changed = [
+        item_id for item_id, state in snapshot.items()
+        if item_id in data_store.items and
+        (data_store.items[item_id].container_id, data_store.items[item_id].box(), data_store.items[item_id].orientation) != state
+    ]
+    # Clear every displaced item first, so the original positions are free again
+    for item_id in changed:
+        data_store.remove_item_from_container(item_id)
+
+    stranded = []
+    for item_id in changed:
+        container_id, box, orientation = snapshot[item_id]
+        if container_id is None:
+            continue
+        position = box[:3] if box is not None else None
+        if not data_store.place_item(item_id, container_id, position, orientation if box is not None else None):
+            stranded.append(item_id)
+    return stranded
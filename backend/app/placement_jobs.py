@@ -0,0 +1,153 @@
+"""
+Background placement jobs.
+Large manifests are placed on a worker thread so the HTTP request that
+submits them returns immediately; clients poll or stream the job progress
+and fetch the final plan page by page.
+"""
+import threading
+import time
+import uuid
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+from typing import Dict, Any, List, Optional
+
+from . import data_store, placement_engine
+
+# Job states
+QUEUED = "queued"
+RUNNING = "running"
+COMPLETED = "completed"
+FAILED = "failed"
+CANCELLED = "cancelled"
+
+FINISHED_STATES = (COMPLETED, FAILED, CANCELLED)
+
+# Number of finished jobs kept around for result fetching
+MAX_FINISHED_JOBS = 50
+
+executor = ThreadPoolExecutor(max_workers=2, thread_name_prefix="placement-job")
+
+# In-memory job registry, oldest first
+jobs = OrderedDict()
+jobs_lock = threading.Lock()
+
+class PlacementJob:
+    def __init__(self, items_data: List[Dict[str, Any]], containers_data: List[Dict[str, Any]], mode: Optional[str] = None):
+        self.id = uuid.uuid4().hex
+        self.items_data = items_data
+        self.containers_data = containers_data
+        self.mode = mode or placement_engine.STATION_MODE
+        self.status = QUEUED
+        self.total_items = len(items_data)
+        self.items_placed = 0
+        self.items_unplaced = 0
+        self.placements = []
+        self.unplaced_items = []
+        self.error = None
+        self.created_at = datetime.now()
+        self.started = None
+        self.finished = None
+        self.cancel_event = threading.Event()
+        # Held while the status moves out of QUEUED, by the worker and by cancellation
+        self.lock = threading.Lock()
+
+    def elapsed_seconds(self) -> float:
+        if self.started is None:
+            return 0.0
+        end = self.finished if self.finished is not None else time.monotonic()
+        return end - self.started
+
+    def progress(self) -> Dict[str, Any]:
+        return {
+            "jobId": self.id,
+            "status": self.status,
+            "mode": self.mode,
+            "totalItems": self.total_items,
+            "itemsPlaced": self.items_placed,
+            "itemsUnplaced": self.items_unplaced,
+            "itemsProcessed": self.items_placed + self.items_unplaced,
+            "elapsedSeconds": round(self.elapsed_seconds(), 3),
+            "createdAt": self.created_at.isoformat(),
+            "error": self.error
+        }
+
+    def is_finished(self) -> bool:
+        return self.status in FINISHED_STATES
+
+def _run_job(job: PlacementJob):
+    with job.lock:
+        if job.cancel_event.is_set():
+            job.status = CANCELLED
+            return
+        job.status = RUNNING
+        job.started = time.monotonic()
+
+    def on_progress(placed, unplaced):
+        job.items_placed = placed
+        job.items_unplaced = unplaced
+
+    try:
+        place = placement_engine.get_placer(job.mode)
+        items = placement_engine.prepare_items(job.items_data)
+        containers = placement_engine.prepare_containers(job.containers_data)
+
+        job.placements, job.unplaced_items = place(
+            items,
+            containers,
+            progress_callback=on_progress,
+            should_cancel=job.cancel_event.is_set
+        )
+
+        job.status = CANCELLED if job.cancel_event.is_set() else COMPLETED
+
+        # Log the placement
+        data_store.create_log({
+            "action_type": "PLACEMENT",
+            "description": f"Placement job {job.id} {job.status}: placed {len(job.placements)} items, "
+                           f"{len(job.unplaced_items)} items could not be placed"
+        })
+    except Exception as e:
+        job.status = FAILED
+        job.error = str(e)
+    finally:
+        job.finished = time.monotonic()
+        # The manifest is no longer needed once the job has run
+        job.items_data = None
+        job.containers_data = None
+
+def _evict_finished_jobs():
+    finished = [job_id for job_id, job in jobs.items() if job.is_finished()]
+    for job_id in finished[:max(0, len(finished) - MAX_FINISHED_JOBS)]:
+        del jobs[job_id]
+
+def submit_job(
+    items_data: List[Dict[str, Any]],
+    containers_data: List[Dict[str, Any]],
+    mode: Optional[str] = None
+) -> PlacementJob:
+    """Queue a placement job and return it without waiting for it to run."""
+    placement_engine.get_placer(mode)  # reject unknown modes up front
+    job = PlacementJob(items_data, containers_data, mode)
+    with jobs_lock:
+        _evict_finished_jobs()
+        jobs[job.id] = job
+    executor.submit(_run_job, job)
+    return job
+
+def get_job(job_id: str) -> Optional[PlacementJob]:
+    return jobs.get(job_id)
+
+def cancel_job(job_id: str) -> Optional[PlacementJob]:
+    """
+    Request cancellation of a job. Items already placed stay placed; a job that
+    has not started yet never runs.
+    """
+    job = jobs.get(job_id)
+    if job:
+        with job.lock:
+            if not job.is_finished():
+                job.cancel_event.set()
+                if job.status == QUEUED:
+                    job.status = CANCELLED
+    return job
@@ -1,8 +1,12 @@
+import math
+import random
+import time
 import pandas as pd
 import numpy as np
+from types import SimpleNamespace
 from sqlalchemy.orm import Session
 from typing import List, Dict, Any, Optional, Tuple
-from . import models, schemas, crud
+from . import models, schemas, crud, retrieval
 
 def calculate_volume(item: Dict[str, Any]) -> float:
     """Calculate the volume of an item in cubic centimeters."""
@@ -11,6 +15,227 @@ def calculate_volume(item: Dict[str, Any]) -> float:
     else:
         return item.width * item.height * item.depth
 
+# Search budget for the rearrangement optimizer
+DEFAULT_TIME_BUDGET = 0.5  # seconds
+MAX_ITERATIONS = 100_000
+
+# Objective weights. Leaving a new item unplaced dominates; overflowing a whole
+# container costs as much as one unplaced item; then every move is charged for
+# itself, the retrieval steps it takes and the priority of the item disturbed.
+UNPLACED_COST = 100_000.0
+OVERFLOW_COST = 100_000.0  # per container volume of overflow
+MOVE_COST = 100.0
+RETRIEVAL_STEP_COST = 10.0
+PRIORITY_COST = 1.0  # per priority point of a moved item
+ZONE_MISMATCH_COST = 50.0
+
+# Annealing temperature, from about one move down to a fraction of a step
+START_TEMPERATURE = 100.0
+END_TEMPERATURE = 0.5
+
+def _sorted_dimensions(obj) -> Tuple[float, float, float]:
+    return tuple(sorted((obj.width, obj.depth, obj.height)))
+
+def _fits(item_dims: Tuple[float, float, float], container_dims: Tuple[float, float, float]) -> bool:
+    # Some orientation fits iff the sorted dimensions fit pairwise
+    return all(a <= b for a, b in zip(item_dims, container_dims))
+
+def retrieval_costs(container_items: List[Any]) -> Dict[str, int]:
+    """
+    Steps needed to take each item out of its container: one for the item, plus a
+    remove and a place-back for every item that blocks it.
+    """
+    if not any(retrieval.item_box(item) is not None for item in container_items):
+        return {item.id: 1 for item in container_items}
+    return {
+        item.id: 2 * (len(retrieval.find_blocker_closure([item], container_items)) - 1) + 1
+        for item in container_items
+    }
+
+def optimize_rearrangement(
+    new_items: List[Any],
+    containers: List[Any],
+    current_items: List[Any],
+    time_budget: float = DEFAULT_TIME_BUDGET,
+    seed: Optional[int] = None
+) -> Dict[str, Any]:
+    """
+    Find the cheapest set of moves that admits a batch of new items.
+
+    Simulated annealing over the container assignment of every new and movable item.
+    Capacity is checked by volume and by whether some orientation of the item fits the
+    container; volume overflow is allowed during the search but penalised, so only
+    overflow-free assignments are returned. Each step changes one item's container,
+    and its cost is evaluated incrementally from per-container volume totals.
+
+    Args:
+        new_items: Items to admit (id, width, depth, height, priority, preferred_zone)
+        containers: Candidate containers (id, zone, width, depth, height and, optionally,
+            occupied_volume including the current items)
+        current_items: Items already in the containers that may be moved
+        time_budget: Search time in seconds
+        seed: Random seed, for reproducible plans
+
+    Returns:
+        Dictionary with the moves (each with its retrieval steps), the container of
+        every new item placed, the new items left unplaced, the total retrieval steps
+        and the number of search iterations
+    """
+    rng = random.Random(seed)
+    start = time.monotonic()
+
+    n_containers = len(containers)
+    container_index = {container.id: c for c, container in enumerate(containers)}
+    capacity = [container.width * container.depth * container.height for container in containers]
+    container_dims = [_sorted_dimensions(container) for container in containers]
+
+    # Movable items first, then new items
+    records = [item for item in current_items if item.container_id in container_index] + list(new_items)
+    n_current = len(records) - len(new_items)
+    volume = [item.width * item.depth * item.height for item in records]
+    home = [container_index[item.container_id] if i < n_current else None for i, item in enumerate(records)]
+
+    # Containers each item fits in, by dimensions alone
+    allowed = [
+        [c for c in range(n_containers) if _fits(_sorted_dimensions(item), container_dims[c])]
+        for item in records
+    ]
+
+    # Retrieval steps for moving each current item out of its container
+    members = {}
+    for i in range(n_current):
+        members.setdefault(home[i], []).append(i)
+    steps = [1] * len(records)
+    for indices in members.values():
+        costs = retrieval_costs([records[i] for i in indices])
+        for i in indices:
+            steps[i] = costs[records[i].id]
+
+    def item_cost(i: int, c: Optional[int]) -> float:
+        if i >= n_current:
+            if c is None:
+                return UNPLACED_COST
+            preferred_zone = getattr(records[i], "preferred_zone", None)
+            return ZONE_MISMATCH_COST if preferred_zone and containers[c].zone != preferred_zone else 0.0
+        if c == home[i]:
+            return 0.0
+        return MOVE_COST + RETRIEVAL_STEP_COST * steps[i] + PRIORITY_COST * (records[i].priority or 0)
+
+    def overflow_cost(c: int, used_volume: float) -> float:
+        return OVERFLOW_COST * max(0.0, used_volume - capacity[c]) / capacity[c] if capacity[c] > 0 else 0.0
+
+    # Volume held by items that are not part of the search
+    used = [0.0] * n_containers
+    for c, container in enumerate(containers):
+        occupied = getattr(container, "occupied_volume", None)
+        if occupied is not None:
+            used[c] = occupied
+    for i in range(n_current):
+        if getattr(containers[home[i]], "occupied_volume", None) is None:
+            used[home[i]] += volume[i]
+
+    # Start from the current layout with the new items placed greedily, largest first:
+    # into free space where possible (preferred zone first), otherwise into the
+    # container with the most free space, overflowing it
+    assignment = list(home)
+    for i in sorted(range(n_current, len(records)), key=lambda i: -volume[i]):
+        if allowed[i]:
+            c = max(allowed[i], key=lambda c: (
+                used[c] + volume[i] <= capacity[c] + 1e-9, item_cost(i, c) == 0.0, capacity[c] - used[c]
+            ))
+            assignment[i] = c
+            used[c] += volume[i]
+
+    cost = sum(item_cost(i, assignment[i]) for i in range(len(records))) + sum(
+        overflow_cost(c, used[c]) for c in range(n_containers)
+    )
+    overflowing = sum(1 for c in range(n_containers) if used[c] > capacity[c] + 1e-9)
+
+    # Leaving every new item out is always feasible
+    best_cost = UNPLACED_COST * (len(records) - n_current)
+    best = list(home)
+    if overflowing == 0 and cost < best_cost:
+        best_cost, best = cost, list(assignment)
+
+    iterations = 0
+    movable = [i for i in range(len(records)) if allowed[i]]
+    while movable and iterations < MAX_ITERATIONS:
+        if iterations % 256 == 0:
+            elapsed = time.monotonic() - start
+            if elapsed >= time_budget:
+                break
+            temperature = START_TEMPERATURE * (END_TEMPERATURE / START_TEMPERATURE) ** (elapsed / time_budget)
+        iterations += 1
+
+        i = rng.choice(movable)
+        a = assignment[i]
+        if i < n_current and a != home[i] and rng.random() < 0.3:
+            b = home[i]
+        elif i >= n_current and rng.random() < 0.05:
+            b = None
+        else:
+            b = rng.choice(allowed[i])
+        if b == a:
+            continue
+
+        delta = item_cost(i, b) - item_cost(i, a)
+        if a is not None:
+            delta += overflow_cost(a, used[a] - volume[i]) - overflow_cost(a, used[a])
+        if b is not None:
+            delta += overflow_cost(b, used[b] + volume[i]) - overflow_cost(b, used[b])
+
+        if delta > 0 and rng.random() >= math.exp(-delta / temperature):
+            continue
+
+        # Apply the move
+        for c, change in ((a, -volume[i]), (b, volume[i])):
+            if c is not None:
+                was_over = used[c] > capacity[c] + 1e-9
+                used[c] += change
+                overflowing += (used[c] > capacity[c] + 1e-9) - was_over
+        assignment[i] = b
+        cost += delta
+
+        if overflowing == 0 and cost < best_cost - 1e-9:
+            best_cost, best = cost, list(assignment)
+
+    # Polish: send moved items home where that stays within capacity
+    final_used = list(used)
+    for i in range(len(records)):
+        if assignment[i] is not None:
+            final_used[assignment[i]] -= volume[i]
+        if best[i] is not None:
+            final_used[best[i]] += volume[i]
+    for i in range(n_current):
+        a = best[i]
+        if a != home[i] and final_used[home[i]] + volume[i] <= capacity[home[i]] + 1e-9:
+            final_used[a] -= volume[i]
+            final_used[home[i]] += volume[i]
+            best[i] = home[i]
+
+    moves = [
+        {
+            "itemId": records[i].id,
+            "fromContainer": containers[home[i]].id,
+            "toContainer": containers[best[i]].id,
+            "retrievalSteps": steps[i]
+        }
+        for i in range(n_current) if best[i] != home[i]
+    ]
+    placements = [
+        {"itemId": records[i].id, "containerId": containers[best[i]].id}
+        for i in range(n_current, len(records)) if best[i] is not None
+    ]
+    unplaced = [records[i].id for i in range(n_current, len(records)) if best[i] is None]
+
+    return {
+        "moves": moves,
+        "placements": placements,
+        "unplaced": unplaced,
+        "retrievalSteps": sum(move["retrievalSteps"] for move in moves),
+        "iterations": iterations
+    }
+
 def find_rearrangement(db: Session, new_items_df: pd.DataFrame) -> Optional[Dict[str, Any]]:
     """
     Find a rearrangement plan for placing new items when space is insufficient.
@@ -22,118 +247,82 @@ def find_rearrangement(db: Session, new_items_df: pd.DataFrame) -> Optional[Dict
     Returns:
         A dictionary with rearrangement plan or None if no rearrangement is needed
     """
-    # Get all containers
-    containers = crud.get_all_containers(db)
-    containers_dict = {
-        container.id: {
-            "zone": container.zone,
-            "width": container.width,
-            "depth": container.depth,
-            "height": container.height,
-            "occupied_volume": container.occupied_volume,
-            "total_volume": container.width * container.depth * container.height
-        } for container in containers
-    }
+    containers = crud.get_containers(db, limit=None)
+    current_items = [item for item in crud.get_items(db, limit=None) if item.container_id]
     
-    # Get all current items in containers
-    current_items = crud.get_all_items(db)
-    current_items_in_containers = [item for item in current_items if item.container_id]
+    new_items = [
+        SimpleNamespace(
+            id=row["item_id"],
+            name=row.get("name"),
+            width=row["width_cm"],
+            depth=row["depth_cm"],
+            height=row["height_cm"],
+            priority=row.get("priority", 0),
+            preferred_zone=row.get("preferred_zone")
+        )
+        for row in new_items_df.to_dict("records")
+    ]
     
-    # Calculate total space needed for new items
-    new_items_df["volume"] = new_items_df.apply(lambda item: 
-        item["width_cm"] * item["depth_cm"] * item["height_cm"], axis=1)
-    total_new_volume = new_items_df["volume"].sum()
+    result = optimize_rearrangement(new_items, containers, current_items)
     
-    # Calculate available space across all containers
-    total_available = sum(
-        cont["total_volume"] - cont["occupied_volume"] 
-        for cont in containers_dict.values()
-    )
-    
-    # If there's enough space, no rearrangement needed
-    if total_available >= total_new_volume:
+    # No moves needed and everything placed: no rearrangement needed
+    if not result["moves"] and not result["unplaced"]:
         return None
     
-    # Sort current items by priority (low to high) for relocation candidates
-    current_items_with_volume = []
-    for item in current_items_in_containers:
-        item_dict = item.__dict__.copy()
-        item_dict["volume"] = calculate_volume(item)
-        current_items_with_volume.append(item_dict)
-    
-    # Sort by priority (low to high)
-    relocation_candidates = sorted(
-        current_items_with_volume, 
-        key=lambda x: (x["priority"], -x["volume"])
-    )
-    
-    # Find items to relocate
-    volume_to_free = total_new_volume - total_available
-    items_to_relocate = []
-    freed_volume = 0
-    
-    for item in relocation_candidates:
-        if freed_volume >= volume_to_free:
-            break
-        
-        items_to_relocate.append(item)
-        freed_volume += item["volume"]
-        
-        # Update container's occupied volume
-        containers_dict[item["container_id"]]["occupied_volume"] -= item["volume"]
+    if result["unplaced"]:
+        return {
+            "success": False,
+            "message": f"Could not place item {result['unplaced'][0]} even after rearrangement"
+        }
     
     # Generate step-by-step plan
+    items_by_id = {item.id: item for item in current_items}
+    new_by_id = {item.id: item for item in new_items}
+    items_to_relocate = []
     plan = []
     
     # Steps to remove items
-    for item in items_to_relocate:
+    for move in result["moves"]:
+        item = items_by_id[move["itemId"]]
+        items_to_relocate.append(item)
         plan.append({
-            "step": f"Remove {item['id']} ({item['name']}) from {item['container_id']}",
-            "volume_freed": item["volume"],
-            "item_id": item["id"],
-            "container_id": item["container_id"],
+            "step": f"Remove {item.id} ({item.name}) from {move['fromContainer']}",
+            "volume_freed": calculate_volume(item),
+            "item_id": item.id,
+            "container_id": move["fromContainer"],
+            "retrieval_steps": move["retrievalSteps"],
             "action": "remove"
         })
     
-    # Attempt to place new items
-    placed_items = []
+    # Steps to put the relocated items in their new containers, then place the new items
+    for move in result["moves"]:
+        item = items_by_id[move["itemId"]]
+        plan.append({
+            "step": f"Place {item.id} ({item.name}) in {move['toContainer']}",
+            "volume_added": calculate_volume(item),
+            "item_id": item.id,
+            "container_id": move["toContainer"],
+            "action": "place"
+        })
     
-    for _, new_item in new_items_df.iterrows():
-        placed = False
-        
-        for cont_id, cont in containers_dict.items():
-            # Check if item fits in container dimensions
-            if (new_item["width_cm"] <= cont["width"] and 
-                new_item["depth_cm"] <= cont["depth"] and 
-                new_item["height_cm"] <= cont["height"] and 
-                cont["occupied_volume"] + new_item["volume"] <= cont["total_volume"]):
-                
-                placed_items.append((new_item, cont_id))
-                containers_dict[cont_id]["occupied_volume"] += new_item["volume"]
-                
-                plan.append({
-                    "step": f"Place {new_item['item_id']} ({new_item['name']}) in {cont_id}",
-                    "volume_added": new_item["volume"],
-                    "item_id": new_item["item_id"],
-                    "container_id": cont_id,
-                    "action": "place"
-                })
-                
-                placed = True
-                break
-        
-        if not placed:
-            # If we couldn't place an item even after rearrangement, return failure
-            return {
-                "success": False,
-                "message": f"Could not place item {new_item['item_id']} even after rearrangement"
-            }
+    placed_items = []
+    for placement in result["placements"]:
+        item = new_by_id[placement["itemId"]]
+        placed_items.append((item, placement["containerId"]))
+        plan.append({
+            "step": f"Place {item.id} ({item.name}) in {placement['containerId']}",
+            "volume_added": calculate_volume(item),
+            "item_id": item.id,
+            "container_id": placement["containerId"],
+            "action": "place"
+        })
     
     return {
         "success": True,
         "items_to_relocate": items_to_relocate,
         "plan": plan,
-        "placed_items": placed_items
+        "placed_items": placed_items,
+        "retrieval_steps": result["retrievalSteps"]
     }
 
 def execute_rearrangement(db: Session, rearrangement_plan: Dict[str, Any]) -> Dict[str, Any]:
@@ -0,0 +1,205 @@
+"""
+Retrieval planning.
+Works out which items have to be moved to pull a set of target items out of
+their containers through the open face (depth 0), and the order to move them in.
+"""
+import threading
+from collections import OrderedDict
+from typing import Any, Callable, Dict, Iterable, List, Optional, Tuple
+
+import numpy as np
+
+from . import spatial
+
+# Single-item extraction plans kept, least recently used evicted first
+MAX_CACHED_PLANS = 4096
+
+# Item ID -> (container ID, container version, plan)
+plan_cache = OrderedDict()
+plan_cache_stats = {"hits": 0, "misses": 0}
+# Requests run on a thread pool, so lookups, reordering and eviction hold this lock
+plan_cache_lock = threading.Lock()
+
+def item_box(item) -> Optional[Tuple[float, float, float, float, float, float]]:
+    """
+    Bounding box of an item as (min_x, max_x, min_y, max_y, min_z, max_z),
+    or None if the item has no recorded position.
+    """
+    x = getattr(item, "position_x", None)
+    y = getattr(item, "position_y", None)
+    z = getattr(item, "position_z", None)
+    if x is None or y is None or z is None:
+        return None
+    width, depth, height = spatial.oriented_dimensions(
+        item.width, item.depth, item.height, getattr(item, "orientation", None)
+    )
+    return x, x + width, y, y + depth, z, z + height
+
+def find_blocker_closure(targets: Iterable[Any], container_items: List[Any]) -> List[Any]:
+    """
+    Every item that has to leave the container so the targets can be pulled out:
+    the targets, the items in front of them, the items in front of those, and so on.
+    An item is in front of another if it lies entirely at lower depth and overlaps it
+    in width and height. Items without a position neither block nor are blocked.
+
+    Returns:
+        The items to move, front first, so each one is free when its turn comes
+    """
+    boxes = [item_box(item) for item in container_items]
+    positioned = [i for i, box in enumerate(boxes) if box is not None]
+    index = {id(item): i for i, item in enumerate(container_items)}
+
+    # Column arrays of the positioned boxes for vectorised blocking tests
+    if positioned:
+        b = np.array([boxes[i] for i in positioned], dtype=float)
+        min_x, max_x, min_y, max_y, min_z, max_z = b.T
+
+    closure = set()
+    queue = []
+    for target in targets:
+        i = index.get(id(target))
+        if i is not None and i not in closure:
+            closure.add(i)
+            queue.append(i)
+
+    while queue:
+        i = queue.pop()
+        box = boxes[i]
+        if box is None or not positioned:
+            continue
+        t_min_x, t_max_x, t_min_y, _, t_min_z, t_max_z = box
+        blocking = ((max_y <= t_min_y) & (min_x < t_max_x) & (max_x > t_min_x)
+                    & (min_z < t_max_z) & (max_z > t_min_z))
+        for k in np.flatnonzero(blocking):
+            j = positioned[k]
+            if j not in closure:
+                closure.add(j)
+                queue.append(j)
+
+    def front_first(i):
+        box = boxes[i]
+        return (0, 0.0, 0.0) if box is None else (1, box[2], box[3])
+
+    return [container_items[i] for i in sorted(closure, key=front_first)]
+
+def blocking_counts(container_items: List[Any]) -> np.ndarray:
+    """
+    For each item, the number of items directly in front of it: entirely at lower
+    depth and overlapping it in width and height. Computed for the whole container
+    at once; items without a position count as unblocked and block nothing.
+    """
+    boxes = [item_box(item) for item in container_items]
+    counts = np.zeros(len(container_items), dtype=np.int64)
+    positioned = [i for i, box in enumerate(boxes) if box is not None]
+    if not positioned:
+        return counts
+
+    min_x, max_x, min_y, max_y, min_z, max_z = np.array([boxes[i] for i in positioned], dtype=float).T
+    # blocks[i, j]: item j is in front of item i
+    blocks = ((max_y[None, :] <= min_y[:, None])
+              & (min_x[None, :] < max_x[:, None]) & (max_x[None, :] > min_x[:, None])
+              & (min_z[None, :] < max_z[:, None]) & (max_z[None, :] > min_z[:, None]))
+    np.fill_diagonal(blocks, False)
+    counts[positioned] = blocks.sum(axis=1)
+    return counts
+
+def plan_extraction(
+    targets: List[Any],
+    container_items_by_id: Dict[str, List[Any]]
+) -> Dict[str, Any]:
+    """
+    Plan the moves that pull every target item out of its container.
+
+    Targets are grouped by container. Within a container every blocking item is
+    set aside once, before the first target behind it, and put back once all the
+    container's targets are out.
+
+    Args:
+        targets: Items to take out
+        container_items_by_id: Items currently in each container, by container ID
+
+    Returns:
+        Dictionary with the numbered steps and the number of blocking items moved
+    """
+    by_container = OrderedDict()
+    for item in targets:
+        by_container.setdefault(getattr(item, "container_id", None), []).append(item)
+
+    steps = []
+    blockers_moved = 0
+
+    def add_step(action, item, container_id):
+        steps.append({
+            "step": len(steps) + 1,
+            "action": action,
+            "itemId": item.id,
+            "itemName": item.name,
+            "containerId": container_id
+        })
+
+    for container_id, container_targets in by_container.items():
+        if container_id is None:
+            for item in container_targets:
+                add_step("retrieve", item, None)
+            continue
+
+        target_ids = {id(item) for item in container_targets}
+        container_items = container_items_by_id.get(container_id, [])
+        # Targets the container listing does not know about are still retrieved
+        known = {id(item) for item in container_items}
+        container_items = container_items + [item for item in container_targets if id(item) not in known]
+
+        set_aside = []
+        for item in find_blocker_closure(container_targets, container_items):
+            if id(item) in target_ids:
+                add_step("retrieve", item, container_id)
+            else:
+                add_step("remove", item, container_id)
+                set_aside.append(item)
+
+        # Last out, first back in
+        for item in reversed(set_aside):
+            add_step("placeBack", item, container_id)
+        blockers_moved += len(set_aside)
+
+    return {
+        "steps": steps,
+        "blockers_moved": blockers_moved
+    }
+
+def item_extraction_plan(
+    item: Any,
+    container_id: str,
+    container_version: int,
+    container_items: Callable[[], List[Any]]
+) -> Dict[str, Any]:
+    """
+    Extraction plan for a single item, memoised per (item, container version).
+    A plan only depends on the container's contents, so it is reused until an item
+    in that container moves and the version changes.
+
+    Args:
+        item: Item to take out
+        container_id: ID of the container it is in
+        container_version: Current version of that container
+        container_items: Returns the container's items; only called on a cache miss
+
+    Returns:
+        The plan_extraction result
+    """
+    with plan_cache_lock:
+        cached = plan_cache.get(item.id)
+        if cached is not None and cached[0] == container_id and cached[1] == container_version:
+            plan_cache.move_to_end(item.id)
+            plan_cache_stats["hits"] += 1
+            return cached[2]
+        plan_cache_stats["misses"] += 1
+
+    # Planned outside the lock; a concurrent miss for the same item just plans it twice
+    plan = plan_extraction([item], {container_id: container_items()})
+    with plan_cache_lock:
+        plan_cache[item.id] = (container_id, container_version, plan)
+        plan_cache.move_to_end(item.id)
+        while len(plan_cache) > MAX_CACHED_PLANS:
+            plan_cache.popitem(last=False)
+    return plan
@@ -0,0 +1,320 @@
+"""
+Waste return planning.
+Chooses which waste items go into the undocking container so that the
+reclaimed volume (or another value) is maximised under the weight cap and
+the undocking container's free volume.
+"""
+import math
+import time
+from typing import List, Dict, Any, Optional, Sequence
+
+import numpy as np
+
+from . import spatial
+
+# Mass resolution of the dynamic-programming table (kg per cell)
+MASS_RESOLUTION = 0.1
+
+# Largest DP table (items x mass cells) before falling back to branch and bound
+MAX_DP_CELLS = 20_000_000
+
+# Search budget for branch and bound; the best plan found so far is returned when exhausted
+MAX_BRANCH_NODES = 500_000
+BRANCH_TIME_LIMIT = 2.0  # seconds
+
+# Selection/packing rounds before settling for the items that packed
+MAX_PACKING_ROUNDS = 10
+
+def item_volume(item) -> float:
+    """Calculate the volume of an item in cubic centimeters."""
+    return item.width * item.depth * item.height
+
+def _solve_dp(masses: np.ndarray, values: np.ndarray, max_mass: float, resolution: float):
+    """
+    0/1 knapsack over mass discretised to `resolution`, vectorised over the mass axis.
+    Masses are rounded up, so every selection is feasible for the real masses, but
+    the result is only proven optimal when every mass lies on the grid.
+    """
+    n = len(masses)
+    capacity = int(math.floor(max_mass / resolution + 1e-9))
+    cells = masses / resolution
+    weights = np.ceil(cells - 1e-9).astype(np.int64)
+    on_grid = bool(np.all(np.abs(cells - np.round(cells)) <= 1e-9))
+
+    best = np.zeros(capacity + 1)
+    keep = np.zeros((n, capacity + 1), dtype=bool)
+
+    for i in range(n):
+        w = weights[i]
+        if w > capacity:
+            continue
+        if w == 0:
+            # Massless items never compete for capacity
+            keep[i, :] = values[i] > 0
+            best = best + max(values[i], 0.0)
+            continue
+        candidate = best[:-w] + values[i]
+        improved = candidate > best[w:]
+        keep[i, w:] = improved
+        best[w:][improved] = candidate[improved]
+
+    # Walk back through the decisions from full capacity
+    selected = []
+    c = capacity
+    for i in range(n - 1, -1, -1):
+        if keep[i, c]:
+            selected.append(i)
+            c -= weights[i]
+    selected.reverse()
+    return selected, on_grid
+
+def _solve_branch_and_bound(
+    masses: np.ndarray,
+    volumes: np.ndarray,
+    values: np.ndarray,
+    max_mass: float,
+    max_volume: Optional[float]
+):
+    """
+    Exact 0/1 knapsack with a mass and an optional volume constraint.
+    Depth-first branch and bound over items ordered by value per kg. The bound is
+    the smaller of the fractional (mass) relaxation and the remaining volume times
+    the best value-per-volume still available. Returns the incumbent if the node
+    or time budget runs out.
+    """
+    n = len(masses)
+    volume_cap = max_volume if max_volume is not None else math.inf
+
+    # Decide items in order of value density per kg
+    density = np.where(masses > 0, values / np.maximum(masses, 1e-12), np.inf)
+    order = [int(i) for i in np.argsort(-density, kind="stable")]
+    m = [float(masses[i]) for i in order]
+    vol = [float(volumes[i]) for i in order]
+    val = [float(values[i]) for i in order]
+
+    # Suffix maximum of value per cm^3 for the volume bound
+    volume_density = [val[k] / vol[k] if vol[k] > 0 else math.inf for k in range(n)]
+    suffix_volume_density = [0.0] * (n + 1)
+    for k in range(n - 1, -1, -1):
+        suffix_volume_density[k] = max(volume_density[k], suffix_volume_density[k + 1])
+
+    def bound(k: int, mass_left: float, volume_left: float, value: float) -> float:
+        # Fractional relaxation on mass
+        mass_bound = value
+        for j in range(k, n):
+            if m[j] <= mass_left:
+                mass_left -= m[j]
+                mass_bound += val[j]
+            else:
+                mass_bound += val[j] * mass_left / m[j]
+                break
+        if volume_left == math.inf or suffix_volume_density[k] == math.inf:
+            return mass_bound
+        return min(mass_bound, value + volume_left * suffix_volume_density[k])
+
+    # Greedy incumbent
+    best_value = 0.0
+    best_set = []
+    mass_left, volume_left = max_mass, volume_cap
+    for k in range(n):
+        if m[k] <= mass_left and vol[k] <= volume_left:
+            mass_left -= m[k]
+            volume_left -= vol[k]
+            best_value += val[k]
+            best_set.append(k)
+
+    deadline = time.monotonic() + BRANCH_TIME_LIMIT
+    nodes = 0
+    exhausted = False
+    # Stack of (next item, mass left, volume left, value, chosen items)
+    stack = [(0, float(max_mass), volume_cap, 0.0, [])]
+    while stack:
+        nodes += 1
+        if nodes > MAX_BRANCH_NODES or (nodes % 1024 == 0 and time.monotonic() > deadline):
+            exhausted = True
+            break
+
+        k, mass_left, volume_left, value, chosen = stack.pop()
+        if value > best_value:
+            best_value, best_set = value, chosen
+        if k == n or bound(k, mass_left, volume_left, value) <= best_value + 1e-9:
+            continue
+
+        # Push the exclude branch first so the include branch is explored first
+        stack.append((k + 1, mass_left, volume_left, value, chosen))
+        if m[k] <= mass_left and vol[k] <= volume_left:
+            stack.append((k + 1, mass_left - m[k], volume_left - vol[k], value + val[k], chosen + [k]))
+
+    return sorted(order[k] for k in best_set), not exhausted
+
+def solve_knapsack(
+    masses: Sequence[float],
+    volumes: Sequence[float],
+    max_mass: float,
+    max_volume: Optional[float] = None,
+    values: Optional[Sequence[float]] = None,
+    mass_resolution: float = MASS_RESOLUTION
+) -> Dict[str, Any]:
+    """
+    Select items maximising total value under a mass cap and an optional volume cap.
+
+    Uses the vectorised DP over discretised mass when the volume cap cannot bind and
+    the table is small enough, otherwise branch and bound. When the masses do not lie
+    on the DP grid, branch and bound is run as well and the better plan is kept.
+
+    Args:
+        masses: Item masses in kg
+        volumes: Item volumes in cm^3
+        max_mass: Weight cap in kg
+        max_volume: Volume cap in cm^3 (None for no cap)
+        values: Value of each item (defaults to its volume)
+        mass_resolution: kg per DP cell
+
+    Returns:
+        Dictionary with selected indices, totals, the method used, whether the
+        result is proven optimal and the solve time in milliseconds
+    """
+    start = time.perf_counter()
+    masses = np.asarray(masses, dtype=float)
+    volumes = np.asarray(volumes, dtype=float)
+    values = volumes if values is None else np.asarray(values, dtype=float)
+    n = len(masses)
+
+    # Items that can never fit are dropped up front
+    candidates = [
+        i for i in range(n)
+        if masses[i] <= max_mass and (max_volume is None or volumes[i] <= max_volume) and values[i] > 0
+    ]
+    sub_masses, sub_volumes, sub_values = masses[candidates], volumes[candidates], values[candidates]
+
+    volume_binds = max_volume is not None and float(sub_volumes.sum()) > max_volume
+    dp_cells = len(candidates) * (int(max_mass / mass_resolution) + 1)
+
+    if not candidates:
+        selected, optimal, method = [], True, "trivial"
+    elif float(sub_masses.sum()) <= max_mass and not volume_binds:
+        selected, optimal, method = list(range(len(candidates))), True, "take_all"
+    elif not volume_binds and dp_cells <= MAX_DP_CELLS:
+        selected, optimal = _solve_dp(sub_masses, sub_values, max_mass, mass_resolution)
+        method = "dynamic_programming"
+        if not optimal:
+            # Rounding masses up may have excluded a better plan
+            exact, optimal = _solve_branch_and_bound(sub_masses, sub_volumes, sub_values, max_mass, max_volume)
+            if float(sub_values[exact].sum()) > float(sub_values[selected].sum()) + 1e-9:
+                selected, method = exact, "branch_and_bound"
+    else:
+        selected, optimal = _solve_branch_and_bound(sub_masses, sub_volumes, sub_values, max_mass, max_volume)
+        method = "branch_and_bound"
+
+    selected = [candidates[i] for i in selected]
+    return {
+        "selected": selected,
+        "total_mass": float(masses[selected].sum()) if selected else 0.0,
+        "total_volume": float(volumes[selected].sum()) if selected else 0.0,
+        "total_value": float(values[selected].sum()) if selected else 0.0,
+        "method": method,
+        "optimal": optimal,
+        "solve_time_ms": round((time.perf_counter() - start) * 1000, 3)
+    }
+
+def select_return_items(
+    waste_items: List[Any],
+    max_weight: float,
+    max_volume: Optional[float] = None
+) -> Dict[str, Any]:
+    """
+    Choose the waste items to return, maximising reclaimed volume.
+
+    Args:
+        waste_items: Candidate waste items (anything with width/depth/height/mass)
+        max_weight: Weight cap in kg
+        max_volume: Free volume of the undocking container in cm^3 (None for no cap)
+
+    Returns:
+        The solve_knapsack result with the selected items under "items"
+    """
+    result = solve_knapsack(
+        [item.mass or 0.0 for item in waste_items],
+        [item_volume(item) for item in waste_items],
+        max_weight,
+        max_volume
+    )
+    result["items"] = [waste_items[i] for i in result["selected"]]
+    return result
+
+def occupied_boxes(container, contents: List[Any]) -> List[tuple]:
+    """
+    Boxes taken up by items staying in a container, as (x, y, z, width, depth, height).
+    Items without a recorded position take up nothing.
+    """
+    boxes = []
+    for item in contents:
+        if getattr(item, "position_x", None) is None:
+            continue
+        boxes.append((item.position_x, item.position_y, item.position_z) + spatial.oriented_dimensions(
+            item.width, item.depth, item.height, getattr(item, "orientation", None)
+        ))
+    return boxes
+
+def plan_return(
+    waste_items: List[Any],
+    max_weight: float,
+    container=None,
+    contents: Optional[List[Any]] = None
+) -> Dict[str, Any]:
+    """
+    Choose the waste items to return and pack them into the undocking container.
+
+    The knapsack selection only knows about weight and volume, so the selected items
+    are packed into the container geometry; items that do not pack are dropped from
+    the candidates and the selection is solved again, until every selected item has
+    a position.
+
+    Args:
+        waste_items: Candidate waste items
+        max_weight: Weight cap in kg
+        container: Undocking container (None to skip packing)
+        contents: Items staying in the undocking container
+
+    Returns:
+        The select_return_items result with a "placements" list (one packed position
+        per selected item), the free volume packed into and the number of packing rounds
+    """
+    if container is None:
+        result = select_return_items(waste_items, max_weight)
+        result["placements"] = []
+        result["packing_rounds"] = 0
+        result["available_volume"] = None
+        return result
+
+    boxes = occupied_boxes(container, contents or [])
+    max_volume = container.width * container.depth * container.height - sum(box[3] * box[4] * box[5] for box in boxes)
+    start = time.perf_counter()
+
+    candidates = list(waste_items)
+    for rounds in range(1, MAX_PACKING_ROUNDS + 1):
+        result = select_return_items(candidates, max_weight, max_volume)
+        placements, unpacked = spatial.pack_items(
+            container.width, container.depth, container.height, result["items"], boxes
+        )
+        if not unpacked:
+            break
+        unpacked = set(unpacked)
+        candidates = [item for item in candidates if item.id not in unpacked]
+
+    if unpacked:
+        # Out of rounds: keep the items that did pack
+        result["items"] = [item for item in result["items"] if item.id not in unpacked]
+        result["total_mass"] = sum(item.mass or 0.0 for item in result["items"])
+        result["total_volume"] = sum(item_volume(item) for item in result["items"])
+        result["total_value"] = result["total_volume"]
+
+    # Indices refer to the original waste list; dropping unpackable items loses the optimality proof
+    index = {id(item): i for i, item in enumerate(waste_items)}
+    result["selected"] = [index[id(item)] for item in result["items"]]
+    result["optimal"] = result["optimal"] and rounds == 1
+    result["placements"] = placements
+    result["packing_rounds"] = rounds
+    result["available_volume"] = max_volume
+    result["solve_time_ms"] = round((time.perf_counter() - start) * 1000, 3)
+    return result
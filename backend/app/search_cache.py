@@ -0,0 +1,96 @@
+"""
+Search result cache.
+Answers repeated /api/search filter combinations from memory. Entries are keyed by
+the normalised filter set and are only valid for the data store version (and
+mission date) they were computed at; any change to the store empties the cache.
+"""
+import threading
+from collections import OrderedDict
+from typing import Any, Dict, Optional, Tuple
+
+from . import data_store
+
+# Filter combinations kept, least recently used evicted first
+MAX_ENTRIES = 256
+
+# Filters matched case-insensitively, so their values are lowercased in the key
+# (item IDs are looked up exactly unless substring matching is asked for)
+CASE_INSENSITIVE_FILTERS = ("item_name", "zone", "status")
+
+def normalize_filters(filters: Dict[str, Any]) -> Tuple:
+    """Cache key for a filter set: the filters that are set, sorted by name."""
+    key = []
+    for name, value in sorted(filters.items()):
+        if value is None or value == "":
+            continue
+        if name in CASE_INSENSITIVE_FILTERS and isinstance(value, str):
+            value = value.lower()
+        key.append((name, value))
+    return tuple(key)
+
+def store_state() -> Tuple:
+    """The (data store version, mission date) a result is computed against."""
+    return (data_store.version, data_store.current_date)
+
+class SearchCache:
+    def __init__(self, max_entries: int = MAX_ENTRIES):
+        self.max_entries = max_entries
+        self.entries = OrderedDict()
+        self.state = None  # (data store version, mission date) the entries belong to
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.invalidations = 0
+        self.lock = threading.Lock()
+
+    def _sync(self):
+        # Drop every entry once the data store has changed since they were computed
+        state = store_state()
+        if state != self.state:
+            if self.entries:
+                self.invalidations += 1
+                self.entries.clear()
+            self.state = state
+
+    def get(self, key: Tuple) -> Optional[Any]:
+        """Cached result for a key, or None on a miss."""
+        with self.lock:
+            self._sync()
+            if key in self.entries:
+                self.entries.move_to_end(key)
+                self.hits += 1
+                return self.entries[key]
+            self.misses += 1
+            return None
+
+    def put(self, key: Tuple, value: Any, state: Tuple):
+        """
+        Store a result computed from the store at `state` (read before the lookup).
+        The result is dropped if the store has changed since.
+        """
+        with self.lock:
+            self._sync()
+            if state != self.state:
+                return
+            self.entries[key] = value
+            self.entries.move_to_end(key)
+            while len(self.entries) > self.max_entries:
+                self.entries.popitem(last=False)
+                self.evictions += 1
+
+    def clear(self):
+        with self.lock:
+            self.entries.clear()
+
+    def stats(self) -> Dict[str, Any]:
+        lookups = self.hits + self.misses
+        return {
+            "entries": len(self.entries),
+            "maxEntries": self.max_entries,
+            "hits": self.hits,
+            "misses": self.misses,
+            "hitRate": round(self.hits / lookups, 4) if lookups else 0.0,
+            "evictions": self.evictions,
+            "invalidations": self.invalidations,
+            "version": data_store.version
+        }
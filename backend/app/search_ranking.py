@@ -0,0 +1,96 @@
+"""
+Search ranking.
+Scores items from features that are cheap to look up: the expiry date from the
+data store's expiry index, the priority, and retrieval steps cached per container
+version, so ranking a large result set never rescans containers. The best K
+results are selected with a heap.
+"""
+import heapq
+from datetime import datetime
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+from . import data_store, retrieval
+
+# Score weights
+EXPIRY_WEIGHT = 0.5
+PRIORITY_WEIGHT = 0.3
+ACCESSIBILITY_WEIGHT = 0.2
+
+# Items expiring within this many days get an expiry boost
+EXPIRY_HORIZON_DAYS = 7
+
+# Retrieval steps of every item in a container: container ID -> (container version, {item ID: steps})
+retrieval_steps_cache = {}
+
+def relevance_score(
+    expiry: Optional[datetime],
+    current_date: datetime,
+    priority: Optional[int],
+    retrieval_steps: int,
+    stowed: bool = True
+) -> float:
+    """
+    Relevance of a search hit: items about to expire, of high priority and easy to
+    retrieve rank first. Items not in a container get no accessibility bonus.
+    """
+    # Base score starts at 1.0
+    score = 1.0
+
+    # Items closer to expiry get higher priority (max boost for items expiring within the horizon)
+    if expiry is not None and expiry > current_date:
+        days_until_expiry = (expiry - current_date).days
+        if days_until_expiry <= EXPIRY_HORIZON_DAYS:
+            score += (1.0 - days_until_expiry / EXPIRY_HORIZON_DAYS) * EXPIRY_WEIGHT
+
+    score += ((priority or 0) / 100.0) * PRIORITY_WEIGHT
+
+    # Stowed items that are easier to retrieve get higher priority
+    if stowed:
+        score += ACCESSIBILITY_WEIGHT / (retrieval_steps + 1)
+    return score
+
+def retrieval_steps(item: data_store.Item) -> int:
+    """
+    Number of items in front of an item in its container. Computed for the whole
+    container at once and cached until the container's contents change.
+    """
+    container = data_store.containers.get(item.container_id) if item.container_id else None
+    if container is None:
+        return 0
+    version = container.version
+    cached = retrieval_steps_cache.get(container.id)
+    if cached is None or cached[0] != version:
+        # Stored under the version read before the scan, so a concurrent change is never masked
+        members = data_store.container_items(container)
+        counts = retrieval.blocking_counts(members)
+        cached = (version, {member.id: int(count) for member, count in zip(members, counts)})
+        retrieval_steps_cache[container.id] = cached
+    return cached[1].get(item.id, 0)
+
+def item_features(item: data_store.Item) -> Tuple[Optional[datetime], Optional[int], int]:
+    """(expiry, priority, retrieval steps) of an item, from the maintained indexes."""
+    return data_store.expiry_keys.get(item.id), item.priority, retrieval_steps(item)
+
+def rank_items(
+    items: Iterable[data_store.Item],
+    k: Optional[int] = None,
+    current_date: Optional[datetime] = None
+) -> List[Dict[str, Any]]:
+    """
+    The k most relevant items (all of them when k is None), best first.
+
+    Returns:
+        List of {"item", "score", "retrievalSteps"} entries
+    """
+    current_date = current_date or data_store.current_date
+    scored = []
+    for order, item in enumerate(items):
+        expiry, priority, steps = item_features(item)
+        # The catalogue order breaks ties
+        score = relevance_score(expiry, current_date, priority, steps, stowed=bool(item.container_id))
+        scored.append((score, -order, steps, item))
+
+    best = scored if k is None else heapq.nlargest(k, scored, key=lambda entry: entry[:2])
+    if k is None:
+        best.sort(key=lambda entry: entry[:2], reverse=True)
+    return [{"item": item, "score": score, "retrievalSteps": steps} for score, _, steps, item in best]
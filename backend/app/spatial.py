@@ -0,0 +1,622 @@
+"""
+Spatial engine for item placement.
+Voxel occupancy grids for containers, used to find free positions for items
+and to pack a set of items into a container, and box collision checks.
+"""
+import math
+from abc import ABC, abstractmethod
+from typing import Dict, List, Tuple, Optional, Iterable
+
+import numpy as np
+
+# Grid cell size in cm
+DEFAULT_RESOLUTION = 5
+
+# Cell sizes (cm) the adaptive grid chooses from, finest first
+RESOLUTION_CHOICES = (1.0, 2.0, 2.5, 5.0, 10.0, 20.0)
+
+# Containers with more cells than this use sparse column occupancy
+DENSE_CELL_LIMIT = 2_000_000
+
+# Depth cells packed into each occupancy word
+WORD_BITS = 64
+
+# Orientation names and the (width, depth, height) permutation each one applies
+ORIENTATIONS = ["xyz", "xzy", "yxz", "yzx", "zxy", "zyx"]
+
+# Tolerance for floating point box edges that land on a cell boundary
+EPSILON = 1e-6
+
+# Candidate boxes compared against a box index per broadcast block
+COLLISION_BLOCK_SIZE = 1024
+
+def oriented_dimensions(width: float, depth: float, height: float, orientation: Optional[str]) -> Tuple[float, float, float]:
+    """Get the (width, depth, height) an item occupies in the given orientation."""
+    if not orientation or orientation == "xyz":
+        return width, depth, height
+    elif orientation == "xzy":
+        return width, height, depth
+    elif orientation == "yxz":
+        return depth, width, height
+    elif orientation == "yzx":
+        return depth, height, width
+    elif orientation == "zxy":
+        return height, width, depth
+    elif orientation == "zyx":
+        return height, depth, width
+    return width, depth, height
+
+def match_orientation(
+    width: float,
+    depth: float,
+    height: float,
+    box_dimensions: Tuple[float, float, float]
+) -> Optional[str]:
+    """Orientation in which an item of the given size occupies exactly the given box, or None."""
+    for orientation in ORIENTATIONS:
+        dims = oriented_dimensions(width, depth, height, orientation)
+        if all(abs(a - b) <= EPSILON for a, b in zip(dims, box_dimensions)):
+            return orientation
+    return None
+
+class _Grid(ABC):
+    """Cell geometry shared by the occupancy representations."""
+
+    def __init__(self, width: float, depth: float, height: float, resolution: float = DEFAULT_RESOLUTION):
+        self.width = width
+        self.depth = depth
+        self.height = height
+        self.resolution = resolution
+        self.shape = (
+            max(1, math.ceil(width / resolution - EPSILON)),
+            max(1, math.ceil(depth / resolution - EPSILON)),
+            max(1, math.ceil(height / resolution - EPSILON))
+        )
+
+    def _cell_range(self, start: float, size: float, axis: int) -> Tuple[int, int]:
+        lo = max(0, int(math.floor(start / self.resolution + EPSILON)))
+        hi = min(self.shape[axis], int(math.ceil((start + size) / self.resolution - EPSILON)))
+        return lo, max(lo, hi)
+
+    def _cell_box(self, x: float, y: float, z: float, width: float, depth: float, height: float):
+        x0, x1 = self._cell_range(x, width, 0)
+        y0, y1 = self._cell_range(y, depth, 1)
+        z0, z1 = self._cell_range(z, height, 2)
+        return x0, x1, y0, y1, z0, z1
+
+    def _inside(self, x: float, y: float, z: float, width: float, depth: float, height: float) -> bool:
+        return not (x < -EPSILON or y < -EPSILON or z < -EPSILON or
+                    x + width > self.width + EPSILON or
+                    y + depth > self.depth + EPSILON or
+                    z + height > self.height + EPSILON)
+
+    def _box_cells(self, width: float, depth: float, height: float) -> Tuple[Tuple[int, int, int], Tuple[int, int, int]]:
+        # Box size in cells, and the number of start cells that keep the box inside
+        # the container (and the grid) along each axis
+        res = self.resolution
+        size = tuple(max(1, int(math.ceil(dim / res - EPSILON))) for dim in (width, depth, height))
+        starts = tuple(
+            min(int(math.floor((extent - dim) / res + EPSILON)) + 1, self.shape[axis] - size[axis] + 1)
+            for axis, (extent, dim) in enumerate(((self.width, width), (self.depth, depth), (self.height, height)))
+        )
+        return size, starts
+
+    def _start_range(self, size, starts, near):
+        # Start cells to consider: all of them, or those whose box overlaps `near`
+        if near is None:
+            return (0, 0, 0), starts
+        x0, x1, y0, y1, z0, z1 = self._cell_box(*near)
+        lo = tuple(max(0, a - n + 1) for a, n in zip((x0, y0, z0), size))
+        hi = tuple(min(b, e) for b, e in zip((x1, y1, z1), starts))
+        return lo, hi
+
+    @abstractmethod
+    def add_box(self, x: float, y: float, z: float, width: float, depth: float, height: float):
+        """Mark a box as occupied."""
+
+    @abstractmethod
+    def remove_box(self, x: float, y: float, z: float, width: float, depth: float, height: float):
+        """Free a box added earlier."""
+
+    @abstractmethod
+    def is_free(self, x: float, y: float, z: float, width: float, depth: float, height: float) -> bool:
+        """Whether a box lies inside the container without touching occupied cells."""
+
+    @abstractmethod
+    def free_positions(self, width, depth, height, limit=None, near=None) -> List[Tuple[float, float, float]]:
+        """Positions where a box of the given size fits, nearest the open face first."""
+
+    def first_free_position(self, width: float, depth: float, height: float) -> Optional[Tuple[float, float, float]]:
+        """The first position where a box of the given size fits, or None."""
+        positions = self.free_positions(width, depth, height, limit=1)
+        return positions[0] if positions else None
+
+class OccupancyGrid(_Grid):
+    """
+    Voxel occupancy of one container, one bit per cell. Every x/z column is packed
+    along depth into 64-bit words, so a depth range of a column is tested with a
+    single AND. A cell is occupied if any box touches it, so free-space queries
+    are conservative for boxes that are not grid aligned.
+    """
+
+    def __init__(self, width: float, depth: float, height: float, resolution: float = DEFAULT_RESOLUTION):
+        super().__init__(width, depth, height, resolution)
+        nx, ny, nz = self.shape
+        self.words = np.zeros((nx, nz, -(-ny // WORD_BITS)), dtype=np.uint64)
+        # Cell boxes that have been added, with multiplicity, so removals can restore overlaps
+        self.boxes: Dict[Tuple[int, int, int, int, int, int], int] = {}
+
+    def _depth_mask(self, y0: int, y1: int) -> np.ndarray:
+        # Words with the bits of depth cells [y0, y1) set
+        mask = []
+        for w in range(self.words.shape[2]):
+            lo, hi = max(y0 - w * WORD_BITS, 0), min(y1 - w * WORD_BITS, WORD_BITS)
+            mask.append((1 << hi) - (1 << lo) if hi > lo else 0)
+        return np.array(mask, dtype=np.uint64)
+
+    def _mark(self, cell_box):
+        x0, x1, y0, y1, z0, z1 = cell_box
+        self.words[x0:x1, z0:z1] |= self._depth_mask(y0, y1)
+
+    def add_box(self, x: float, y: float, z: float, width: float, depth: float, height: float):
+        """Mark the cells touched by a box as occupied."""
+        cell_box = self._cell_box(x, y, z, width, depth, height)
+        if cell_box[0] == cell_box[1] or cell_box[2] == cell_box[3] or cell_box[4] == cell_box[5]:
+            return
+        self.boxes[cell_box] = self.boxes.get(cell_box, 0) + 1
+        self._mark(cell_box)
+
+    def remove_box(self, x: float, y: float, z: float, width: float, depth: float, height: float):
+        """
+        Unmark a box added earlier. Its cells are cleared and the boxes overlapping
+        them are drawn again, so cells shared with other boxes stay occupied.
+        """
+        cell_box = self._cell_box(x, y, z, width, depth, height)
+        count = self.boxes.get(cell_box, 0)
+        if count > 1:
+            self.boxes[cell_box] = count - 1
+            return
+        if not count:
+            return
+        del self.boxes[cell_box]
+
+        x0, x1, y0, y1, z0, z1 = cell_box
+        self.words[x0:x1, z0:z1] &= ~self._depth_mask(y0, y1)
+        for bx0, bx1, by0, by1, bz0, bz1 in self.boxes:
+            if bx0 < x1 and bx1 > x0 and by0 < y1 and by1 > y0 and bz0 < z1 and bz1 > z0:
+                self._mark((max(bx0, x0), min(bx1, x1), by0, by1, max(bz0, z0), min(bz1, z1)))
+
+    def is_free(self, x: float, y: float, z: float, width: float, depth: float, height: float) -> bool:
+        """Check that a box lies inside the container and touches no occupied cell."""
+        if not self._inside(x, y, z, width, depth, height):
+            return False
+        x0, x1, y0, y1, z0, z1 = self._cell_box(x, y, z, width, depth, height)
+        return not (self.words[x0:x1, z0:z1] & self._depth_mask(y0, y1)).any()
+
+    def occupied(self) -> np.ndarray:
+        """Boolean (x, y, z) array of occupied cells."""
+        bits = np.unpackbits(self.words.astype("<u8").view(np.uint8), axis=2, bitorder="little")
+        return bits[:, :, :self.shape[1]].transpose(0, 2, 1).astype(bool)
+
+    def _free_starts(self, size, lo, hi) -> np.ndarray:
+        # Free start cells in [lo, hi), all at once: OR the footprint columns together,
+        # then keep the depth bits followed by enough free bits for the box
+        (cw, cd, ch), (ax, ay, az), (bx, by, bz) = size, lo, hi
+        occupied = self.words[ax:bx + cw - 1, az:bz + ch - 1]
+        occupied = _window_or(_window_or(occupied, cw, 0), ch, 1)
+        free = _free_runs(~occupied, cd)
+        bits = np.unpackbits(free.astype("<u8").view(np.uint8), axis=2, bitorder="little")
+        return bits[:, :, ay:by].transpose(0, 2, 1).astype(bool)
+
+    def free_mask(self, width: float, depth: float, height: float) -> np.ndarray:
+        """
+        Boolean array over grid cells: True where a box of the given size can start.
+        Evaluated for every cell at once on the packed columns.
+        """
+        size, starts = self._box_cells(width, depth, height)
+        if min(starts) <= 0:
+            return np.zeros((0, 0, 0), dtype=bool)
+        return self._free_starts(size, (0, 0, 0), starts)
+
+    def free_positions(
+        self,
+        width: float,
+        depth: float,
+        height: float,
+        limit: Optional[int] = None,
+        near: Optional[Tuple[float, float, float, float, float, float]] = None
+    ) -> List[Tuple[float, float, float]]:
+        """
+        All positions (in cm, on grid points) where a box of the given size fits,
+        ordered by x, then y, then z.
+
+        Args:
+            limit: Return at most this many positions
+            near: Only consider positions where the box would overlap the cells of
+                this (x, y, z, width, depth, height) box, e.g. one just removed
+        """
+        size, starts = self._box_cells(width, depth, height)
+        lo, hi = self._start_range(size, starts, near)
+        if any(h <= l for l, h in zip(lo, hi)):
+            return []
+
+        free = self._free_starts(size, lo, hi)
+        if limit is None:
+            cells = np.argwhere(free)
+        else:
+            # Only scan the x slices that have a free start, until the limit is met
+            found = []
+            remaining = limit
+            for x in np.flatnonzero(free.any(axis=(1, 2))):
+                if remaining <= 0:
+                    break
+                slice_cells = np.argwhere(free[x])[:remaining]
+                found.append(np.column_stack((np.full(len(slice_cells), x), slice_cells)))
+                remaining -= len(slice_cells)
+            cells = np.concatenate(found) if found else np.zeros((0, 3), dtype=np.int64)
+        res = self.resolution
+        return [(float((x + lo[0]) * res), float((y + lo[1]) * res), float((z + lo[2]) * res)) for x, y, z in cells]
+
+def _window_or(words: np.ndarray, size: int, axis: int) -> np.ndarray:
+    # OR over every run of `size` consecutive entries along an axis, by doubling
+    covered = 1
+    while covered < size:
+        step = min(covered, size - covered)
+        count = words.shape[axis] - step
+        words = np.take(words, range(count), axis=axis) | np.take(words, range(step, step + count), axis=axis)
+        covered += step
+    return words
+
+def _shift_down(words: np.ndarray, shift: int) -> np.ndarray:
+    # Move every depth bit `shift` cells towards the open face across word boundaries;
+    # bits shifted in from past the last word are zero
+    whole, part = divmod(shift, WORD_BITS)
+    n = words.shape[-1]
+    result = np.zeros_like(words)
+    if whole >= n:
+        return result
+    result[..., :n - whole] = words[..., whole:]
+    if part:
+        carry = np.zeros_like(words)
+        carry[..., :-1] = result[..., 1:] << np.uint64(WORD_BITS - part)
+        result = (result >> np.uint64(part)) | carry
+    return result
+
+def _free_runs(free: np.ndarray, length: int) -> np.ndarray:
+    # Keep the bits that start a run of at least `length` set bits, by doubling
+    covered = 1
+    while covered < length:
+        step = min(covered, length - covered)
+        free = free & _shift_down(free, step)
+        covered += step
+    return free
+
+class ColumnGrid(_Grid):
+    """
+    Sparse occupancy of one container: for every x/z column that any box touches,
+    the depth-cell runs [y0, y1) of those boxes (run-length encoded). Empty columns
+    cost nothing, so memory follows the occupied detail rather than the container
+    size. Same query API as OccupancyGrid.
+    """
+
+    def __init__(self, width: float, depth: float, height: float, resolution: float = DEFAULT_RESOLUTION):
+        super().__init__(width, depth, height, resolution)
+        # (x, z) -> list of runs, one per box touching the column
+        self.columns: Dict[Tuple[int, int], List[Tuple[int, int]]] = {}
+        self._merged: Dict[Tuple[int, int], List[Tuple[int, int]]] = {}
+        # x -> {z: runs} over the same columns, so an x slice finds its columns directly
+        self._by_x: Dict[int, Dict[int, List[Tuple[int, int]]]] = {}
+
+    def add_box(self, x: float, y: float, z: float, width: float, depth: float, height: float):
+        """Mark the cells touched by a box as occupied."""
+        x0, x1, y0, y1, z0, z1 = self._cell_box(x, y, z, width, depth, height)
+        if y1 <= y0:
+            return
+        for cx in range(x0, x1):
+            for cz in range(z0, z1):
+                runs = self.columns.setdefault((cx, cz), [])
+                runs.append((y0, y1))
+                self._by_x.setdefault(cx, {})[cz] = runs
+                self._merged.pop((cx, cz), None)
+
+    def remove_box(self, x: float, y: float, z: float, width: float, depth: float, height: float):
+        """Unmark a box added earlier."""
+        x0, x1, y0, y1, z0, z1 = self._cell_box(x, y, z, width, depth, height)
+        for cx in range(x0, x1):
+            for cz in range(z0, z1):
+                runs = self.columns.get((cx, cz))
+                if runs and (y0, y1) in runs:
+                    runs.remove((y0, y1))
+                    if not runs:
+                        del self.columns[(cx, cz)]
+                        del self._by_x[cx][cz]
+                        if not self._by_x[cx]:
+                            del self._by_x[cx]
+                    self._merged.pop((cx, cz), None)
+
+    def _column_runs(self, column: Tuple[int, int]) -> List[Tuple[int, int]]:
+        # Occupied runs of a column, sorted and merged
+        merged = self._merged.get(column)
+        if merged is None:
+            merged = []
+            for y0, y1 in sorted(self.columns.get(column, ())):
+                if merged and y0 <= merged[-1][1]:
+                    merged[-1] = (merged[-1][0], max(merged[-1][1], y1))
+                else:
+                    merged.append((y0, y1))
+            self._merged[column] = merged
+        return merged
+
+    def is_free(self, x: float, y: float, z: float, width: float, depth: float, height: float) -> bool:
+        """Check that a box lies inside the container and touches no occupied cell."""
+        if not self._inside(x, y, z, width, depth, height):
+            return False
+        x0, x1, y0, y1, z0, z1 = self._cell_box(x, y, z, width, depth, height)
+        for cx in range(x0, x1):
+            for cz in range(z0, z1):
+                for r0, r1 in self._column_runs((cx, cz)) if (cx, cz) in self.columns else ():
+                    if r0 < y1 and r1 > y0:
+                        return False
+        return True
+
+    def _blocked_starts(self, x: int, size, lo, hi) -> np.ndarray:
+        # Boolean (y, z) array over start cells in [lo, hi) of the x slice: True where a
+        # box starting there would touch an occupied run. One slice assignment per run.
+        cw, cd, ch = size
+        blocked = np.zeros((hi[1] - lo[1], hi[2] - lo[2]), dtype=bool)
+        for cx in range(x, x + cw):
+            for cz, runs in self._by_x.get(cx, {}).items():
+                z0, z1 = max(cz - ch + 1, lo[2]), min(cz + 1, hi[2])
+                if z1 <= z0:
+                    continue
+                for r0, r1 in self._column_runs((cx, cz)):
+                    y0, y1 = max(r0 - cd + 1, lo[1]), min(r1, hi[1])
+                    if y1 > y0:
+                        blocked[y0 - lo[1]:y1 - lo[1], z0 - lo[2]:z1 - lo[2]] = True
+        return blocked
+
+    def free_positions(
+        self,
+        width: float,
+        depth: float,
+        height: float,
+        limit: Optional[int] = None,
+        near: Optional[Tuple[float, float, float, float, float, float]] = None
+    ) -> List[Tuple[float, float, float]]:
+        """
+        All positions (in cm, on grid points) where a box of the given size fits,
+        ordered by x, then y, then z. Evaluated one x slice at a time, so a limit
+        stops the scan early.
+
+        Args:
+            limit: Return at most this many positions
+            near: Only consider positions where the box would overlap the cells of
+                this (x, y, z, width, depth, height) box, e.g. one just removed
+        """
+        size, starts = self._box_cells(width, depth, height)
+        lo, hi = self._start_range(size, starts, near)
+        if any(h <= l for l, h in zip(lo, hi)):
+            return []
+
+        res = self.resolution
+        positions = []
+        for x in range(lo[0], hi[0]):
+            cells = np.argwhere(~self._blocked_starts(x, size, lo, hi))
+            if limit is not None:
+                cells = cells[:limit - len(positions)]
+            coords = np.empty((len(cells), 3))
+            coords[:, 0] = x * res
+            coords[:, 1:] = (cells + (lo[1], lo[2])) * res
+            positions.extend(map(tuple, coords.tolist()))
+            if limit is not None and len(positions) >= limit:
+                break
+        return positions
+
+def choose_resolution(
+    width: float,
+    depth: float,
+    height: float,
+    item_dimensions: Iterable[Tuple[float, float, float]] = ()
+) -> float:
+    """
+    Pick the grid cell size for a container from the dimensions of its items.
+    Prefers the coarsest choice that divides every item and container dimension, so
+    boxes land on cell boundaries and are not over-constrained by rounding; otherwise
+    the coarsest choice no larger than half the smallest item dimension. Never finer
+    than the finest choice that keeps the container within DENSE_CELL_LIMIT cells, so
+    small items in a large container do not force the sparse grid.
+    """
+    dimensions = [d for dims in item_dimensions for d in dims if d > 0]
+    smallest = min(dimensions) if dimensions else min(width, depth, height)
+    dimensions += [d for d in (width, depth, height) if d > 0]
+
+    def divides(step: float) -> bool:
+        return all(abs(d / step - round(d / step)) < 1e-6 for d in dimensions)
+
+    dense = [step for step in RESOLUTION_CHOICES if _cell_count(width, depth, height, step) <= DENSE_CELL_LIMIT]
+    finest = dense[0] if dense else RESOLUTION_CHOICES[-1]
+    aligned = [step for step in RESOLUTION_CHOICES if finest <= step <= smallest and divides(step)]
+    if aligned:
+        return max(aligned)
+    coarse_enough = [step for step in RESOLUTION_CHOICES if finest <= step <= smallest / 2]
+    return max(coarse_enough) if coarse_enough else finest
+
+def _cell_count(width: float, depth: float, height: float, resolution: float) -> int:
+    return (math.ceil(width / resolution - EPSILON) * math.ceil(depth / resolution - EPSILON)
+            * math.ceil(height / resolution - EPSILON))
+
+def make_grid(
+    width: float,
+    depth: float,
+    height: float,
+    item_dimensions: Iterable[Tuple[float, float, float]] = (),
+    resolution: Optional[float] = None
+) -> _Grid:
+    """
+    Occupancy for a container at a resolution chosen from its items: a dense voxel
+    grid when it has at most DENSE_CELL_LIMIT cells, sparse columns otherwise.
+    """
+    if resolution is None:
+        resolution = choose_resolution(width, depth, height, item_dimensions)
+    if _cell_count(width, depth, height, resolution) <= DENSE_CELL_LIMIT:
+        return OccupancyGrid(width, depth, height, resolution)
+    return ColumnGrid(width, depth, height, resolution)
+
+class AccessMap:
+    """
+    Occupancy grid plus the boxes of one container, built once. Blocking counts for
+    any number of candidate positions are evaluated against all boxes at once, in
+    blocks, and memory follows the number of boxes rather than the container size.
+    """
+
+    def __init__(self, width: float, depth: float, height: float,
+                 boxes: Iterable[Tuple[float, float, float, float, float, float]] = (),
+                 item_dimensions: Iterable[Tuple[float, float, float]] = (),
+                 resolution: Optional[float] = None):
+        boxes = list(boxes)
+        # Same adaptive resolution as every other grid, from the stowed boxes and
+        # the items about to be placed
+        self.grid = make_grid(width, depth, height, [box[3:] for box in boxes] + list(item_dimensions), resolution)
+        for box in boxes:
+            self.grid.add_box(*box)
+        array = np.asarray(boxes, dtype=float).reshape(-1, 6)
+        self.lower = array[:, :3]
+        self.upper = array[:, :3] + array[:, 3:]
+
+    def blocking_counts(self, positions: List[Tuple[float, float, float]], width: float, height: float) -> np.ndarray:
+        """
+        For each (x, y, z) position of a box with the given width and height, the
+        number of distinct boxes in front of it (nearer the open face) that overlap
+        its footprint.
+        """
+        counts = np.zeros(len(positions), dtype=np.int32)
+        if not positions or not len(self.lower):
+            return counts
+        points = np.asarray(positions, dtype=float)
+        for start in range(0, len(points), COLLISION_BLOCK_SIZE):
+            block = points[start:start + COLLISION_BLOCK_SIZE, None, :]
+            in_front = (
+                (self.lower[None, :, 1] < block[:, :, 1])
+                & (self.lower[None, :, 0] < block[:, :, 0] + width) & (self.upper[None, :, 0] > block[:, :, 0])
+                & (self.lower[None, :, 2] < block[:, :, 2] + height) & (self.upper[None, :, 2] > block[:, :, 2])
+            )
+            counts[start:start + len(block)] = in_front.sum(axis=1)
+        return counts
+
+    def accessibility_scores(self, positions: List[Tuple[float, float, float]], width: float, height: float) -> np.ndarray:
+        """
+        Accessibility of each position: 1 at the open face falling to 0 at the back
+        wall, reduced by 20% for every box in front of it.
+        """
+        if not positions:
+            return np.zeros(0)
+        depths = np.asarray(positions, dtype=float)[:, 1]
+        return (1.0 - depths / self.grid.depth) * 0.8 ** self.blocking_counts(positions, width, height)
+
+class BoxIndex:
+    """
+    Boxes of one container in continuous coordinates, held as NumPy arrays so a
+    candidate box, or a whole batch of them, is checked against every box with
+    vectorised interval comparisons. Boxes that only touch at a face do not collide.
+    """
+
+    def __init__(self, boxes: Iterable[Tuple[float, float, float, float, float, float]] = (), keys: Optional[Iterable] = None):
+        boxes = np.asarray(list(boxes), dtype=float).reshape(-1, 6)
+        self.lower = boxes[:, :3]
+        self.upper = boxes[:, :3] + boxes[:, 3:]
+        self.keys = list(keys) if keys is not None else list(range(len(boxes)))
+
+    def __len__(self) -> int:
+        return len(self.keys)
+
+    def add(self, box: Tuple[float, float, float, float, float, float], key=None):
+        """Add a (x, y, z, width, depth, height) box under a key (defaults to its index)."""
+        box = np.asarray(box, dtype=float)
+        self.lower = np.vstack([self.lower, box[:3]])
+        self.upper = np.vstack([self.upper, box[:3] + box[3:]])
+        self.keys.append(len(self.keys) if key is None else key)
+
+    def remove(self, key):
+        """Remove the box stored under a key."""
+        i = self.keys.index(key)
+        self.lower = np.delete(self.lower, i, axis=0)
+        self.upper = np.delete(self.upper, i, axis=0)
+        del self.keys[i]
+
+    def overlaps(self, boxes: Iterable[Tuple[float, float, float, float, float, float]]) -> np.ndarray:
+        """Boolean (candidates x index) matrix: True where a candidate box overlaps an indexed box."""
+        boxes = np.asarray(list(boxes), dtype=float).reshape(-1, 6)
+        lower = boxes[:, None, :3]
+        upper = lower + boxes[:, None, 3:]
+        result = np.zeros((len(boxes), len(self.keys)), dtype=bool)
+        for start in range(0, len(boxes), COLLISION_BLOCK_SIZE):
+            block = slice(start, start + COLLISION_BLOCK_SIZE)
+            result[block] = ((lower[block] < self.upper - EPSILON) & (upper[block] > self.lower + EPSILON)).all(axis=2)
+        return result
+
+    def collides(self, x: float, y: float, z: float, width: float, depth: float, height: float) -> bool:
+        """Check whether a box overlaps any indexed box."""
+        if not self.keys:
+            return False
+        return bool(self.overlaps([(x, y, z, width, depth, height)]).any())
+
+    def collisions(self, boxes: Iterable[Tuple[float, float, float, float, float, float]]) -> List[list]:
+        """For each candidate box, the keys of the indexed boxes it overlaps."""
+        return [[self.keys[j] for j in np.flatnonzero(row)] for row in self.overlaps(boxes)]
+
+    def self_collisions(self) -> List[tuple]:
+        """Pairs of keys of indexed boxes that overlap each other."""
+        matrix = self.overlaps(np.hstack([self.lower, self.upper - self.lower]))
+        i, j = np.nonzero(np.triu(matrix, k=1))
+        return [(self.keys[a], self.keys[b]) for a, b in zip(i, j)]
+
+def pack_items(
+    width: float,
+    depth: float,
+    height: float,
+    items: Iterable,
+    occupied_boxes: Iterable[Tuple[float, float, float, float, float, float]] = (),
+    resolution: Optional[float] = None
+):
+    """
+    Pack items into a container, largest first, trying every orientation.
+
+    Args:
+        width, depth, height: Container dimensions
+        items: Items with id, width, depth and height
+        occupied_boxes: (x, y, z, width, depth, height) boxes already in the container
+        resolution: Grid cell size in cm (None to choose it from the items)
+
+    Returns:
+        Tuple of (placements, unpacked item IDs). Each placement is a dict with
+        itemId, orientation, position (x, y, z) and dimensions (width, depth, height).
+    """
+    items = list(items)
+    grid = make_grid(width, depth, height, [(i.width, i.depth, i.height) for i in items], resolution)
+    for box in occupied_boxes:
+        grid.add_box(*box)
+
+    placements = []
+    unpacked = []
+    for item in sorted(items, key=lambda i: i.width * i.depth * i.height, reverse=True):
+        best = None
+        for orientation in ORIENTATIONS:
+            dims = oriented_dimensions(item.width, item.depth, item.height, orientation)
+            position = grid.first_free_position(*dims)
+            if position is not None and (best is None or position < best[0]):
+                best = (position, orientation, dims)
+
+        if best is None:
+            unpacked.append(item.id)
+            continue
+
+        position, orientation, dims = best
+        grid.add_box(*position, *dims)
+        placements.append({
+            "itemId": item.id,
+            "orientation": orientation,
+            "position": position,
+            "dimensions": dims
+        })
+
+    return placements, unpacked
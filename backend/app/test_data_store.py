@@ -78,5 +78,57 @@ def test_data_store():
     for log in logs:
         print(f"  - {log.id}: {log.timestamp} - {log.action_type}: {log.description}")
 
+def test_placement_records_collision_free_positions():
+    data_store.create_container({"id": "POS-C", "zone": "Lab", "width": 20.0, "depth": 20.0, "height": 10.0})
+    for i in range(4):
+        data_store.create_item({"id": f"POS-{i}", "name": "Box", "width": 10.0, "depth": 10.0, "height": 10.0,
+                                "mass": 1.0, "priority": 1})
+    container = data_store.containers["POS-C"]
+    
+    # An explicit position is checked against the items already there
+    assert data_store.place_item_in_container("POS-0", "POS-C", (10.0, 10.0, 0.0))
+    assert not data_store.place_item_in_container("POS-1", "POS-C", (5.0, 5.0, 0.0))
+    assert data_store.check_position(container, data_store.items["POS-1"], (5.0, 5.0, 0.0)) == \
+        "Position conflicts with items: POS-0"
+    
+    # Without one, the lowest free position is found
+    for i in range(1, 4):
+        assert data_store.place_item_in_container(f"POS-{i}", "POS-C")
+    starts = sorted(tuple(data_store.items[f"POS-{i}"].box()[:3]) for i in range(4))
+    assert starts == [(0.0, 0.0, 0.0), (0.0, 10.0, 0.0), (10.0, 0.0, 0.0), (10.0, 10.0, 0.0)]
+    assert data_store.items["POS-3"].position()["endCoordinates"]["height"] == 10.0
+    
+    # Removing an item frees its space and clears its position
+    version = container.version
+    box = data_store.items["POS-2"].box()
+    data_store.remove_item_from_container("POS-2")
+    assert container.version > version
+    assert data_store.items["POS-2"].position() is None
+    assert data_store.place_item_in_container("POS-2", "POS-C")
+    assert data_store.items["POS-2"].box() == box
+
+def test_repack_is_all_or_nothing():
+    data_store.create_container({"id": "RX-C", "zone": "Lab", "width": 20.0, "depth": 10.0, "height": 10.0})
+    for item_id in ("RX-A", "RX-E", "RX-F"):
+        data_store.create_item({"id": item_id, "name": "Box", "width": 10.0, "depth": 10.0, "height": 10.0,
+                                "mass": 1.0, "priority": 1})
+    container = data_store.containers["RX-C"]
+    assert data_store.place_item_in_container("RX-A", "RX-C", (5.0, 0.0, 0.0))
+    
+    # Two extras do not fit, so the stowed item stays where it was
+    version = container.version
+    assert not data_store.repack_container("RX-C", ["RX-E", "RX-F"])
+    assert container.version == version
+    assert data_store.items["RX-A"].box()[:3] == (5.0, 0.0, 0.0)
+    assert data_store.items["RX-E"].container_id is None
+    
+    # One extra fits once the split free space is consolidated
+    assert not data_store.place_item_in_container("RX-E", "RX-C")
+    assert data_store.repack_container("RX-C", ["RX-E"])
+    assert data_store.items["RX-E"].container_id == "RX-C"
+    assert container.occupied_volume == 2000.0
+    grid, index = data_store.get_container_space(container)
+    assert index.self_collisions() == []
+
 if __name__ == "__main__":
     test_data_store()
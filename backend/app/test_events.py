@@ -0,0 +1,60 @@
+"""
+Tests for data store change events.
+"""
+import sys
+import threading
+from . import data_store
+
+def test_mutations_emit_events_in_order():
+    since = data_store.version
+    data_store.create_container({"id": "EV-C1", "zone": "Events", "width": 10.0, "depth": 10.0, "height": 10.0})
+    data_store.create_item({
+        "id": "EV-I1", "name": "Filter", "width": 1.0, "depth": 1.0, "height": 1.0,
+        "mass": 1.0, "priority": 1, "usage_limit": 1
+    })
+    data_store.place_item_in_container("EV-I1", "EV-C1")
+    data_store.use_item("EV-I1", event_type="item_retrieved")
+    data_store.remove_item("EV-I1")
+    
+    events = data_store.get_events_since(since)
+    assert [event["type"] for event in events] == [
+        "container_created", "item_created", "item_placed", "item_retrieved",
+        "item_waste", "item_removed", "item_deleted"
+    ]
+    assert [event["id"] for event in events] == list(range(since + 1, data_store.version + 1))
+    assert data_store.get_events_since(data_store.version) == []
+
+def test_logs_do_not_bump_version():
+    since = data_store.version
+    data_store.create_log({"action_type": "TEST", "description": "Not a state change"})
+    assert data_store.version == since
+
+def test_events_can_be_read_while_emitted():
+    since = data_store.version
+    errors = []
+    
+    def emit():
+        for i in range(2000):
+            data_store.emit_event("test_event", index=i)
+    
+    def read():
+        try:
+            for _ in range(200):
+                data_store.get_events_since(since)
+        except RuntimeError as e:
+            errors.append(e)
+    
+    # Switch threads often so a read overlaps an append
+    interval = sys.getswitchinterval()
+    sys.setswitchinterval(1e-6)
+    try:
+        threads = [threading.Thread(target=emit) for _ in range(2)] + [threading.Thread(target=read) for _ in range(2)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+    finally:
+        sys.setswitchinterval(interval)
+    
+    assert errors == []
+    assert data_store.version == since + 4000
@@ -0,0 +1,96 @@
+"""
+Tests for single-pass batch placement.
+"""
+from . import data_store, placement_engine
+
+def test_batch_placement_order_and_zones():
+    containers = placement_engine.prepare_containers([
+        {"containerId": "PE-A1", "zone": "Lab", "width": 10, "depth": 10, "height": 10},
+        {"containerId": "PE-A2", "zone": "Lab", "width": 10, "depth": 10, "height": 20},
+        {"containerId": "PE-B1", "zone": "Galley", "width": 10, "depth": 10, "height": 10}
+    ])
+    items = placement_engine.prepare_items([
+        {"itemId": "PE-LOW", "name": "Spare", "width": 10, "depth": 10, "height": 10, "priority": 1, "preferredZone": "Lab"},
+        {"itemId": "PE-HIGH", "name": "Kit", "width": 10, "depth": 10, "height": 10, "priority": 90, "preferredZone": "Lab"},
+        {"itemId": "PE-MID", "name": "Tool", "width": 10, "depth": 10, "height": 10, "priority": 50, "preferredZone": "Lab"},
+        {"itemId": "PE-BIG", "name": "Tank", "width": 10, "depth": 10, "height": 30, "priority": 99}
+    ])
+    
+    placements, unplaced = placement_engine.place_items(items, containers)
+    where = {placement["itemId"]: placement["containerId"] for placement in placements}
+    
+    # Highest priority first, each into the emptiest Lab container; the Galley is
+    # never needed and the tank fits nowhere
+    assert [placement["itemId"] for placement in placements] == ["PE-HIGH", "PE-MID", "PE-LOW"]
+    assert where == {"PE-HIGH": "PE-A2", "PE-MID": "PE-A1", "PE-LOW": "PE-A2"}
+    assert unplaced == ["PE-BIG"]
+    assert data_store.containers["PE-B1"].occupied_volume == 0
+
+def test_placement_falls_back_when_emptiest_has_no_slot():
+    containers = placement_engine.prepare_containers([
+        {"containerId": "PF-CUBE", "zone": "Lab", "width": 50, "depth": 50, "height": 50},
+        {"containerId": "PF-LONG", "zone": "Lab", "width": 200, "depth": 10, "height": 10}
+    ])
+    items = placement_engine.prepare_items([
+        {"itemId": "PF-ROD", "name": "Rod", "width": 150, "depth": 5, "height": 5, "priority": 10}
+    ])
+    
+    # The cube has more free volume but the rod only fits lengthwise in the long one
+    placements, unplaced = placement_engine.place_items(items, containers)
+    assert unplaced == []
+    assert [(placement["itemId"], placement["containerId"]) for placement in placements] == [("PF-ROD", "PF-LONG")]
+
+def test_zone_partitioned_placement_with_spill_over():
+    containers = placement_engine.prepare_containers([
+        {"containerId": "PZ-M1", "zone": "Medical", "width": 10, "depth": 10, "height": 10},
+        {"containerId": "PZ-S1", "zone": "Storage", "width": 10, "depth": 10, "height": 20}
+    ])
+    items = placement_engine.prepare_items([
+        {"itemId": f"PZ-M{i}", "name": "Kit", "width": 10, "depth": 10, "height": 5, "priority": 10 + i,
+         "preferredZone": "Medical"}
+        for i in range(3)
+    ] + [
+        {"itemId": "PZ-S", "name": "Bag", "width": 10, "depth": 10, "height": 5, "priority": 5, "preferredZone": "Storage"},
+        {"itemId": "PZ-N", "name": "Box", "width": 10, "depth": 10, "height": 5, "priority": 5}
+    ])
+    
+    for parallel in (False, True):
+        for item in items:
+            data_store.remove_item_from_container(item.id)
+        placements, unplaced = placement_engine.place_items_by_zone(items, containers, parallel=parallel)
+        where = {placement["itemId"]: placement["containerId"] for placement in placements}
+        
+        # The lowest priority medical kit spills over into Storage
+        assert unplaced == []
+        assert where == {"PZ-M2": "PZ-M1", "PZ-M1": "PZ-M1", "PZ-M0": "PZ-S1", "PZ-S": "PZ-S1", "PZ-N": "PZ-S1"}
+
+def test_solve_zone_is_pure():
+    assignments, leftover = placement_engine.solve_zone(
+        [("a", 1, 600.0), ("b", 5, 600.0), ("c", 5, 300.0)],
+        [("X", 1000.0), ("Y", 700.0)]
+    )
+    assert assignments == [("b", "X"), ("c", "Y")]
+    assert leftover == ["a"]
+
+def test_validate_layout_in_one_call():
+    placement_engine.prepare_containers([{"containerId": "PV-1", "zone": "Lab", "width": 20, "depth": 20, "height": 20}])
+    placement_engine.prepare_items([
+        {"itemId": f"PV-{i}", "name": "Box", "width": 10, "depth": 10, "height": 5, "priority": 1} for i in range(4)
+    ])
+    
+    def entry(item_id, start, end):
+        return {"itemId": item_id, "containerId": "PV-1", "position": {
+            "startCoordinates": dict(zip(("width", "depth", "height"), start)),
+            "endCoordinates": dict(zip(("width", "depth", "height"), end))
+        }}
+    
+    results = placement_engine.validate_layout([
+        entry("PV-0", (0, 0, 0), (10, 10, 5)),
+        entry("PV-1", (10, 0, 0), (20, 10, 5)),    # touches PV-0 at a face
+        entry("PV-2", (5, 5, 0), (10, 15, 10)),    # lying on its side, overlaps PV-0
+        entry("PV-3", (15, 15, 0), (25, 25, 5))    # sticks out of the container
+    ])
+    assert [result["valid"] for result in results] == [False, True, False, False]
+    assert results[0]["conflicts"] == ["PV-2"]
+    assert results[2]["conflicts"] == ["PV-0"]
+    assert results[3]["errors"] == ["Item extends outside the container"]
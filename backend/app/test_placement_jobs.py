@@ -0,0 +1,54 @@
+"""
+Tests for background placement jobs.
+"""
+import threading
+import time
+from . import data_store, placement_jobs
+
+def wait_for_job(job, timeout=10.0):
+    deadline = time.monotonic() + timeout
+    while not job.is_finished() and time.monotonic() < deadline:
+        time.sleep(0.01)
+    return job
+
+def test_placement_job_completes():
+    data_store.create_container({"id": "JOB-C1", "zone": "Jobs", "width": 10.0, "depth": 10.0, "height": 10.0})
+    items = [
+        {"itemId": f"JOB-I{i}", "name": "Crate", "width": 5, "depth": 5, "height": 5, "priority": 1}
+        for i in range(10)
+    ]
+    
+    job = wait_for_job(placement_jobs.submit_job(items, [{"containerId": "JOB-C1"}]))
+    
+    progress = job.progress()
+    assert progress["status"] == placement_jobs.COMPLETED
+    assert progress["itemsPlaced"] == 8
+    assert progress["itemsUnplaced"] == 2
+    assert len(job.placements) == 8
+    assert placement_jobs.get_job(job.id) is job
+
+def test_cancelled_job_stops_placing():
+    job = placement_jobs.PlacementJob([{"itemId": "JOB-X1", "name": "Crate", "width": 1, "depth": 1, "height": 1}], [])
+    job.cancel_event.set()
+    placement_jobs._run_job(job)
+    
+    assert job.status == placement_jobs.CANCELLED
+    assert data_store.get_item("JOB-X1") is None
+
+def test_cancel_waits_for_the_worker_to_start_the_job():
+    job = placement_jobs.PlacementJob([{"itemId": "JOB-R1", "name": "Crate", "width": 1, "depth": 1, "height": 1}], [])
+    placement_jobs.jobs[job.id] = job
+    
+    # Cancellation cannot slip in while the worker is moving the job to RUNNING
+    with job.lock:
+        canceller = threading.Thread(target=placement_jobs.cancel_job, args=(job.id,))
+        canceller.start()
+        canceller.join(0.05)
+        assert canceller.is_alive()
+        assert not job.cancel_event.is_set()
+        job.status = placement_jobs.RUNNING
+    canceller.join()
+    
+    # The running job is asked to stop, but is not reported cancelled until it does
+    assert job.cancel_event.is_set()
+    assert job.status == placement_jobs.RUNNING
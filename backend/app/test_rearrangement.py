@@ -0,0 +1,89 @@
+"""
+Tests for the rearrangement optimizer.
+"""
+from types import SimpleNamespace
+from . import rearrangement, data_store, placement_engine
+
+def container(container_id, zone, occupied, height=10.0):
+    return SimpleNamespace(id=container_id, zone=zone, width=10.0, depth=10.0, height=height, occupied_volume=occupied)
+
+def slabs(prefix, container_id, count, priority=50):
+    return [
+        SimpleNamespace(id=f"{prefix}{i}", name="Slab", container_id=container_id,
+                        width=10.0, depth=10.0, height=1.0, priority=priority)
+        for i in range(count)
+    ]
+
+def test_prefers_free_space_over_moves():
+    containers = [container("A", "Z1", 900.0), container("B", "Z2", 500.0)]
+    current = slabs("a", "A", 9) + slabs("b", "B", 5)
+    new = [SimpleNamespace(id="N", width=10.0, depth=10.0, height=5.0, priority=90, preferred_zone="Z1")]
+    
+    result = rearrangement.optimize_rearrangement(new, containers, current, seed=1)
+    
+    assert result["moves"] == []
+    assert result["placements"] == [{"itemId": "N", "containerId": "B"}]
+
+def test_moves_fewest_items_to_admit_new_item():
+    containers = [container("A", "Z1", 900.0), container("B", "Z2", 600.0)]
+    current = slabs("a", "A", 9) + slabs("b", "B", 6)
+    new = [SimpleNamespace(id="N", width=10.0, depth=10.0, height=5.0, priority=90, preferred_zone="Z1")]
+    
+    result = rearrangement.optimize_rearrangement(new, containers, current, seed=1)
+    
+    # Four slabs would have to leave A, but a single one leaving B is enough
+    assert result["unplaced"] == []
+    assert result["placements"] == [{"itemId": "N", "containerId": "B"}]
+    assert [(move["fromContainer"], move["toContainer"]) for move in result["moves"]] == [("B", "A")]
+    assert result["retrievalSteps"] == 1
+
+def test_placement_endpoint_path_applies_moves():
+    data_store.create_container({"id": "RA-1", "zone": "RA", "width": 10.0, "depth": 10.0, "height": 10.0})
+    data_store.create_container({"id": "RA-2", "zone": "RA", "width": 10.0, "depth": 10.0, "height": 4.0})
+    for i in range(6):
+        data_store.create_item({"id": f"RA-S{i}", "name": "Slab", "width": 10.0, "depth": 10.0, "height": 1.0,
+                                "mass": 1.0, "priority": 10})
+        data_store.place_item_in_container(f"RA-S{i}", "RA-1")
+    # Too tall for RA-2 and too big for what is left of RA-1
+    data_store.create_item({"id": "RA-N", "name": "Tank", "width": 10.0, "depth": 10.0, "height": 6.0,
+                            "mass": 5.0, "priority": 90})
+    
+    containers = [data_store.containers["RA-1"], data_store.containers["RA-2"]]
+    steps, placements, unplaced, stranded = placement_engine.rearrange_and_place(["RA-N"], containers, time_budget=0.2)
+    
+    assert unplaced == []
+    assert stranded == []
+    assert [placement["containerId"] for placement in placements] == ["RA-1"]
+    # Two slabs move out; RA-1 is repacked if the gap they leave is split
+    assert len([step for step in steps if step["action"] == "move"]) == 2
+    assert data_store.items["RA-N"].container_id == "RA-1"
+    assert data_store.containers["RA-1"].occupied_volume == 1000.0
+    assert data_store.containers["RA-2"].occupied_volume == 200.0
+
+def test_failed_move_rolls_the_plan_back(monkeypatch):
+    for container_id in ("RF-X", "RF-Y", "RF-Z"):
+        data_store.create_container({"id": container_id, "zone": "RF", "width": 10.0, "depth": 10.0, "height": 1.0})
+    for item_id, container_id in (("RF-S", "RF-X"), ("RF-T", "RF-Y"), ("RF-U", "RF-Z")):
+        data_store.create_item({"id": item_id, "name": "Slab", "width": 10.0, "depth": 10.0, "height": 1.0,
+                                "mass": 1.0, "priority": 10})
+        data_store.place_item_in_container(item_id, container_id)
+    data_store.create_item({"id": "RF-N", "name": "Slab", "width": 10.0, "depth": 10.0, "height": 1.0,
+                            "mass": 1.0, "priority": 90})
+    
+    # RF-U takes RF-S's place, but RF-Y is full, so RF-S has nowhere to go
+    moves = [
+        {"itemId": "RF-U", "fromContainer": "RF-Z", "toContainer": "RF-X", "retrievalSteps": 0},
+        {"itemId": "RF-S", "fromContainer": "RF-X", "toContainer": "RF-Y", "retrievalSteps": 0}
+    ]
+    monkeypatch.setattr(rearrangement, "optimize_rearrangement",
+                        lambda *args: {"moves": moves, "placements": [{"itemId": "RF-N", "containerId": "RF-Z"}],
+                                       "unplaced": []})
+    
+    containers = [data_store.containers["RF-X"], data_store.containers["RF-Y"]]
+    steps, placements, unplaced, stranded = placement_engine.rearrange_and_place(["RF-N"], containers)
+    
+    # Nothing is applied, and every slab is back where it started
+    assert (steps, placements, unplaced, stranded) == ([], [], ["RF-N"], [])
+    assert {item_id: data_store.items[item_id].container_id for item_id in ("RF-S", "RF-T", "RF-U", "RF-N")} == \
+        {"RF-S": "RF-X", "RF-T": "RF-Y", "RF-U": "RF-Z", "RF-N": None}
+    assert data_store.items["RF-S"].box() == (0.0, 0.0, 0.0, 10.0, 10.0, 1.0)
@@ -0,0 +1,30 @@
+"""
+Tests for field projection and response encoding.
+"""
+import json
+from .api import responses
+from . import data_store
+
+def test_project_keeps_requested_fields():
+    item = data_store.create_item({
+        "id": "RS-I1", "name": "Wrench", "width": 1.0, "depth": 1.0, "height": 1.0,
+        "mass": 1.0, "priority": 1
+    })
+    
+    assert responses.parse_fields(None) is None
+    assert responses.parse_fields(" id, name ,") == ["id", "name"]
+    assert responses.project(item, None) == item.to_dict()
+    assert responses.project(item, ["id", "unknown"]) == {"id": "RS-I1"}
+
+def test_encode_response():
+    content = {"success": True, "items": [{"id": "RS-I1"}]}
+    
+    assert responses.encode_response(content) is content
+    assert responses.encode_response(content, "json") is content
+    if responses.orjson is not None:
+        assert json.loads(responses.encode_response(content, "orjson").body) == content
+    if responses.msgpack is not None:
+        encoded = responses.encode_response(content, accept="application/msgpack")
+        assert encoded.media_type == responses.MSGPACK_MEDIA_TYPE
+        assert responses.msgpack.unpackb(encoded.body) == content
+    assert responses.encode_response(content, "bogus").status_code == 400
@@ -0,0 +1,92 @@
+"""
+Tests for the extraction planner and its plan cache.
+"""
+from types import SimpleNamespace
+from . import data_store, retrieval
+
+def box_item(item_id, x, y, z, width=10.0, depth=10.0, height=10.0, container_id="C1"):
+    return SimpleNamespace(
+        id=item_id, name=item_id, width=width, depth=depth, height=height, orientation="xyz",
+        position_x=x, position_y=y, position_z=z, container_id=container_id
+    )
+
+def test_shared_blocker_moved_once():
+    # F sits in front of both waste items; S is in front of F but beside the waste
+    front = box_item("F", 0.0, 10.0, 0.0, width=20.0)
+    side = box_item("S", 10.0, 0.0, 0.0)
+    waste_a = box_item("A", 0.0, 20.0, 0.0)
+    waste_b = box_item("B", 10.0, 20.0, 0.0)
+    unrelated = box_item("U", 30.0, 0.0, 0.0)
+    contents = [waste_a, waste_b, front, side, unrelated]
+    
+    plan = retrieval.plan_extraction([waste_a, waste_b], {"C1": contents})
+    actions = [(step["action"], step["itemId"]) for step in plan["steps"]]
+    
+    assert actions == [
+        ("remove", "S"), ("remove", "F"), ("retrieve", "A"), ("retrieve", "B"),
+        ("placeBack", "F"), ("placeBack", "S")
+    ]
+    assert plan["blockers_moved"] == 2
+    assert [step["step"] for step in plan["steps"]] == list(range(1, 7))
+
+def test_waste_blocking_waste_is_not_put_back():
+    outer = box_item("W1", 0.0, 0.0, 0.0)
+    inner = box_item("W2", 0.0, 10.0, 0.0)
+    plan = retrieval.plan_extraction([inner, outer], {"C1": [inner, outer]})
+    
+    assert [(step["action"], step["itemId"]) for step in plan["steps"]] == [("retrieve", "W1"), ("retrieve", "W2")]
+    assert plan["blockers_moved"] == 0
+
+def test_plan_reused_until_container_changes():
+    data_store.create_container({"id": "RP-C", "zone": "Galley", "width": 10.0, "depth": 30.0, "height": 10.0})
+    for item_id in ("RP-WATER", "RP-FRONT", "RP-OTHER"):
+        data_store.create_item({"id": item_id, "name": item_id, "width": 10.0, "depth": 10.0, "height": 10.0,
+                                "mass": 1.0, "priority": 1})
+    data_store.place_item_in_container("RP-WATER", "RP-C", (0.0, 10.0, 0.0))
+    data_store.place_item_in_container("RP-FRONT", "RP-C", (0.0, 0.0, 0.0))
+    container = data_store.containers["RP-C"]
+    water = data_store.items["RP-WATER"]
+    
+    loads = []
+    def plan():
+        return retrieval.item_extraction_plan(
+            water, container.id, container.version, lambda: loads.append(1) or data_store.container_items(container)
+        )
+    
+    first = plan()
+    assert [step["action"] for step in first["steps"]] == ["remove", "retrieve", "placeBack"]
+    # Using the item does not move anything, so the plan is a lookup
+    data_store.use_item("RP-WATER")
+    assert plan() is first
+    assert len(loads) == 1
+    
+    # Any item moving in the container invalidates it
+    data_store.remove_item_from_container("RP-FRONT")
+    assert [step["action"] for step in plan()["steps"]] == ["retrieve"]
+    assert len(loads) == 2
+
+def test_recreated_container_does_not_reuse_plans():
+    data_store.create_container({"id": "RC-C", "zone": "Galley", "width": 10.0, "depth": 30.0, "height": 10.0})
+    for item_id in ("RC-WATER", "RC-FRONT"):
+        data_store.create_item({"id": item_id, "name": item_id, "width": 10.0, "depth": 10.0, "height": 10.0,
+                                "mass": 1.0, "priority": 1})
+    data_store.place_item_in_container("RC-WATER", "RC-C", (0.0, 10.0, 0.0))
+    data_store.place_item_in_container("RC-FRONT", "RC-C", (0.0, 0.0, 0.0))
+    water = data_store.items["RC-WATER"]
+    
+    def plan():
+        container = data_store.containers["RC-C"]
+        return retrieval.item_extraction_plan(water, container.id, container.version,
+                                              lambda: data_store.container_items(container))
+    
+    assert [step["action"] for step in plan()["steps"]] == ["remove", "retrieve", "placeBack"]
+    
+    # A new container under the same ID reaches the same number of changes, but
+    # with the other item behind the water instead of in front of it
+    for item_id in ("RC-WATER", "RC-FRONT"):
+        data_store.remove_item_from_container(item_id)
+    data_store.delete_container("RC-C")
+    data_store.create_container({"id": "RC-C", "zone": "Galley", "width": 10.0, "depth": 30.0, "height": 10.0})
+    data_store.place_item_in_container("RC-WATER", "RC-C", (0.0, 10.0, 0.0))
+    data_store.place_item_in_container("RC-FRONT", "RC-C", (0.0, 20.0, 0.0))
+    assert [step["action"] for step in plan()["steps"]] == ["retrieve"]
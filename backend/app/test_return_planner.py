@@ -0,0 +1,64 @@
+"""
+Tests for the waste return planner.
+"""
+import itertools
+import random
+from types import SimpleNamespace
+from . import return_planner
+
+def brute_force(masses, volumes, max_mass, max_volume):
+    best = 0.0
+    for r in range(len(masses) + 1):
+        for combo in itertools.combinations(range(len(masses)), r):
+            mass = sum(masses[i] for i in combo)
+            volume = sum(volumes[i] for i in combo)
+            if mass <= max_mass + 1e-9 and (max_volume is None or volume <= max_volume + 1e-9):
+                best = max(best, volume)
+    return best
+
+def test_dp_beats_greedy():
+    # Greedy by mass would take the 6 kg item and stop
+    result = return_planner.solve_knapsack([6.0, 5.0, 5.0], [600.0, 500.0, 500.0], 10.0)
+    assert result["method"] == "dynamic_programming"
+    assert sorted(result["selected"]) == [1, 2]
+    assert result["total_volume"] == 1000.0
+    assert result["optimal"]
+
+def test_off_grid_masses_are_not_rounded_away():
+    # Rounded up to 0.2 kg each, the two light items no longer fit together
+    result = return_planner.solve_knapsack([0.15, 0.15, 0.2], [1.0, 1.0, 1.5], 0.3)
+    assert sorted(result["selected"]) == [0, 1]
+    assert result["total_value"] == 2.0
+    assert result["optimal"]
+
+def test_matches_brute_force_with_volume_cap():
+    rng = random.Random(7)
+    for _ in range(50):
+        n = rng.randint(1, 9)
+        masses = [round(rng.uniform(0.5, 20.0), 1) for _ in range(n)]
+        volumes = [rng.uniform(10.0, 1000.0) for _ in range(n)]
+        max_mass = rng.uniform(5.0, 50.0)
+        max_volume = rng.choice([None, rng.uniform(200.0, 3000.0)])
+        
+        result = return_planner.solve_knapsack(masses, volumes, max_mass, max_volume)
+        
+        assert result["total_mass"] <= max_mass + 1e-9
+        if max_volume is not None:
+            assert result["total_volume"] <= max_volume + 1e-9
+        assert abs(result["total_volume"] - brute_force(masses, volumes, max_mass, max_volume)) < 1e-6
+        assert result["solve_time_ms"] >= 0
+
+def test_plan_return_only_keeps_items_that_pack():
+    container = SimpleNamespace(width=30.0, depth=30.0, height=30.0)
+    # Enough volume for both long items, but neither fits in the container
+    waste = [
+        SimpleNamespace(id="W1", width=40.0, depth=2.0, height=2.0, mass=1.0),
+        SimpleNamespace(id="W2", width=40.0, depth=2.0, height=2.0, mass=1.0),
+        SimpleNamespace(id="W3", width=10.0, depth=10.0, height=10.0, mass=1.0)
+    ]
+    result = return_planner.plan_return(waste, 10.0, container)
+    
+    assert [item.id for item in result["items"]] == ["W3"]
+    assert result["selected"] == [2]
+    assert [placement["itemId"] for placement in result["placements"]] == ["W3"]
+    assert result["packing_rounds"] == 2
@@ -0,0 +1,111 @@
+"""
+Tests for item search.
+"""
+from datetime import timedelta
+from . import data_store, search_cache, search_ranking
+from .api import search
+
+def test_trigram_index_matches_substring_scan():
+    names = ["Water Filter", "Food Packet", "Filter Cartridge", "Medical Kit", "Oxygen Canister", "Kit Bag"]
+    for i, name in enumerate(names):
+        data_store.create_item({"id": f"SR-{i:03d}", "name": name, "width": 1.0, "depth": 1.0, "height": 1.0,
+                                "mass": 1.0, "priority": 1})
+    
+    def scan(name=None, item_id=None):
+        return [item.id for item in data_store.items.values()
+                if (not name or name.lower() in item.name.lower()) and (not item_id or item_id.lower() in item.id.lower())]
+    
+    for query in ["filter", "FILT", "kit", "er c", "ox", "zzz", "r"]:
+        assert [item.id for item in data_store.find_items_by_text(name=query)] == scan(name=query)
+    assert [item.id for item in data_store.find_items_by_text(name="kit", item_id="sr-00")] == scan("kit", "sr-00")
+    
+    # The index follows renames and deletions
+    data_store.update_item("SR-001", {"name": "Spare Filter"})
+    data_store.delete_item("SR-002")
+    assert [item.id for item in data_store.find_items_by_text(name="filter")] == ["SR-000", "SR-001"]
+    assert data_store.find_items_by_text(name="packet") == []
+    assert data_store.find_items_by_text(name="cartridge") == []
+
+def test_ranking_uses_cached_features_and_heap():
+    data_store.create_container({"id": "RK-C", "zone": "Lab", "width": 10.0, "depth": 30.0, "height": 10.0})
+    soon = (data_store.current_date + timedelta(days=2)).isoformat()
+    for i, (priority, expiry) in enumerate([(10, None), (80, None), (10, soon), (50, None)]):
+        data_store.create_item({"id": f"RK-{i}", "name": "Ranked", "width": 10.0, "depth": 10.0, "height": 10.0,
+                                "mass": 1.0, "priority": priority, "expiry_date": expiry})
+    for i in range(3):
+        data_store.place_item_in_container(f"RK-{i}", "RK-C", (0.0, 10.0 * i, 0.0))
+    items = [data_store.items[f"RK-{i}"] for i in range(4)]
+    
+    # RK-1 sits behind RK-0, RK-2 behind both
+    assert [search_ranking.retrieval_steps(item) for item in items] == [0, 1, 2, 0]
+    ranked = search_ranking.rank_items(items)
+    # Expiring soon beats priority; RK-1's priority outweighs the item in front of it,
+    # and the unstowed RK-3 gets no accessibility bonus
+    assert [entry["item"].id for entry in ranked] == ["RK-2", "RK-1", "RK-0", "RK-3"]
+    assert [entry["item"].id for entry in search_ranking.rank_items(items, k=2)] == ["RK-2", "RK-1"]
+    
+    # Moving the front item out invalidates the container's cached steps
+    data_store.remove_item_from_container("RK-0")
+    assert [search_ranking.retrieval_steps(item) for item in items[1:3]] == [0, 1]
+
+def test_unstowed_items_get_no_accessibility_bonus():
+    data_store.create_container({"id": "AB-C", "zone": "Lab", "width": 10.0, "depth": 10.0, "height": 10.0})
+    for item_id in ("AB-IN", "AB-OUT"):
+        data_store.create_item({"id": item_id, "name": "Bonus", "width": 10.0, "depth": 10.0, "height": 10.0,
+                                "mass": 1.0, "priority": 20})
+    data_store.place_item_in_container("AB-IN", "AB-C", (0.0, 0.0, 0.0))
+    items = [data_store.items["AB-OUT"], data_store.items["AB-IN"]]
+    
+    ranked = search_ranking.rank_items(items)
+    assert [entry["item"].id for entry in ranked] == ["AB-IN", "AB-OUT"]
+    scores = {entry["item"].id: entry["score"] for entry in ranked}
+    assert abs(scores["AB-IN"] - scores["AB-OUT"] - search_ranking.ACCESSIBILITY_WEIGHT) < 1e-9
+
+def test_search_cache_until_store_changes():
+    cache = search_cache.SearchCache(max_entries=2)
+    key = search_cache.normalize_filters({"item_name": "Kit", "zone": None, "page": 1})
+    assert key == search_cache.normalize_filters({"page": 1, "item_name": "kit"})
+    
+    state = search_cache.store_state()
+    assert cache.get(key) is None
+    cache.put(key, "result", state)
+    assert cache.get(key) == "result"
+    
+    # Any change to the data store empties the cache
+    data_store.create_item({"id": "SC-1", "name": "Cached", "width": 1.0, "depth": 1.0, "height": 1.0,
+                            "mass": 1.0, "priority": 1})
+    assert cache.get(key) is None
+    
+    # A result computed before the change is not cached under the new version
+    cache.put(key, "stale", state)
+    assert cache.get(key) is None
+    
+    state = search_cache.store_state()
+    for page in (1, 2, 3):
+        cache.put(("page", page), page, state)
+    stats = cache.stats()
+    assert (stats["hits"], stats["misses"], stats["entries"], stats["evictions"], stats["invalidations"]) == (1, 3, 2, 1, 1)
+
+def test_batch_search_writes_one_log():
+    for i in range(3):
+        data_store.create_item({"id": f"BS-{i}", "name": f"Batch Probe {i}", "width": 1.0, "depth": 1.0, "height": 1.0,
+                                "mass": 1.0, "priority": 1})
+    logs_before = len(data_store.logs)
+    
+    response = search.batch_search({"itemIds": ["BS-0", "BS-2", "BS-9"], "names": ["batch probe", "no such"]})
+    assert [result["found"] for result in response["items"]] == [True, True, False]
+    assert [item["itemId"] for item in response["names"][0]["items"]] == ["BS-0", "BS-1", "BS-2"]
+    assert response["names"][1]["items"] == []
+    assert len(data_store.logs) == logs_before + 1
+
+def test_item_id_search_is_exact_unless_asked():
+    for item_id in ("EX-7", "EX-70", "EX-71"):
+        data_store.create_item({"id": item_id, "name": "Exact", "width": 1.0, "depth": 1.0, "height": 1.0,
+                                "mass": 1.0, "priority": 1})
+    
+    body, _ = search.run_search(item_id="EX-7")
+    assert body["item"]["itemId"] == "EX-7"
+    body, _ = search.run_search(item_id="ex-7")
+    assert body["found"] is False
+    body, _ = search.run_search(item_id="ex-7", match="substring")
+    assert [item["id"] for item in body["items"]] == ["EX-7", "EX-70", "EX-71"]
@@ -0,0 +1,159 @@
+"""
+Tests for the voxel occupancy grids and item packing.
+"""
+import random
+from types import SimpleNamespace
+from . import spatial
+
+def test_free_positions_match_cell_by_cell_check():
+    rng = random.Random(3)
+    for _ in range(20):
+        width, depth, height = (rng.choice([20.0, 33.0, 40.0]) for _ in range(3))
+        grid = spatial.OccupancyGrid(width, depth, height)
+        for _ in range(3):
+            grid.add_box(rng.uniform(0, width - 5), rng.uniform(0, depth - 5), rng.uniform(0, height - 5),
+                         rng.uniform(1, 10), rng.uniform(1, 10), rng.uniform(1, 10))
+        box = [rng.uniform(1, 15) for _ in range(3)]
+        
+        expected = [
+            (float(x * 5), float(y * 5), float(z * 5))
+            for x in range(grid.shape[0]) for y in range(grid.shape[1]) for z in range(grid.shape[2])
+            if grid.is_free(x * 5, y * 5, z * 5, *box)
+        ]
+        assert grid.free_positions(*box) == expected
+        assert grid.free_positions(*box, limit=7) == expected[:7]
+
+def test_pack_items_without_overlap():
+    items = [SimpleNamespace(id=f"P{i}", width=20.0, depth=10.0, height=40.0) for i in range(5)]
+    placements, unpacked = spatial.pack_items(40.0, 40.0, 20.0, items)
+    
+    # Only four fit, and only when laid on their side
+    assert len(placements) == 4
+    assert len(unpacked) == 1
+    grid = spatial.OccupancyGrid(40.0, 40.0, 20.0)
+    for placement in placements:
+        assert grid.is_free(*placement["position"], *placement["dimensions"])
+        grid.add_box(*placement["position"], *placement["dimensions"])
+
+def test_remove_box_keeps_overlaps_and_near_query():
+    rng = random.Random(11)
+    boxes = [(rng.uniform(0, 40), rng.uniform(0, 40), rng.uniform(0, 40), rng.uniform(2, 12), rng.uniform(2, 12), rng.uniform(2, 12))
+             for _ in range(30)]
+    grid = spatial.OccupancyGrid(50.0, 50.0, 50.0)
+    for box in boxes:
+        grid.add_box(*box)
+    
+    for k, box in enumerate(boxes[:15]):
+        before = set(grid.free_positions(8.0, 8.0, 8.0))
+        grid.remove_box(*box)
+        after = grid.free_positions(8.0, 8.0, 8.0)
+        
+        fresh = spatial.OccupancyGrid(50.0, 50.0, 50.0)
+        for other in boxes[k + 1:]:
+            fresh.add_box(*other)
+        assert (grid.words == fresh.words).all()
+        assert after == fresh.free_positions(8.0, 8.0, 8.0)
+        # Everything that became free overlaps the removed box
+        assert set(after) - before == set(grid.free_positions(8.0, 8.0, 8.0, near=box)) - before
+
+def test_free_positions_span_several_words():
+    rng = random.Random(13)
+    grid = spatial.OccupancyGrid(12.0, 200.0, 10.0, resolution=1.0)
+    for _ in range(12):
+        grid.add_box(float(rng.randrange(0, 10)), float(rng.randrange(0, 190)), float(rng.randrange(0, 8)),
+                     float(rng.randrange(1, 4)), float(rng.randrange(1, 80)), float(rng.randrange(1, 4)))
+    occupied = grid.occupied()
+    assert grid.words.shape == (12, 10, 4)
+    
+    for box in [(3.0, 70.0, 2.0), (1.0, 1.0, 1.0), (5.0, 130.0, 5.0)]:
+        expected = [
+            (float(x), float(y), float(z))
+            for x in range(13 - int(box[0])) for y in range(201 - int(box[1])) for z in range(11 - int(box[2]))
+            if not occupied[x:x + int(box[0]), y:y + int(box[1]), z:z + int(box[2])].any()
+        ]
+        assert grid.free_positions(*box) == expected
+        assert grid.free_positions(*box, limit=7) == expected[:7]
+
+def test_blocking_counts_match_item_scan():
+    rng = random.Random(5)
+    boxes = [(float(rng.randrange(0, 60, 5)), float(rng.randrange(0, 60, 5)), float(rng.randrange(0, 60, 5)),
+              float(rng.choice([5, 10, 15])), float(rng.choice([5, 10])), float(rng.choice([5, 10, 15])))
+             for _ in range(25)]
+    access_map = spatial.AccessMap(80.0, 80.0, 80.0, boxes)
+    positions = [(float(x), float(y), float(z)) for x in range(0, 70, 10) for y in range(0, 70, 10) for z in range(0, 70, 10)]
+    
+    counts = access_map.blocking_counts(positions, 10.0, 10.0)
+    for (x, y, z), count in zip(positions, counts):
+        # Every distinct box in front that overlaps the 10 x 10 footprint
+        expected = sum(1 for bx, by, bz, bw, bd, bh in boxes
+                       if by < y and bx < x + 10 and bx + bw > x and bz < z + 10 and bz + bh > z)
+        assert count == expected
+    
+    # Two boxes side by side in front of a wide item both count
+    side_by_side = spatial.AccessMap(40.0, 40.0, 10.0, [(0.0, 0.0, 0.0, 10.0, 10.0, 10.0), (10.0, 0.0, 0.0, 10.0, 10.0, 10.0)])
+    assert side_by_side.blocking_counts([(0.0, 20.0, 0.0)], 20.0, 10.0).tolist() == [2]
+    assert abs(side_by_side.accessibility_scores([(0.0, 20.0, 0.0)], 20.0, 10.0)[0] - 0.5 * 0.8 ** 2) < 1e-9
+
+def test_access_map_stays_sparse_in_huge_container():
+    boxes = [(0.0, 0.0, 0.0, 100.0, 100.0, 100.0), (0.0, 200.0, 0.0, 100.0, 100.0, 100.0)]
+    access_map = spatial.AccessMap(5000.0, 5000.0, 2000.0, boxes, [(10.0, 10.0, 10.0)])
+    
+    # Only the boxes are stored alongside the sparse grid
+    assert isinstance(access_map.grid, spatial.ColumnGrid)
+    assert access_map.lower.shape == (2, 3)
+    assert access_map.blocking_counts([(0.0, 300.0, 0.0), (0.0, 150.0, 0.0), (500.0, 300.0, 0.0)], 10.0, 10.0).tolist() == [2, 1, 0]
+
+def test_column_grid_matches_dense_grid():
+    rng = random.Random(7)
+    boxes = [(rng.uniform(0, 40), rng.uniform(0, 40), rng.uniform(0, 40), rng.uniform(2, 12), rng.uniform(2, 12), rng.uniform(2, 12))
+             for _ in range(30)]
+    dense = spatial.OccupancyGrid(50.0, 50.0, 50.0)
+    sparse = spatial.ColumnGrid(50.0, 50.0, 50.0)
+    for box in boxes:
+        dense.add_box(*box)
+        sparse.add_box(*box)
+    
+    for box in boxes[:10]:
+        dense.remove_box(*box)
+        sparse.remove_box(*box)
+        assert sparse.free_positions(8.0, 6.0, 9.0) == dense.free_positions(8.0, 6.0, 9.0)
+        assert sparse.free_positions(8.0, 6.0, 9.0, near=box) == dense.free_positions(8.0, 6.0, 9.0, near=box)
+        assert sparse.free_positions(4.0, 4.0, 4.0, limit=5) == dense.free_positions(4.0, 4.0, 4.0, limit=5)
+
+def test_grid_resolution_follows_item_sizes():
+    assert spatial.choose_resolution(100.0, 100.0, 200.0, [(20.0, 40.0, 10.0)]) == 10.0
+    assert spatial.choose_resolution(100.0, 100.0, 200.0, [(7.5, 15.0, 30.0)]) == 2.5
+    assert spatial.choose_resolution(100.0, 100.0, 200.0, [(3.0, 7.0, 11.0)]) == 1.0
+    
+    # Small items in a large container do not push the grid past the dense cell limit
+    assert spatial.choose_resolution(200.0, 200.0, 200.0, [(13.0, 7.0, 9.0)]) == 2.5
+    assert isinstance(spatial.make_grid(200.0, 200.0, 200.0, [(13.0, 7.0, 9.0)]), spatial.OccupancyGrid)
+    
+    # A huge, mostly empty module is kept sparse, at the coarsest cell size
+    grid = spatial.make_grid(5000.0, 5000.0, 2000.0, [(10.0, 10.0, 10.0)])
+    assert isinstance(grid, spatial.ColumnGrid)
+    assert grid.resolution == 20.0
+    grid.add_box(0.0, 0.0, 0.0, 100.0, 100.0, 100.0)
+    assert grid.first_free_position(10.0, 10.0, 10.0) == (0.0, 0.0, 100.0)
+    assert len(grid.columns) == 25
+
+def test_box_index_matches_pairwise_check():
+    rng = random.Random(17)
+    boxes = [tuple(rng.uniform(0, 50) for _ in range(3)) + tuple(rng.uniform(1, 15) for _ in range(3)) for _ in range(40)]
+    candidates = [tuple(rng.uniform(0, 50) for _ in range(3)) + tuple(rng.uniform(1, 15) for _ in range(3)) for _ in range(60)]
+    
+    def overlap(a, b):
+        return all(a[k] < b[k] + b[k + 3] and a[k] + a[k + 3] > b[k] for k in range(3))
+    
+    index = spatial.BoxIndex(boxes, keys=[f"B{i}" for i in range(len(boxes))])
+    assert index.collisions(candidates) == [
+        [f"B{i}" for i, box in enumerate(boxes) if overlap(candidate, box)] for candidate in candidates
+    ]
+    assert index.self_collisions() == [
+        (f"B{i}", f"B{j}") for i in range(len(boxes)) for j in range(i + 1, len(boxes)) if overlap(boxes[i], boxes[j])
+    ]
+    
+    index.remove("B0")
+    index.add((0.0, 0.0, 0.0, 10.0, 10.0, 10.0), "NEW")
+    assert index.collides(9.0, 9.0, 9.0, 2.0, 2.0, 2.0)
+    assert not spatial.BoxIndex().collides(0.0, 0.0, 0.0, 1.0, 1.0, 1.0)
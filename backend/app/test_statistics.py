@@ -0,0 +1,124 @@
+"""
+Tests for the incrementally maintained statistics and expiry index.
+"""
+from datetime import datetime
+from . import data_store
+
+def recount():
+    all_items = list(data_store.items.values())
+    return {
+        "total_items": len(all_items),
+        "total_containers": len(data_store.containers),
+        "items_in_containers": len([item for item in all_items if item.container_id]),
+        "waste_items": len([item for item in all_items if item.status == "Waste"])
+    }
+
+def waste_groups():
+    groups = {}
+    for item in data_store.items.values():
+        if item.status == "Waste":
+            groups.setdefault(item.container_id, set()).add(item.id)
+    return groups
+
+def test_counters_match_full_scan():
+    data_store.create_container({"id": "ST-C1", "zone": "Stats", "width": 50.0, "depth": 50.0, "height": 50.0})
+    data_store.create_container({"id": "ST-C2", "zone": "Stats", "width": 50.0, "depth": 50.0, "height": 50.0})
+    for i in range(5):
+        data_store.create_item({
+            "id": f"ST-I{i}", "name": "Ration", "width": 5.0, "depth": 5.0, "height": 5.0,
+            "mass": 1.0, "priority": 1, "expiry_date": f"2030-01-0{i + 1}", "usage_limit": 2
+        })
+        data_store.place_item_in_container(f"ST-I{i}", "ST-C1")
+    
+    data_store.place_item_in_container("ST-I0", "ST-C2")
+    data_store.remove_item_from_container("ST-I1")
+    data_store.mark_item_as_waste("ST-I2", "Expired")
+    data_store.mark_item_as_waste("ST-I2", "Expired")
+    data_store.use_item("ST-I3")
+    data_store.use_item("ST-I3")
+    data_store.remove_item_from_container("ST-I3")
+    data_store.update_item("ST-I4", {"status": "Waste"})
+    data_store.remove_item("ST-I4")
+    
+    assert data_store.get_statistics() == recount()
+    assert {k: set(v) for k, v in data_store.get_waste_by_container().items()} == waste_groups()
+    assert "ST-I2" in {item.id for item in data_store.get_waste_items("ST-C1")}
+    assert "ST-I0" in data_store.containers["ST-C2"].items
+    assert "ST-I0" not in data_store.containers["ST-C1"].items
+
+def test_expiry_index_range_query():
+    data_store.create_item({
+        "id": "ST-E1", "name": "Milk", "width": 1.0, "depth": 1.0, "height": 1.0,
+        "mass": 1.0, "priority": 1, "expiry_date": "2031-06-10"
+    })
+    data_store.create_item({
+        "id": "ST-E2", "name": "Bread", "width": 1.0, "depth": 1.0, "height": 1.0,
+        "mass": 1.0, "priority": 1, "expiry_date": "2031-06-05"
+    })
+    
+    found = data_store.get_items_expiring_between(datetime(2031, 6, 1), datetime(2031, 6, 30))
+    assert [item.id for item in found] == ["ST-E2", "ST-E1"]
+    
+    data_store.update_item("ST-E1", {"expiry_date": "2031-08-01"})
+    found = data_store.get_items_expiring_between(datetime(2031, 6, 1), datetime(2031, 6, 30))
+    assert [item.id for item in found] == ["ST-E2"]
+    
+    data_store.delete_item("ST-E2")
+    assert data_store.get_items_expiring_between(datetime(2031, 6, 1), datetime(2031, 6, 30)) == []
+
+def test_expiry_index_mixes_offset_and_naive_dates():
+    data_store.create_item({
+        "id": "ST-Z1", "name": "Yogurt", "width": 1.0, "depth": 1.0, "height": 1.0,
+        "mass": 1.0, "priority": 1, "expiry_date": "2034-02-01T12:00:00+05:00"
+    })
+    data_store.create_item({
+        "id": "ST-Z2", "name": "Yogurt", "width": 1.0, "depth": 1.0, "height": 1.0,
+        "mass": 1.0, "priority": 1, "expiry_date": "2034-02-01T08:00:00"
+    })
+    
+    # The offset date is indexed as 07:00 UTC, before the naive one
+    assert data_store.expiry_keys["ST-Z1"] == datetime(2034, 2, 1, 7)
+    found = data_store.get_items_expiring_between(datetime(2034, 2, 1), datetime(2034, 2, 2))
+    assert [item.id for item in found] == ["ST-Z1", "ST-Z2"]
+
+def test_expiry_index_pagination():
+    for day in range(1, 6):
+        data_store.create_item({
+            "id": f"ST-P{day}", "name": "Juice", "width": 1.0, "depth": 1.0, "height": 1.0,
+            "mass": 1.0, "priority": 1, "expiry_date": f"2032-03-0{day}"
+        })
+    start, end = datetime(2032, 3, 1), datetime(2032, 3, 31)
+    
+    assert data_store.count_items_expiring_between(start, end) == 5
+    page = data_store.get_items_expiring_between(start, end, skip=2, limit=2)
+    assert [item.id for item in page] == ["ST-P3", "ST-P4"]
+    assert data_store.get_items_expiring_between(start, end, skip=10, limit=2) == []
+    
+    # A negative skip never reaches items that expire before the window
+    data_store.create_item({
+        "id": "ST-P0", "name": "Juice", "width": 1.0, "depth": 1.0, "height": 1.0,
+        "mass": 1.0, "priority": 1, "expiry_date": "2032-02-28"
+    })
+    page = data_store.get_items_expiring_between(start, end, skip=-2, limit=2)
+    assert [item.id for item in page] == ["ST-P1", "ST-P2"]
+
+def test_bulk_removal_matches_full_scan():
+    data_store.create_container({"id": "ST-B1", "zone": "Stats", "width": 50.0, "depth": 50.0, "height": 50.0})
+    for i in range(20):
+        data_store.create_item({
+            "id": f"ST-B{i}", "name": "Wrapper", "width": 2.0, "depth": 2.0, "height": 2.0,
+            "mass": 0.1, "priority": 1, "expiry_date": f"2033-01-{i + 1:02d}"
+        })
+        data_store.place_item_in_container(f"ST-B{i}", "ST-B1")
+        if i % 2 == 0:
+            data_store.mark_item_as_waste(f"ST-B{i}", "Expired")
+    
+    removed = data_store.remove_items([f"ST-B{i}" for i in range(0, 20, 2)] + ["ST-B0", "missing"])
+    
+    assert len(removed) == 10
+    container = data_store.containers["ST-B1"]
+    assert list(container.items) == [f"ST-B{i}" for i in range(1, 20, 2)]
+    assert container.occupied_volume == 10 * 8.0
+    assert data_store.get_waste_items("ST-B1") == []
+    assert data_store.get_statistics() == recount()
+    assert data_store.count_items_expiring_between(datetime(2033, 1, 1), datetime(2033, 1, 31)) == 10
@@ -1,10 +1,9 @@
-import pandas as pd
 from typing import List, Dict, Any, Optional
 from sqlalchemy.orm import Session
 from datetime import datetime, timedelta
 import json
 
-from . import models, schemas, crud
+from . import models, schemas, crud, return_planner
 
 # Constants
 UNDOCKING_WEIGHT_LIMIT = 500  # kg
@@ -98,40 +97,11 @@ def plan_waste_return(db: Session) -> Optional[Dict[str, Any]]:
     # Calculate total weight
     total_weight = sum(item.mass for item in waste_items)
     
-    # If total weight exceeds limit, sort by priority and mass to select items
+    # If total weight exceeds limit, select the items that reclaim the most volume
     selected_items = waste_items
     if total_weight > UNDOCKING_WEIGHT_LIMIT:
-        # Convert to DataFrame for easier sorting and filtering
-        items_df = pd.DataFrame([
-            {
-                "id": item.id,
-                "name": item.name,
-                "mass": item.mass,
-                "priority": item.priority,
-                "container_id": item.container_id
-            }
-            for item in waste_items
-        ])
-        
-        # Sort by priority (low to high) and then by mass (high to low)
-        items_df = items_df.sort_values(["priority", "mass"], ascending=[True, False])
-        
-        # Select items up to the weight limit
-        cumulative_mass = 0
-        selected_indices = []
-        
-        for idx, row in items_df.iterrows():
-            if cumulative_mass + row["mass"] <= UNDOCKING_WEIGHT_LIMIT:
-                cumulative_mass += row["mass"]
-                selected_indices.append(idx)
-        
-        selected_items_df = items_df.iloc[selected_indices]
-        
-        # Get the original Item objects for the selected items
-        selected_items = [
-            item for item in waste_items 
-            if item.id in selected_items_df["id"].values
-        ]
+        selection = return_planner.select_return_items(waste_items, UNDOCKING_WEIGHT_LIMIT)
+        selected_items = selection["items"]
     
     # Generate plan and manifest
     plan = []
@@ -1307,6 +1307,46 @@ document.addEventListener('DOMContentLoaded', function() {
         }
     });
     
+    // Live Station Updates
+    // Subscribe to pushed change events instead of re-polling the status endpoints
+    if (window.EventSource) {
+        const stationEvents = new EventSource(`${API_URL}/events/stream`);
+        
+        stationEvents.addEventListener('date_advanced', function(e) {
+            const event = JSON.parse(e.data);
+            document.getElementById('current-date').textContent = event.data.currentDate;
+            flowCurrentDate.textContent = event.data.currentDate;
+        });
+        
+        // Re-run the query behind a panel the user has open; bursts of events
+        // (e.g. a simulated day expiring many items) trigger a single reload
+        const refreshTimers = {};
+        function refreshOpenPanel(panel, button) {
+            if (panel.style.display !== 'block') {
+                return;
+            }
+            clearTimeout(refreshTimers[button.id]);
+            refreshTimers[button.id] = setTimeout(() => button.click(), 250);
+        }
+        
+        ['item_placed', 'item_retrieved'].forEach(eventType => {
+            stationEvents.addEventListener(eventType, function() {
+                refreshOpenPanel(logsResult, getLogsButton);
+            });
+        });
+        
+        ['item_expired', 'item_waste', 'undocked'].forEach(eventType => {
+            stationEvents.addEventListener(eventType, function() {
+                refreshOpenPanel(wasteResult, identifyWasteButton);
+                refreshOpenPanel(logsResult, getLogsButton);
+            });
+        });
+        
+        stationEvents.onerror = function() {
+            console.warn('Station event stream interrupted, the browser will reconnect');
+        };
+    }
+    
     // Helper Functions
     function createTable(headers) {
         const table = document.createElement('table');